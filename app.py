@@ -1,12 +1,44 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime
+import hashlib
+import io
+import os
+import threading
 import time
+import uuid
+
+# imports au niveau du module: streamlit charge déjà pandas, numpy, pyarrow et plotly, et les
+# modules qualite ne coûtent que ~40 ms au premier lancement (rien aux reruns, sys.modules);
+# seuls duckdb (dans qualite.requetes) et plotly.express sont importés à l'usage
+from qualite import AnalyseurQualite, analyser_csv
+from qualite.analyseur import AnalyseAnnulee
+from qualite.cache import empreinte_contenu
+from qualite.chargement import charger
+from qualite.compaction import compacter
+from qualite.doublons import HistoriqueTradeIDs, table_doublons
+from qualite.groupes import COLONNES_DATE, NON_VENTILES, PERIODES
+from qualite.echantillon import affiner, estimer
+from qualite.incremental import analyser_increment, charger_etat, sauver_etat
+from qualite.instrumentation import Chrono, profiler, tableau
+from qualite.rapport import TYPES_MIME, rapport_json, rapport_octets
+from qualite.regles import PLAN_DEFAUT, charger_regles
+from qualite.requetes import ProfilRequetes, analyser_requetes
+from qualite.service import ServiceAnalyses
+from qualite.tendances import HistoriqueQualite, nom_jeu
+from qualite.violations import exporter
+
+REPERTOIRE_ETATS = '.dq_etats'
+# service partagé par toutes les sessions du serveur
+NB_WORKERS_SERVICE = max(1, (os.cpu_count() or 1) // 2)
+BUDGET_RESULTATS_MB = 2048
+# répertoire où le cache partagé garde aussi les résultats (survit au redémarrage): réglage du serveur
+CACHE_DISQUE = os.environ.get('DQ_CACHE_DISQUE') or None
 
 st.set_page_config(page_title="Data Quality Dashboard", layout="wide")
+# identifiant de session: file d'attente propre dans le service partagé
+utilisateur = st.session_state.setdefault('utilisateur', uuid.uuid4().hex)
 
 st.markdown("""
     <style>
@@ -14,400 +46,540 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-class AnalyseurQualite:
-    
-    def __init__(self, df):
-        self.df = df
-        self.resultats = {}
-        self.checks_ok = 0
-        self.checks_total = 15
-        self.timestamp = datetime.now()
-    
-    def check_valeurs_manquantes(self):
-        missing_pct = (self.df.isna().sum() / len(self.df) * 100).to_dict()
-        total = self.df.isna().sum().sum()
-        ok = total == 0
-        
-        self.resultats['valeurs_manquantes'] = {
-            'passed': ok,
-            'detail': f"Total missing: {total}",
-            'by_column': missing_pct,
-            'severity': 'CRITICAL' if total > len(self.df) * 0.1 else 'WARNING' if total > 0 else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_doublons(self):
-        if 'TradeID' in self.df.columns:
-            dupes = self.df['TradeID'].duplicated().sum()
-            ok = dupes == 0
+@st.cache_resource
+def service_analyses():
+    return ServiceAnalyses(NB_WORKERS_SERVICE, capacite=8, budget_mb=BUDGET_RESULTATS_MB, repertoire=CACHE_DISQUE)
+
+@st.cache_resource
+def historique_trade_ids():
+    return HistoriqueTradeIDs(os.path.join(REPERTOIRE_ETATS, 'trade_ids.sqlite'))
+
+@st.cache_resource
+def historique_qualite():
+    return HistoriqueQualite(os.path.join(REPERTOIRE_ETATS, 'qualite.sqlite'))
+
+def memo_session(nom, cle, calcul):
+    """Valeur gardée dans la session tant que `cle` ne change pas: une entrée par nom, remplacée ensuite."""
+    entree = st.session_state.get(nom)
+    if entree is None or entree[0] != cle:
+        entree = st.session_state[nom] = (cle, calcul())
+    return entree[1]
+
+def derive(analyseur, nom, calcul):
+    """Valeur calculée une fois pour l'analyse affichée; la session ne garde que celles de la dernière."""
+    derives = memo_session('derives', analyseur, dict)
+    if nom not in derives:
+        derives[nom] = calcul()
+    return derives[nom]
+
+def empreinte_session(octets, configuration):
+    # contenu haché au premier passage seulement: au rerun, comparer les octets coûte bien moins cher
+    return memo_session('empreinte', (octets, repr(sorted(configuration.items()))),
+                        lambda: empreinte_contenu(octets, configuration))
+
+def lire_octets(chemin):
+    with open(chemin, 'rb') as f:
+        return f.read()
+
+def lire_fichier(octets, nom):
+    df = charger(io.BytesIO(octets), nom, checks_actifs, AnalyseurQualite.colonnes_lues(regles))
+    if compaction:
+        df, _ = compacter(df)
+    return df
+
+def analyser_fichier(octets, nom, registre=None, tendances=None, progression=None, annulation=None):
+    # registre et tendances sont résolus par le script: st.cache_resource n'a pas de contexte sur un worker
+    with Chrono() as chargement:
+        df = lire_fichier(octets, nom)
+        chargement.nb_lignes = len(df)
+    if annulation is not None and annulation.is_set():
+        raise AnalyseAnnulee('chargement')
+    analyseur = AnalyseurQualite(df, execution=execution, nb_workers=nb_workers and int(nb_workers),
+                                 checks=checks_actifs, historique=registre, regles=regles,
+                                 source=nom, approximation=approximation, tendances=tendances)
+    analyseur.performances['chargement'] = chargement.mesures
+    analyseur.analyser_tout(progression, annulation)
+    if tendances is not None:
+        # un même contenu n'est enregistré qu'une fois, quels que soient les réglages
+        tendances.enregistrer(analyseur, empreinte=empreinte_contenu(octets))
+    if registre is not None and 'TradeID' in analyseur.df.columns:
+        registre.enregistrer(analyseur.df['TradeID'], nom)
+    return analyseur
+
+def executer(analyse):
+    # profilage: cProfile + tracemalloc (pic mémoire par check), sans passer par le cache
+    global profilage_texte, profilage_stats
+    if not profilage:
+        return analyse()
+    analyseur, profilage_texte, profilage_stats = profiler(analyse)
+    return analyseur
+
+def abandonner_tache():
+    # l'analyse ne s'arrête que si aucune autre session ne l'attend
+    tache = st.session_state.get('tache')
+    if tache is not None:
+        service_analyses().abandonner(tache, utilisateur)
+        st.session_state['tache'] = None
+
+def afficher_annulation(nom):
+    st.warning(f"Analyse de {nom} annulée")
+    if st.button("Relancer l'analyse"):
+        st.session_state['annulee'] = None
+        st.rerun()
+    st.stop()
+
+def analyser_en_cache(octets, nom):
+    """(analyseur, None) si le résultat est prêt, sinon (analyseur partiel ou None, tâche de fond)."""
+    registre = historique_trade_ids() if historique else None
+    tendances = historique_qualite() if suivi_tendances else None
+    if profilage:
+        abandonner_tache()
+        return executer(lambda: analyser_fichier(octets, nom, registre, tendances)), None
+    service = service_analyses()
+    cle = empreinte_session(octets, {'format': os.path.splitext(nom)[1], 'compaction': compaction,
+                                     'historique': historique, 'approximation': approximation,
+                                     'tendances': suivi_tendances,
+                                     **AnalyseurQualite.configuration(checks_actifs, regles)})
+    tache = st.session_state.get('tache')
+    if tache is not None and tache.cle != cle:
+        # nouveau fichier ou nouvelle configuration: l'analyse en cours est abandonnée
+        abandonner_tache()
+        tache = None
+    if st.session_state.get('annulee') == cle:
+        afficher_annulation(nom)
+    # doublons inter-fichiers: le résultat dépend aussi du registre TradeID, qui ne fait que grossir.
+    # Pas de cache partagé; la session garde son analyse tant que le registre n'a pas changé de taille
+    revision = len(registre) if registre is not None else None
+    if tache is None and registre is not None:
+        entree = st.session_state.get('analyse_historique')
+        if entree is not None and entree[0] == (cle, revision):
+            return entree[1], None
+    if tache is None:
+        # même fichier ouvert par une autre session: résultat ou tâche partagés
+        analyseur, tache = service.soumettre(
+            cle, lambda progression, annulation: analyser_fichier(octets, nom, registre, tendances, progression,
+                                                                  annulation),
+            utilisateur, cache=registre is None)
+        if analyseur is not None:
+            if analyseur.df is None:
+                # entrée relue depuis le disque: seuls les résultats y sont stockés
+                analyseur.df = lire_fichier(octets, nom)
+                service.resultats.put(cle, analyseur, disque=False)
+            return analyseur, None
+        st.session_state['tache'] = tache
+        # petit fichier: pas d'affichage intermédiaire
+        tache.attendre(1.0)
+    if tache.etat == 'terminee':
+        st.session_state['tache'] = None
+        if registre is not None:
+            # taille relue après l'enregistrement des TradeID du fichier par l'analyse
+            st.session_state['analyse_historique'] = ((cle, len(registre)), tache.analyseur)
+        return tache.analyseur, None
+    return tache.analyseur, tache
+
+def afficher_resultat(nom, res, approximatif=False, df=None, analyseur=None):
+    nom_affiche = nom.replace('_', ' ').title()
+    icone = "✅" if res['passed'] else "❌"
+    sev = res.get('severity', 'OK')
+    if approximatif:
+        nom_affiche += " (approx.)"
+
+    with st.expander(f"{icone} {nom_affiche} [{sev}]", expanded=False):
+        if res['passed']:
+            st.success("PASSED")
         else:
-            dupes = self.df.duplicated().sum()
-            ok = dupes == 0
-        
-        self.resultats['doublons'] = {
-            'passed': ok,
-            'count': dupes,
-            'percentage': dupes / len(self.df) * 100 if len(self.df) > 0 else 0,
-            'severity': 'CRITICAL' if dupes > 0 else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_types(self):
-        problemes = {}
-        colonnes_date = ['Date', 'SettlementDate', 'CreatedAt']
-        
-        for col in colonnes_date:
-            if col in self.df.columns:
-                try:
-                    pd.to_datetime(self.df[col])
-                except:
-                    problemes[col] = 'Format date invalide'
-        
-        ok = len(problemes) == 0
-        self.resultats['types'] = {
-            'passed': ok,
-            'issues': problemes,
-            'severity': 'WARNING' if problemes else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_outliers(self):
-        nb_outliers = 0
-        details = {}
-        
-        cols_num = self.df.select_dtypes(include=[np.number]).columns
-        for col in cols_num:
-            if self.df[col].notna().sum() > 0:
-                q1 = self.df[col].quantile(0.25)
-                q3 = self.df[col].quantile(0.75)
-                iqr = q3 - q1
-                lower = q1 - 1.5 * iqr
-                upper = q3 + 1.5 * iqr
-                
-                outliers = ((self.df[col] < lower) | (self.df[col] > upper)).sum()
-                if outliers > 0:
-                    nb_outliers += outliers
-                    details[col] = outliers
-        
-        ok = nb_outliers == 0
-        self.resultats['outliers'] = {
-            'passed': ok,
-            'total': nb_outliers,
-            'detail': details,
-            'severity': 'WARNING' if nb_outliers > len(self.df) * 0.05 else 'INFO' if nb_outliers > 0 else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_ranges(self):
-        problemes = {}
-        
-        if 'Quantity' in self.df.columns:
-            invalides = (self.df['Quantity'] < 0).sum()
-            if invalides > 0:
-                problemes['Quantity'] = f"{invalides} valeurs négatives"
-        
-        if 'Price' in self.df.columns:
-            invalides = (self.df['Price'] < 0).sum()
-            if invalides > 0:
-                problemes['Price'] = f"{invalides} valeurs négatives"
-        
-        if 'Commission' in self.df.columns:
-            invalides = ((self.df['Commission'] < 0) | (self.df['Commission'] > 1)).sum()
-            if invalides > 0:
-                problemes['Commission'] = f"{invalides} hors range"
-        
-        ok = len(problemes) == 0
-        self.resultats['ranges'] = {
-            'passed': ok,
-            'issues': problemes,
-            'severity': 'CRITICAL' if problemes else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_dates(self):
-        problemes = {}
-        
-        if 'Date' in self.df.columns and 'SettlementDate' in self.df.columns:
-            try:
-                dates = pd.to_datetime(self.df['Date'])
-                settlement = pd.to_datetime(self.df['SettlementDate'])
-                
-                invalides = (settlement < dates).sum()
-                if invalides > 0:
-                    problemes['settlement_avant_trade'] = invalides
-            except:
-                problemes['erreur_parsing'] = True
-        
-        ok = len(problemes) == 0
-        self.resultats['dates'] = {
-            'passed': ok,
-            'issues': problemes,
-            'severity': 'CRITICAL' if problemes else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_categoriques(self):
-        problemes = {}
-        
-        if 'Status' in self.df.columns:
-            valides = ['EXECUTED', 'PENDING', 'CANCELLED', 'SETTLED', 'CONFIRMED']
-            invalides = (~self.df['Status'].isin(valides)).sum()
-            if invalides > 0:
-                problemes['Status'] = f"{invalides} valeurs invalides"
-        
-        if 'TradeType' in self.df.columns:
-            valides = ['SPOT', 'FORWARD', 'SWAP', 'OPTION', 'NDF']
-            invalides = (~self.df['TradeType'].isin(valides)).sum()
-            if invalides > 0:
-                problemes['TradeType'] = f"{invalides} valeurs invalides"
-        
-        ok = len(problemes) == 0
-        self.resultats['categoriques'] = {
-            'passed': ok,
-            'issues': problemes,
-            'severity': 'WARNING' if problemes else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_integrite(self):
-        problemes = {}
-        
-        if 'Counterparty' in self.df.columns:
-            manquants = self.df['Counterparty'].isna().sum()
-            if manquants > 0:
-                problemes['counterparty_manquant'] = manquants
-        
-        if 'Instrument' in self.df.columns:
-            manquants = self.df['Instrument'].isna().sum()
-            if manquants > 0:
-                problemes['instrument_manquant'] = manquants
-        
-        ok = len(problemes) == 0
-        self.resultats['integrite'] = {
-            'passed': ok,
-            'issues': problemes,
-            'severity': 'CRITICAL' if problemes else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_calculs(self):
-        problemes = {}
-        
-        if 'Value' in self.df.columns and 'Quantity' in self.df.columns and 'Price' in self.df.columns:
-            attendu = self.df['Quantity'] * self.df['Price']
-            ecart = (abs(self.df['Value'] - attendu) / (abs(attendu) + 1) > 0.01).sum()
-            if ecart > 0:
-                problemes['calcul_value'] = f"{ecart} lignes avec écart > 1%"
-        
-        ok = len(problemes) == 0
-        self.resultats['calculs'] = {
-            'passed': ok,
-            'issues': problemes,
-            'severity': 'WARNING' if problemes else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_strings(self):
-        problemes = {}
-        
-        cols_text = self.df.select_dtypes(include=['object']).columns
-        for col in cols_text:
-            leading = self.df[col].astype(str).str.startswith(' ').sum()
-            trailing = self.df[col].astype(str).str.endswith(' ').sum()
-            
-            if leading > 0 or trailing > 0:
-                problemes[col] = f"{leading + trailing} espaces"
-        
-        ok = len(problemes) == 0
-        self.resultats['strings'] = {
-            'passed': ok,
-            'issues': problemes,
-            'severity': 'INFO' if problemes else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_logique_metier(self):
-        problemes = {}
-        
-        if 'Quantity' in self.df.columns:
-            zeros = (self.df['Quantity'] == 0).sum()
-            if zeros > 0:
-                problemes['quantity_zero'] = zeros
-        
-        if 'Price' in self.df.columns:
-            zeros = (self.df['Price'] == 0).sum()
-            if zeros > 0:
-                problemes['price_zero'] = zeros
-        
-        ok = len(problemes) == 0
-        self.resultats['logique_metier'] = {
-            'passed': ok,
-            'issues': problemes,
-            'severity': 'WARNING' if problemes else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_completude(self):
-        cols_requises = ['TradeID', 'Date', 'Instrument', 'Quantity', 'Price', 'Status']
-        manquantes = [col for col in cols_requises if col not in self.df.columns]
-        
-        ok = len(manquantes) == 0
-        self.resultats['completude'] = {
-            'passed': ok,
-            'colonnes_manquantes': manquantes,
-            'total_colonnes': len(self.df.columns),
-            'severity': 'CRITICAL' if manquantes else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_timestamps(self):
-        problemes = {}
-        
-        if 'EntryTime' in self.df.columns:
-            try:
-                pd.to_datetime(self.df['EntryTime'], format='%H:%M:%S')
-            except:
-                problemes['format_time_invalide'] = True
-        
-        ok = len(problemes) == 0
-        self.resultats['timestamps'] = {
-            'passed': ok,
-            'issues': problemes,
-            'severity': 'WARNING' if problemes else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_distribution(self):
-        problemes = {}
-        
-        cols_num = self.df.select_dtypes(include=[np.number]).columns
-        for col in cols_num:
-            if self.df[col].notna().sum() > 0:
-                skew = self.df[col].skew()
-                if abs(skew) > 3:
-                    problemes[col] = f"Skewness élevé: {skew:.2f}"
-        
-        ok = len(problemes) == 0
-        self.resultats['distribution'] = {
-            'passed': ok,
-            'issues': problemes,
-            'severity': 'INFO' if problemes else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def check_fraicheur(self):
-        problemes = {}
-        
-        if 'Date' in self.df.columns:
-            try:
-                date_max = pd.to_datetime(self.df['Date']).max()
-                jours = (datetime.now() - date_max).days
-                if jours > 365:
-                    problemes['age_donnees'] = f"Data age: {jours} jours"
-            except:
-                pass
-        
-        ok = len(problemes) == 0
-        self.resultats['fraicheur'] = {
-            'passed': ok,
-            'issues': problemes,
-            'severity': 'INFO' if problemes else 'OK'
-        }
-        if ok:
-            self.checks_ok += 1
-    
-    def analyser_tout(self):
-        self.check_valeurs_manquantes()
-        self.check_doublons()
-        self.check_types()
-        self.check_outliers()
-        self.check_ranges()
-        self.check_dates()
-        self.check_categoriques()
-        self.check_integrite()
-        self.check_calculs()
-        self.check_strings()
-        self.check_logique_metier()
-        self.check_completude()
-        self.check_timestamps()
-        self.check_distribution()
-        self.check_fraicheur()
-    
-    def score_qualite(self):
-        score = 100
-        
-        for nom, res in self.resultats.items():
-            sev = res.get('severity', 'OK')
-            if sev == 'CRITICAL':
-                score -= 15
-            elif sev == 'WARNING':
-                score -= 5
-            elif sev == 'INFO':
-                score -= 1
-        
-        return max(0, score)
-    
-    def resume(self):
-        return {
-            'total_checks': self.checks_total,
-            'checks_ok': self.checks_ok,
-            'score': self.score_qualite(),
-            'nb_lignes': len(self.df),
-            'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S')
-        }
+            st.error("FAILED")
+
+        for k, v in res.items():
+            if k != 'passed':
+                st.write(f"**{k}:** {v}")
+
+        if nom == 'doublons' and not res['passed'] and df is not None:
+            colonne_id = 'TradeID' if 'TradeID' in df.columns else None
+            st.write("**Premières occurrences:**")
+            st.dataframe(derive(analyseur, 'doublons', lambda: table_doublons(df, colonne_id).head(100)),
+                         use_container_width=True)
+            if res.get('historique'):
+                st.write("**Déjà vus dans un fichier précédent:**")
+                st.dataframe(historique_trade_ids().rechercher(df['TradeID'], analyseur.source).head(100),
+                             use_container_width=True)
+
+def afficher_violations(analyseur, df):
+    """Lignes en violation d'un ou plusieurs checks, par pages, avec export CSV/Parquet."""
+    index = analyseur.violations()
+    if index is None or not index.entrees:
+        return
+    st.subheader("Lignes en violation")
+    libelles = {' · '.join(map(str, cle)): cle for cle in index.cles()}
+    choix = st.multiselect("Checks / règles:", list(libelles), default=list(libelles)[:1])
+    combinaison = st.radio("Combinaison:", ["Au moins une (union)", "Toutes (intersection)"], horizontal=True)
+    cles = [libelles[libelle] for libelle in choix]
+    positions = index.lignes(cles, 'union' if combinaison.startswith("Au moins") else 'intersection')
+    st.caption(f"{len(positions):,} lignes sur {index.nb_lignes:,} · index: {index.nbytes / 1024**2:.2f} MB "
+               f"pour {len(index.entrees)} entrées")
+    if len(positions) == 0:
+        return
+    taille_page = 100
+    nb_pages = (len(positions) - 1) // taille_page + 1
+    page = st.number_input(f"Page (sur {nb_pages:,})", min_value=1, max_value=nb_pages, value=1) - 1
+    st.dataframe(index.page(df, positions, cles, page, taille_page), use_container_width=True, hide_index=True)
+
+    format_export = st.selectbox("Format d'export:", ["csv", "parquet"])
+    selection = (analyseur.source, tuple(cles), combinaison, format_export)
+    if st.button("Préparer l'export"):
+        st.session_state['export_violations'] = (selection, exporter(index.extraire(df, positions, cles),
+                                                                     format_export))
+    export = st.session_state.get('export_violations')
+    if export is not None and export[0] == selection:
+        st.download_button(f"Télécharger {len(positions):,} lignes ({format_export})", export[1],
+                           file_name=f"violations.{format_export}",
+                           mime="text/csv" if format_export == 'csv' else "application/octet-stream")
+
+def graphiques_resultats(analyseur, nb_lignes):
+    """Statut des checks, valeurs manquantes (None si aucune) et performances (None si non mesurées)."""
+    import plotly.express as px
+
+    statuts_checks = pd.Series([1 if r['passed'] else 0 for r in analyseur.resultats.values()],
+                               index=[k.replace('_', ' ').title() for k in analyseur.resultats.keys()])
+    fig_checks = px.bar(statuts_checks,
+                        labels={'index': 'Check', 'value': 'Status'},
+                        color=statuts_checks.values,
+                        color_continuous_scale=['#e74c3c', '#27ae60'],
+                        title="Statut des Checks")
+    missing = (pd.Series(analyseur.profil.na_par_colonne(), dtype=float) / nb_lignes * 100).sort_values(ascending=False)
+    missing = missing[missing > 0]
+    fig_missing = None
+    if len(missing) > 0:
+        fig_missing = px.bar(missing,
+                             labels={'index': 'Colonne', 'value': 'Missing %'},
+                             title="Valeurs Manquantes",
+                             color=missing.values,
+                             color_continuous_scale='Reds')
+    fig_perf = None
+    if analyseur.performances:
+        performances = tableau(analyseur.performances)
+        fig_perf = px.bar(performances[['temps', 'cpu']].iloc[::-1], orientation='h', barmode='group',
+                          labels={'index': 'Phase', 'value': 'Secondes', 'variable': ''},
+                          title="Temps mur et CPU: chargement et checks")
+    return fig_checks, fig_missing, fig_perf
+
+def afficher_groupes(analyseur, df):
+    """Score et part de lignes en violation par groupe: carte de chaleur groupe × check et table triable."""
+    import plotly.graph_objects as go
+
+    colonnes = [col for col in COLONNES_DATE if col in df.columns] + \
+               [col for col in analyseur.profil.colonnes_texte() if col not in COLONNES_DATE and col != 'TradeID']
+    if not colonnes:
+        st.info("Aucune colonne de regroupement")
+        return
+    col_g1, col_g2, col_g3 = st.columns(3)
+    with col_g1:
+        colonne = st.selectbox("Grouper par:", colonnes,
+                               index=colonnes.index('Counterparty') if 'Counterparty' in colonnes else 0)
+    periode = None
+    if colonne in COLONNES_DATE:
+        with col_g2:
+            periode = st.selectbox("Période:", list(PERIODES), index=2)
+    debut_groupes = time.time()
+    try:
+        table = analyseur.groupes(colonne, periode)
+    except ValueError as e:
+        st.warning(str(e))
+        return
+    checks = [nom for nom in table.columns if nom not in ('lignes', 'score')]
+    with col_g3:
+        tri = st.selectbox("Trier par:", ['score'] + checks + ['lignes'])
+    # pire score d'abord; pour un check, la plus forte part de lignes en violation
+    table = table.sort_values(tri, ascending=(tri == 'score'), kind='stable')
+    nb_affiches = st.slider("Groupes sur la carte:", min_value=1, max_value=len(table), value=min(len(table), 30)) \
+        if len(table) > 1 else 1
+    st.caption(f"{len(table):,} groupes en {time.time() - debut_groupes:.2f}s · % des lignes du groupe en violation; "
+               f"non ventilés (colonnes entières): {', '.join(n for n in NON_VENTILES if n in analyseur.resultats)}")
+
+    carte = table.head(nb_affiches)
+    fig = go.Figure(go.Heatmap(z=carte[checks].to_numpy(), x=checks,
+                               y=[f"{groupe} ({score})" for groupe, score in zip(carte.index, carte['score'])],
+                               colorscale='Reds', zmin=0, colorbar={'title': '%'},
+                               hovertemplate="%{y}<br>%{x}: %{z:.2f}%<extra></extra>"))
+    fig.update_layout(title=f"Qualité par {colonne}" + (f" ({periode})" if periode else ""),
+                      yaxis={'autorange': 'reversed'}, height=max(300, 22 * nb_affiches + 120))
+    st.plotly_chart(fig, use_container_width=True)
+    # table triable en cliquant sur les en-têtes (toutes les lignes, la carte n'en montre que nb_affiches)
+    st.dataframe(table.round(2), use_container_width=True)
+
+def afficher_tendances(analyseur):
+    """Score et comptages des analyses précédentes, lus dans l'historique (sans relire les fichiers)."""
+    import plotly.express as px
+
+    tendances = historique_qualite()
+    jeux = tendances.jeux()
+    if not jeux:
+        st.info("Historique vide: les prochaines analyses complètes y seront enregistrées")
+        return
+    courant = nom_jeu(analyseur.source)
+    col1, col2 = st.columns(2)
+    with col1:
+        jeu = st.selectbox("Jeu de données:", jeux, index=jeux.index(courant) if courant in jeux else 0)
+    with col2:
+        periode = st.selectbox("Période:", ["30 jours", "90 jours", "1 an", "Tout"], index=2)
+    analyses = tendances.analyses(jeu)
+    jours = {"30 jours": 30, "90 jours": 90, "1 an": 365}.get(periode)
+    # période comptée depuis la dernière analyse du jeu (dates métier, pas l'horloge)
+    depuis = None if jours is None else analyses['date'].max() - pd.Timedelta(days=jours)
+    if depuis is not None:
+        analyses = analyses[analyses['date'] >= depuis]
+    st.caption(f"{len(analyses)} analyse(s) de {jeu} du {analyses['date'].min():%Y-%m-%d} "
+               f"au {analyses['date'].max():%Y-%m-%d}")
+    fig_score = px.line(analyses, x='date', y='score', markers=True, range_y=[0, 100], title=f"Score: {jeu}")
+    st.plotly_chart(fig_score, use_container_width=True)
+
+    comptes = tendances.comptes(jeu, None if depuis is None else depuis.strftime('%Y-%m-%d %H:%M:%S'))
+    if len(comptes) > 0:
+        check = st.selectbox("Comptages du check:", sorted(comptes['nom'].unique()))
+        # un élément absent d'une analyse n'y était pas en défaut: 0
+        serie = (comptes[comptes['nom'] == check].pivot_table(index='date', columns='element', values='valeur')
+                 .reindex(analyses['date'].unique()).fillna(0))
+        fig_comptes = px.line(serie, markers=True, labels={'value': 'valeur', 'date': 'date'},
+                              title=f"{check.replace('_', ' ').title()} par analyse")
+        st.plotly_chart(fig_comptes, use_container_width=True)
+
+def afficher_tache(tache, nom):
+    """Progression, annulation et résultats partiels d'une analyse de fond; arrête le script."""
+    if tache.etat == 'erreur':
+        st.session_state['tache'] = None
+        st.error(f"Erreur: {tache.erreur}")
+        st.stop()
+    if tache.etat == 'annulee':
+        st.session_state['tache'] = None
+        afficher_annulation(nom)
+
+    if tache.etat == 'en_attente':
+        st.progress(0.0, text=f"{nom}: en file d'attente "
+                              f"({service_analyses().position(tache)} analyse(s) avant celle-ci)")
+    elif tache.analyseur is None:
+        st.progress(0.0, text=f"{nom}: chargement du fichier…")
+    else:
+        st.progress(tache.avancement, text=f"{nom}: {tache.fait}/{tache.total} checks "
+                                           f"({tache.analyseur.profil.nb_lignes():,} lignes)")
+    if st.button("Annuler l'analyse"):
+        abandonner_tache()
+        st.session_state['annulee'] = tache.cle
+        st.rerun()
+
+    st.markdown("---")
+    st.header("Analyse détaillée")
+    onglet_resultats, = st.tabs(["Résultats"])
+    with onglet_resultats:
+        if tache.analyseur is not None:
+            # copie: le thread de fond ajoute des résultats pendant l'affichage
+            for nom_check, res in list(tache.analyseur.resultats.items()):
+                afficher_resultat(nom_check, res, nom_check in tache.analyseur.approximatifs)
+    time.sleep(0.5)
+    st.rerun()
+
+def _affiner(entree, df, taille, checks, regles):
+    chargement = entree['estimation'].analyseur.performances['chargement']
+    try:
+        for estimation in affiner(df, taille * 4, checks=checks, regles=regles):
+            estimation.analyseur.performances = {'chargement': chargement, **estimation.analyseur.performances}
+            entree['estimation'] = estimation
+    except Exception as e:
+        entree['erreur'] = str(e)
+    entree['en_cours'] = False
+
+def analyser_echantillon(octets, nom):
+    cle = empreinte_session(octets, {'format': os.path.splitext(nom)[1], 'compaction': compaction,
+                                     'echantillon': int(taille_echantillon),
+                                     **AnalyseurQualite.configuration(checks_actifs, regles)})
+
+    def estimation_initiale():
+        with Chrono() as chargement:
+            df = lire_fichier(octets, nom)
+            chargement.nb_lignes = len(df)
+        estimation = estimer(df, int(taille_echantillon), checks=checks_actifs, regles=regles)
+        estimation.analyseur.performances = {'chargement': chargement.mesures, **estimation.analyseur.performances}
+        return {'df': df, 'estimation': estimation, 'en_cours': False, 'erreur': None}
+
+    # dernière estimation et état de l'affinage, propres à la session: le DataFrame n'est
+    # gardé que pour le fichier qu'elle affiche, et une autre session ne peut pas l'évincer
+    entree = memo_session('affinage', cle, estimation_initiale)
+    analyseur = entree['estimation'].analyseur
+    analyseur.df, analyseur.source = entree['df'], nom
+    return analyseur, entree
+
+def afficher_estimation(entree):
+    estimation = entree['estimation']
+    if estimation.exact:
+        st.success("Scan rapide affiné jusqu'au résultat exact")
+        return
+    st.warning(f"Scan rapide: échantillon stratifié (Instrument × mois) de {estimation.taille:,} lignes "
+               f"({estimation.taille / estimation.nb_lignes:.1%}). Score estimé {estimation.analyseur.score_qualite()}%, "
+               f"fourchette {estimation.score_bas}–{estimation.score_haut}% (IC 95 %)")
+    with st.expander("Comptages extrapolés (IC 95 %)"):
+        st.dataframe(estimation.tableau(), use_container_width=True)
+    if entree['erreur']:
+        st.error(f"Affinage interrompu: {entree['erreur']}")
+    elif entree['en_cours']:
+        st.caption("Affinage en arrière-plan: échantillon ×4 à chaque étape, jusqu'à l'exact…")
+    elif st.button("Affiner en arrière-plan"):
+        entree['en_cours'] = True
+        threading.Thread(target=_affiner, args=(entree, entree['df'], estimation.taille, checks_actifs, regles),
+                         daemon=True).start()
+
+def analyser_local(chemin, tendances=None):
+    """Analyse d'un fichier local en flux ou par DuckDB: (analyseur, aperçu, profil texte, profil cProfile)."""
+    if moteur == "DuckDB":
+        analyseur = executer(lambda: analyser_requetes(chemin, regles=regles, tendances=tendances))
+        apercu = analyseur.profil.apercu(20)
+    else:
+        analyseur = executer(lambda: analyser_csv(chemin, taille_bloc=int(taille_bloc), regles=regles,
+                                                  tendances=tendances))
+        apercu = pd.read_csv(chemin, nrows=20)
+    if tendances is not None:
+        statut = os.stat(chemin)
+        tendances.enregistrer(analyseur, empreinte=f"{os.path.abspath(chemin)}:{statut.st_size}:"
+                                                   f"{statut.st_mtime_ns}")
+    return analyseur, apercu, profilage_texte, profilage_stats
+
+def analyser_incremental(source, nom):
+    chemin_etat = os.path.join(REPERTOIRE_ETATS, hashlib.blake2b(nom.encode(), digest_size=8).hexdigest() + '.pkl')
+    analyseur, etat, nb_lignes, mode_increment = executer(
+        lambda: analyser_increment(source, charger_etat(chemin_etat), int(taille_bloc), regles))
+    sauver_etat(etat, chemin_etat)
+    libelles = {'increment': "lignes ajoutées analysées", 'inchange': "fichier inchangé", 'complet': "analyse complète"}
+    st.info(f"Incrémental: {libelles[mode_increment]} ({nb_lignes} lignes lues)")
+    return analyseur
 
 st.title("Data Quality Dashboard")
 st.markdown("Analyse de qualité des données financières")
 
 with st.sidebar:
     st.header("Settings")
-    mode = st.radio("Mode:", ["Upload CSV/Excel", "Use Sample Data"])
+    mode = st.radio("Mode:", ["Upload CSV/Excel", "Use Sample Data", "Fichier local (streaming)"])
+    fichier_regles = st.file_uploader("Règles métier (JSON/YAML, optionnel)", type=["json", "yaml", "yml"],
+                                      help="Ajoutées aux règles par défaut; même check et même nom = remplacement")
+    regles = PLAN_DEFAUT
+    if fichier_regles is not None:
+        try:
+            regles = PLAN_DEFAUT.etendre(charger_regles(fichier_regles))
+        except Exception as e:
+            st.error(f"Règles ignorées: {e}")
+    if mode == "Fichier local (streaming)":
+        moteur = st.radio("Moteur:", ["Blocs pandas", "DuckDB"], horizontal=True,
+                          help="DuckDB évalue les checks par requêtes sur le fichier (CSV ou Parquet): "
+                               "multi-thread, sans DataFrame, quantiles exacts")
+        chemin = st.text_input("Chemin du fichier" if moteur == "DuckDB" else "Chemin du CSV",
+                               "financial_trades_sample.csv")
+        if moteur == "DuckDB":
+            taille_bloc, incremental = 500_000, False
+        else:
+            taille_bloc = st.number_input("Lignes par bloc", min_value=10_000, value=500_000, step=100_000)
+            incremental = st.checkbox("Incrémental (fichier en ajout seul)", value=False)
+    else:
+        tous_checks = list(AnalyseurQualite.configuration(None, regles)['checks'])
+        checks_actifs = st.multiselect("Checks actifs:", tous_checks, default=tous_checks)
+        compaction = st.checkbox("Compacter en mémoire (catégories, dates, float32)", value=False)
+        approximation = st.checkbox("Quantiles approchés (esquisse en une passe)", value=False,
+                                    help="Outliers IQR lus dans un histogramme logarithmique: erreur relative "
+                                         "sur q1/q3 <= 0,2 %, comptage exact hors des seaux des bornes")
+        execution = st.selectbox("Exécution des checks:", ["serie", "threads", "processus"])
+        nb_workers = st.number_input("Workers", min_value=1, value=os.cpu_count() or 1) if execution != "serie" else None
+        historique = st.checkbox("Historique TradeID inter-fichiers", value=False)
+        incremental = st.checkbox("Incrémental (CSV en ajout seul)", value=False)
+        scan_rapide = st.checkbox("Scan rapide (échantillon stratifié)", value=False,
+                                  help="Checks sur un échantillon par Instrument et mois; comptages extrapolés "
+                                       "avec intervalles de confiance et fourchette de score")
+        taille_echantillon = st.number_input("Lignes échantillonnées", min_value=1_000, value=50_000,
+                                             step=10_000) if scan_rapide else None
+        taille_bloc = 500_000
+    suivi_tendances = st.checkbox("Historique qualité (tendances, dérive)", value=False,
+                                  help="Chaque analyse complète est enregistrée dans .dq_etats/qualite.sqlite; "
+                                       "le check 'derive' compare les distributions numériques aux 30 "
+                                       "analyses précédentes du même jeu (PSI, KS)")
+    profilage = st.checkbox("Profilage détaillé (cProfile + mémoire par check)", value=False)
+    profilage_texte = profilage_stats = None
+    if mode == "Fichier local (streaming)":
+        scan_rapide = False
+    estimation_en_cours = None
 
 debut = time.time()
 
 if mode == "Upload CSV/Excel":
-    fichier = st.file_uploader("Upload ton fichier", type=["csv", "xlsx", "xls"])
+    fichier = st.file_uploader("Upload ton fichier", type=["csv", "xlsx", "xls", "parquet", "feather", "arrow"])
     
     if fichier is not None:
         try:
-            if fichier.name.endswith('.csv'):
-                df = pd.read_csv(fichier)
+            tache = None
+            if incremental and fichier.name.endswith('.csv'):
+                abandonner_tache()
+                df = None
+                analyseur = analyser_incremental(io.BytesIO(fichier.getvalue()), fichier.name)
+                apercu = pd.read_csv(io.BytesIO(fichier.getvalue()), nrows=20)
+            elif scan_rapide:
+                abandonner_tache()
+                analyseur, estimation_en_cours = analyser_echantillon(fichier.getvalue(), fichier.name)
+                df = analyseur.df
             else:
-                df = pd.read_excel(fichier)
+                analyseur, tache = analyser_en_cache(fichier.getvalue(), fichier.name)
+                df = analyseur.df if tache is None else None
+            if tache is not None:
+                afficher_tache(tache, fichier.name)
             
-            st.success(f"Fichier chargé: {fichier.name} ({len(df)} lignes, {len(df.columns)} colonnes)")
+            st.success(f"Fichier chargé: {fichier.name} ({analyseur.profil.nb_lignes()} lignes, {len(analyseur.profil.colonnes())} colonnes)")
         except Exception as e:
             st.error(f"Erreur: {e}")
             st.stop()
     else:
-        st.info("Upload un CSV ou Excel")
+        abandonner_tache()
+        st.info("Upload un CSV, Excel, Parquet ou Arrow (Feather)")
         st.stop()
-else:
+elif mode == "Use Sample Data":
     try:
-        df = pd.read_csv('financial_trades_sample.csv')
-        st.success(f"Sample  {len(df)} lignes, {len(df.columns)} colonnes")
+        statut = os.stat('financial_trades_sample.csv')
+        # relu seulement s'il a changé
+        octets = memo_session('octets_echantillon', (statut.st_size, statut.st_mtime_ns),
+                              lambda: lire_octets('financial_trades_sample.csv'))
     except:
         st.warning("Sample data introuvable. Lance generate_dataset.py d'abord.")
         st.stop()
-
-analyseur = AnalyseurQualite(df)
-analyseur.analyser_tout()
+    if scan_rapide:
+        abandonner_tache()
+        analyseur, estimation_en_cours = analyser_echantillon(octets, 'financial_trades_sample.csv')
+    else:
+        analyseur, tache = analyser_en_cache(octets, 'financial_trades_sample.csv')
+        if tache is not None:
+            afficher_tache(tache, 'financial_trades_sample.csv')
+    df = analyseur.df
+    st.success(f"Sample  {len(df)} lignes, {len(df.columns)} colonnes")
+else:
+    abandonner_tache()
+    df = None
+    try:
+        if incremental:
+            analyseur = analyser_incremental(chemin, os.path.abspath(chemin))
+            apercu = pd.read_csv(chemin, nrows=20)
+        else:
+            # même fichier, mêmes réglages: l'analyse de la session est reprise telle quelle au rerun
+            statut = os.stat(chemin)
+            cle_locale = (os.path.abspath(chemin), statut.st_size, statut.st_mtime_ns, moteur, int(taille_bloc),
+                          regles.empreinte, suivi_tendances, profilage)
+            tendances = historique_qualite() if suivi_tendances else None
+            analyseur, apercu, profilage_texte, profilage_stats = memo_session(
+                'analyse_locale', cle_locale, lambda: analyser_local(chemin, tendances))
+    except Exception as e:
+        st.error(f"Erreur: {e}")
+        st.stop()
+    st.success(f"Analyse en streaming: {chemin} ({analyseur.profil.nb_lignes()} lignes, {len(analyseur.profil.colonnes())} colonnes)")
 temps_exec = time.time() - debut
 
+if df is not None:
+    cache = service_analyses().resultats
+    etat_service = service_analyses().etat()
+    st.sidebar.caption(f"Cache analyses: {cache.hits} hits / {cache.misses} misses ({len(cache)} en mémoire, "
+                       f"{cache.memoire_mb:.0f}/{cache.budget_mb} MB) · Service: {etat_service['en_cours']} "
+                       f"en cours, {etat_service['en_attente']} en attente"
+                       + (f" · disque: {cache.repertoire}" if cache.repertoire else ""))
+
 col1, col2, col3, col4 = st.columns(4)
 
 resume = analyseur.resume()
@@ -436,134 +608,136 @@ with col4:
     st.metric("Temps", f"{temps_exec:.2f}s")
 
 st.markdown(f"**Status:** {status}")
+if 'chargement' in analyseur.performances:
+    temps_checks = sum(m['temps'] for phase, m in analyseur.performances.items() if phase != 'chargement')
+    st.caption(f"Chargement: {analyseur.performances['chargement']['temps']:.2f}s · Checks: {temps_checks:.2f}s")
+if resume['approximatif']:
+    st.caption(f"Valeurs approximatives (esquisses de quantiles): {', '.join(resume['approximatif'])}")
+if estimation_en_cours is not None:
+    afficher_estimation(estimation_en_cours)
 
 st.markdown("---")
 st.header("Analyse détaillée")
 
-tab1, tab2, tab3 = st.tabs(["Résultats", "Preview Data", "Visualisations"])
+# une seule vue construite par exécution du script: les graphiques ne sont calculés qu'à l'ouverture
+vues = ["Résultats", "Preview Data", "Visualisations"] + (["Par groupe"] if df is not None else []) + \
+       (["Tendances"] if suivi_tendances else [])
+vue = st.radio("Vue:", vues, horizontal=True, label_visibility="collapsed")
 
-with tab1:
+if vue == "Résultats":
     for nom, res in analyseur.resultats.items():
-        nom_affiche = nom.replace('_', ' ').title()
-        icone = "✅" if res['passed'] else "❌"
-        sev = res.get('severity', 'OK')
-        
-        with st.expander(f"{icone} {nom_affiche} [{sev}]", expanded=False):
-            if res['passed']:
-                st.success("PASSED")
-            else:
-                st.error("FAILED")
-            
-            for k, v in res.items():
-                if k != 'passed':
-                    st.write(f"**{k}:** {v}")
+        afficher_resultat(nom, res, nom in analyseur.approximatifs, df, analyseur)
+    if df is not None:
+        afficher_violations(analyseur, df)
 
-with tab2:
+elif vue == "Preview Data":
     st.subheader("Dataset Preview")
-    st.dataframe(df.head(20), use_container_width=True)
+    st.dataframe(df.head(20) if df is not None else apercu, use_container_width=True)
     
     st.subheader("Infos")
     col1, col2 = st.columns(2)
     with col1:
-        st.write(f"**Lignes:** {len(df)}")
-        st.write(f"**Colonnes:** {len(df.columns)}")
+        st.write(f"**Lignes:** {resume['nb_lignes']}")
+        st.write(f"**Colonnes:** {len(analyseur.profil.colonnes())}")
     with col2:
-        st.write(f"**Mémoire:** {df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
+        if df is not None and 'compaction' in df.attrs:
+            rapport_compaction = df.attrs['compaction']
+            st.write(f"**Mémoire:** {rapport_compaction['avant'] / 1024**2:.2f} MB → {rapport_compaction['apres'] / 1024**2:.2f} MB")
+            st.write("**Conversions:** " + ", ".join(f"{col} ({avant} → {apres})" for col, (avant, apres) in rapport_compaction['conversions'].items()))
+        elif df is not None:
+            # parcourt toutes les chaînes: une fois par frame, pas à chaque rerun
+            memoire = derive(analyseur, 'memoire', lambda: df.memory_usage(deep=True).sum())
+            st.write(f"**Mémoire:** {memoire / 1024**2:.2f} MB")
+        else:
+            st.write("**Mémoire:** lecture par blocs")
+
+elif vue == "Visualisations":
+    import plotly.graph_objects as go
 
-with tab3:
+    # figures construites une fois par analyse: un rerun ne fait que les renvoyer
+    fig1, fig2, fig_perf = derive(analyseur, 'graphiques', lambda: graphiques_resultats(analyseur, resume['nb_lignes']))
     col1, col2 = st.columns(2)
     
     with col1:
-        statuts_checks = pd.Series([1 if r['passed'] else 0 for r in analyseur.resultats.values()],
-                                   index=[k.replace('_', ' ').title() for k in analyseur.resultats.keys()])
-        fig1 = px.bar(statuts_checks, 
-                     labels={'index': 'Check', 'value': 'Status'},
-                     color=statuts_checks.values,
-                     color_continuous_scale=['#e74c3c', '#27ae60'],
-                     title="Statut des Checks")
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
-        missing = (df.isna().sum() / len(df) * 100).sort_values(ascending=False)
-        missing = missing[missing > 0]
-        if len(missing) > 0:
-            fig2 = px.bar(missing,
-                         labels={'index': 'Colonne', 'value': 'Missing %'},
-                         title="Valeurs Manquantes",
-                         color=missing.values,
-                         color_continuous_scale='Reds')
+        if fig2 is not None:
             st.plotly_chart(fig2, use_container_width=True)
         else:
             st.info("Aucune valeur manquante")
     
-    cols_num = df.select_dtypes(include=[np.number]).columns
+    if analyseur.performances:
+        st.subheader("Performances par phase")
+        performances = tableau(analyseur.performances)
+        st.plotly_chart(fig_perf, use_container_width=True)
+        st.dataframe(performances.style.format({'temps': '{:.3f}', 'cpu': '{:.3f}', 'memoire_mb': '{:.1f}',
+                                                'lignes_s': '{:,.0f}'}, na_rep='-'), use_container_width=True)
+        col_perf1, col_perf2, col_perf3 = st.columns(3)
+        with col_perf1:
+            st.download_button("Performances (JSON)",
+                               derive(analyseur, 'performances', lambda: rapport_json(analyseur, temps_exec)),
+                               file_name="performances.json", mime="application/json")
+        if profilage_texte is not None:
+            with col_perf2:
+                st.download_button("Profil (texte)", profilage_texte, file_name="profil.txt", mime="text/plain")
+            with col_perf3:
+                st.download_button("Profil cProfile (.prof)", profilage_stats, file_name="profil.prof",
+                                   mime="application/octet-stream")
+        st.caption("CPU du thread de l'analyse pour les checks; du processus entier (autres analyses "
+                   "comprises) pour le chargement, le précalcul parallèle et le moteur DuckDB."
+                   + ("" if 'memoire_mb' in performances else
+                      " Pic mémoire: activer le profilage détaillé dans la sidebar."))
+
+    # classes agrégées sur le serveur (gardées dans le profil, par colonne): 50 barres quel que soit le nombre de lignes
+    profil_graphiques = analyseur.profil_lignes() if df is not None else analyseur.profil
+    cols_num = analyseur.profil.colonnes_numeriques()
     if len(cols_num) > 0:
         col_select = st.selectbox("Colonne pour distribution:", cols_num)
-        fig3 = px.histogram(df, x=col_select, nbins=50, title=f"Distribution: {col_select}")
-        st.plotly_chart(fig3, use_container_width=True)
+        classes = profil_graphiques.histogramme(col_select, 50)
+        if classes is not None:
+            comptes, bords = classes
+            fig3 = go.Figure(go.Bar(x=(bords[:-1] + bords[1:]) / 2, y=comptes, width=np.diff(bords)))
+            fig3.update_layout(title=f"Distribution: {col_select}", xaxis_title=col_select, yaxis_title="count",
+                               bargap=0)
+            st.plotly_chart(fig3, use_container_width=True)
+            if df is None and not isinstance(analyseur.profil, ProfilRequetes):
+                st.caption("Distribution lue dans l'esquisse de quantiles du flux (approchée à un seau près)")
+
+elif vue == "Par groupe":
+    afficher_groupes(analyseur, df)
+
+else:
+    afficher_tendances(analyseur)
 
 st.markdown("---")
 st.header("Export")
 
-if st.button("Générer Rapport HTML"):
-    rapport = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <title>Rapport Qualité Données</title>
-        <style>
-            body {{ font-family: Arial; margin: 20px; background: #f5f5f5; }}
-            .header {{ background: #2c3e50; color: white; padding: 20px; border-radius: 5px; }}
-            .summary {{ background: #ecf0f1; padding: 15px; margin: 20px 0; border-radius: 5px; }}
-            .check {{ background: white; padding: 15px; margin: 10px 0; border-left: 4px solid #3498db; }}
-            .passed {{ border-left-color: #27ae60; }}
-            .failed {{ border-left-color: #e74c3c; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>Rapport Qualité Données</h1>
-            <p>Généré: {resume['timestamp']}</p>
-        </div>
-        
-        <div class="summary">
-            <h2>Résumé</h2>
-            <p><strong>Score:</strong> {score}%</p>
-            <p><strong>Lignes:</strong> {resume['nb_lignes']:,}</p>
-            <p><strong>Checks OK:</strong> {resume['checks_ok']}/{resume['total_checks']}</p>
-            <p><strong>Temps:</strong> {temps_exec:.2f}s</p>
-        </div>
-        
-        <h2>Checks Détaillés</h2>
-    """
-    
-    for nom, res in analyseur.resultats.items():
-        nom_affiche = nom.replace('_', ' ').title()
-        classe = 'passed' if res['passed'] else 'failed'
-        sev = res.get('severity', 'OK')
-        
-        rapport += f"""
-        <div class="check {classe}">
-            <h3>{nom_affiche} [{sev}]</h3>
-            <p><strong>Status:</strong> {'PASSED ✓' if res['passed'] else 'FAILED ✗'}</p>
-            <ul>
-        """
-        
-        for k, v in res.items():
-            if k != 'passed':
-                rapport += f"<li>{k}: {v}</li>"
-        
-        rapport += "</ul></div>"
-    
-    rapport += "</body></html>"
-    
+col_export1, col_export2 = st.columns(2)
+with col_export1:
+    format_rapport = st.selectbox("Format du rapport:", ["HTML", "JSON", "NDJSON"],
+                                  help="NDJSON: une ligne JSON par entrée de détail").lower()
+with col_export2:
+    compression_rapport = st.checkbox("Compresser (gzip)", value=False)
+# HTML: 50 entrées par section de détail, JSON/NDJSON complets (qualite.rapport)
+selection_rapport = (analyseur.source, analyseur.profil.nb_lignes(), format_rapport, compression_rapport)
+if st.button("Générer le rapport"):
+    st.session_state['rapport'] = (selection_rapport,
+                                   rapport_octets(analyseur, temps_exec, format_rapport, compression_rapport))
+rapport = st.session_state.get('rapport')
+if rapport is not None and rapport[0] == selection_rapport:
+    extension = format_rapport + (".gz" if compression_rapport else "")
     st.download_button(
-        label="Télécharger Rapport HTML",
-        data=rapport,
-        file_name=f"rapport_qualite_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
-        mime="text/html"
+        label=f"Télécharger le rapport ({len(rapport[1]) / 1024:,.0f} KB)",
+        data=rapport[1],
+        file_name=f"rapport_qualite_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+        mime="application/gzip" if compression_rapport else TYPES_MIME[format_rapport]
     )
 
 st.markdown("---")
 st.caption("Data Quality Dashboard v1.0")
+
+if estimation_en_cours is not None and estimation_en_cours['en_cours']:
+    # rafraîchit la page tant que l'affinage produit de nouvelles estimations
+    time.sleep(2)
+    st.rerun()
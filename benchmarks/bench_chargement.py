@@ -0,0 +1,84 @@
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qualite import AnalyseurQualite
+from qualite.chargement import charger, convertir
+
+
+def _pic_rss():
+    # VmHWM (Linux) en kB; ru_maxrss survit à exec et hériterait du pic du parent
+    try:
+        with open('/proc/self/status') as f:
+            for ligne in f:
+                if ligne.startswith('VmHWM:'):
+                    return int(ligne.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _mesurer(chemin, checks, file):
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+    base = _pic_rss()
+    debut = time.perf_counter()
+    with open(chemin, 'rb') as f:
+        df = charger(f, chemin, checks, AnalyseurQualite.colonnes_par_check)
+    temps = time.perf_counter() - debut
+    pic = _pic_rss() - base
+    file.put((temps, pic / 1024, len(df.columns), df.memory_usage(deep=True).sum() / 1024**2))
+
+
+def mesurer(chemin, checks=None):
+    ctx = mp.get_context('spawn')
+    file = ctx.Queue()
+    processus = ctx.Process(target=_mesurer, args=(chemin, checks, file))
+    processus.start()
+    resultat = file.get()
+    processus.join()
+    return resultat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de chargement et pic mémoire par format")
+    parser.add_argument('--fichier', default='financial_trades_sample.csv')
+    parser.add_argument('--lignes', type=int, default=1_000_000)
+    parser.add_argument('--excel', action='store_true', help="inclure Excel (très lent)")
+    parser.add_argument('--checks', nargs='+', help="checks actifs pour l'élagage des colonnes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        df = pd.read_csv(args.fichier)
+        df = pd.concat([df] * -(-args.lignes // len(df)), ignore_index=True).iloc[:args.lignes]
+        chemins = {'csv': os.path.join(dossier, 'trades.csv')}
+        df.to_csv(chemins['csv'], index=False)
+        for extension in ['parquet', 'feather']:
+            chemins[extension] = os.path.join(dossier, f'trades.{extension}')
+            convertir(chemins['csv'], chemins[extension])
+        if args.excel:
+            chemins['xlsx'] = os.path.join(dossier, 'trades.xlsx')
+            df.to_excel(chemins['xlsx'], index=False)
+        del df
+
+        print(f"{args.lignes:,} lignes" + (f", checks: {' '.join(args.checks)}" if args.checks else ""))
+        print(f"{'format':<8} {'taille (MB)':>11} {'temps (s)':>10} {'pic RSS (MB)':>13} {'colonnes':>9} {'frame (MB)':>11}")
+        for format, chemin in chemins.items():
+            temps, pic, nb_colonnes, frame = mesurer(chemin, args.checks)
+            taille = os.path.getsize(chemin) / 1024**2
+            print(f"{format:<8} {taille:>11.1f} {temps:>10.2f} {pic:>13.1f} {nb_colonnes:>9} {frame:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_dataset import generer
+from qualite import AnalyseurQualite
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_checks.json')
+
+
+def _executer(df, nom):
+    analyseur = AnalyseurQualite(df)
+    if nom == 'analyser_tout':
+        analyseur.analyser_tout()
+    else:
+        # profil neuf: chaque check paie ses propres primitives
+        getattr(analyseur, 'check_' + nom)()
+
+
+def mesurer(df, nom, repetitions):
+    temps = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        _executer(df, nom)
+        temps.append(time.perf_counter() - debut)
+    # pic mémoire sur une exécution à part: tracemalloc fausserait les temps
+    tracemalloc.start()
+    _executer(df, nom)
+    pic = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'temps': min(temps), 'memoire_mb': pic / 1024**2}
+
+
+def comparer(mesures, reference, tolerance, plancher):
+    """Mesures plus lentes (ou plus gourmandes) que la référence au-delà de la tolérance."""
+    regressions = []
+    for taille, par_check in mesures.items():
+        for nom, mesure in par_check.items():
+            ancienne = reference.get(taille, {}).get(nom)
+            if ancienne is None:
+                continue
+            if mesure['temps'] > plancher and mesure['temps'] > ancienne['temps'] * (1 + tolerance):
+                regressions.append((taille, nom, 'temps', ancienne['temps'], mesure['temps']))
+            if mesure['memoire_mb'] > ancienne['memoire_mb'] * (1 + tolerance) + 1:
+                regressions.append((taille, nom, 'memoire_mb', ancienne['memoire_mb'], mesure['memoire_mb']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps et pic mémoire de chaque check selon la taille du jeu")
+    parser.add_argument('--lignes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--checks', nargs='+', choices=AnalyseurQualite.checks, default=AnalyseurQualite.checks)
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--sauver', nargs='?', const=BASELINE, help="enregistre les mesures comme référence")
+    parser.add_argument('--comparer', nargs='?', const=BASELINE, help="compare à une référence enregistrée")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="dégradation tolérée (0.25 = +25%%)")
+    parser.add_argument('--plancher', type=float, default=0.01, help="temps (s) en dessous duquel on ignore")
+    args = parser.parse_args()
+
+    mesures = {}
+    for nb_lignes in args.lignes:
+        df = generer(nb_lignes, graine=args.graine)
+        print(f"\n{nb_lignes:,} lignes")
+        print(f"{'check':<20} {'temps (s)':>10} {'lignes/s':>12} {'pic (MB)':>9}")
+        par_check = {}
+        for nom in args.checks + ['analyser_tout']:
+            mesure = mesurer(df, nom, args.repetitions)
+            par_check[nom] = mesure
+            print(f"{nom:<20} {mesure['temps']:>10.3f} {nb_lignes / max(mesure['temps'], 1e-9):>12,.0f} "
+                  f"{mesure['memoire_mb']:>9.1f}")
+        mesures[str(nb_lignes)] = par_check
+        del df
+
+    if args.sauver:
+        with open(args.sauver, 'w') as f:
+            json.dump({'machine': platform.platform(), 'python': platform.python_version(),
+                       'cpu': os.cpu_count(), 'mesures': mesures}, f, indent=2)
+        print(f"\nRéférence enregistrée: {args.sauver}")
+
+    if args.comparer:
+        with open(args.comparer) as f:
+            reference = json.load(f)
+        regressions = comparer(mesures, reference['mesures'], args.tolerance, args.plancher)
+        print(f"\nComparaison à {args.comparer} ({reference.get('machine')}), tolérance {args.tolerance:.0%}")
+        for taille, nom, grandeur, avant, apres in regressions:
+            print(f"REGRESSION {int(taille):,} lignes {nom} {grandeur}: {avant:.3f} -> {apres:.3f}")
+        if regressions:
+            sys.exit(1)
+        print("Aucune régression")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DEBUT = time.perf_counter()
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VUES = ["Résultats", "Preview Data", "Visualisations"]
+
+
+def _element(elements, label):
+    return next(element for element in elements if element.label == label)
+
+
+def _reruns(at, nb):
+    # temps moyen d'une réexécution du script sur chaque vue, sans changer de réglage
+    temps = {}
+    for vue in VUES:
+        _element(at.radio, "Vue:").set_value(vue).run()
+        mesures = []
+        for _ in range(nb):
+            debut = time.perf_counter()
+            at.run()
+            mesures.append(time.perf_counter() - debut)
+        temps[vue] = statistics.mean(mesures)
+    return temps
+
+
+def _attendre(at):
+    # analyse de fond (gros fichier): le script se relance tant que la barre de progression est affichée
+    while at.get('progress'):
+        at.run()
+
+
+def mesurer(app, nb_reruns):
+    """Premier rendu depuis le lancement du processus, puis analyse et reruns par mode (exécuté à froid)."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    # AppTest ne suit pas st.rerun: le harnais relance lui-même le script (voir _attendre)
+    st.rerun = st.stop
+    mesures = {}
+    at = AppTest.from_file(app, default_timeout=600)
+    at.run()
+    mesures['premier rendu'] = time.perf_counter() - DEBUT
+    for mode in ["Use Sample Data", "Fichier local (streaming)"]:
+        debut = time.perf_counter()
+        _element(at.sidebar.radio, "Mode:").set_value(mode).run()
+        _attendre(at)
+        mesures[f"{mode}: analyse"] = time.perf_counter() - debut
+        erreurs = [e.value for e in at.exception]
+        if erreurs:
+            raise RuntimeError(f"{mode}: {erreurs[0]}")
+        for vue, temps in _reruns(at, nb_reruns).items():
+            mesures[f"{mode}: rerun {vue}"] = temps
+    return mesures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps jusqu'au premier rendu et par rerun du dashboard")
+    parser.add_argument('--app', default=os.path.join(RACINE, 'app.py'),
+                        help="script Streamlit (une autre version pour comparer avant/après)")
+    parser.add_argument('--repertoire', default='.', help="répertoire contenant financial_trades_sample.csv")
+    parser.add_argument('--essais', type=int, default=3, help="démarrages à froid (médiane)")
+    parser.add_argument('--reruns', type=int, default=5, help="reruns mesurés par vue")
+    parser.add_argument('--enfant', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    app = os.path.abspath(args.app)
+    if args.enfant:
+        # processus neuf: les imports du premier rendu sont comptés
+        os.chdir(args.repertoire)
+        sys.path.insert(0, os.path.dirname(app))
+        print(json.dumps(mesurer(app, args.reruns)))
+        return
+
+    essais = []
+    for _ in range(args.essais):
+        sortie = subprocess.run([sys.executable, os.path.abspath(__file__), '--enfant', '--app', app,
+                                 '--repertoire', args.repertoire, '--reruns', str(args.reruns)],
+                                stdout=subprocess.PIPE, text=True, check=True).stdout
+        essais.append(json.loads(sortie.strip().splitlines()[-1]))
+    print(f"{app}: médiane de {args.essais} démarrage(s), {args.reruns} reruns par vue")
+    print(f"{'phase':<52} {'temps (s)':>10}")
+    for phase in essais[0]:
+        print(f"{phase:<52} {statistics.median(essai[phase] for essai in essais):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qualite import AnalyseurQualite
+
+
+def charger(chemin, nb_lignes):
+    df = pd.read_csv(chemin)
+    repetitions = -(-nb_lignes // len(df))
+    return pd.concat([df] * repetitions, ignore_index=True).iloc[:nb_lignes]
+
+
+def chronometrer(df, execution, nb_workers):
+    debut = time.perf_counter()
+    analyseur = AnalyseurQualite(df, execution=execution, nb_workers=nb_workers)
+    analyseur.analyser_tout()
+    return time.perf_counter() - debut, analyseur
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speedup de analyser_tout() selon le nombre de workers")
+    parser.add_argument('--fichier', default='financial_trades_sample.csv')
+    parser.add_argument('--lignes', type=int, default=2_000_000)
+    parser.add_argument('--workers', type=int, nargs='+')
+    args = parser.parse_args()
+
+    df = charger(args.fichier, args.lignes)
+    nb_coeurs = os.cpu_count() or 1
+    workers = args.workers or sorted({1, 2, 4, 8, 16, 32, nb_coeurs} & set(range(1, nb_coeurs + 1)))
+
+    reference, serie = chronometrer(df, 'serie', None)
+    print(f"{len(df):,} lignes, {nb_coeurs} coeurs")
+    print(f"{'execution':<10} {'workers':>7} {'temps (s)':>10} {'speedup':>8} {'identique':>9}")
+    print(f"{'serie':<10} {1:>7} {reference:>10.2f} {1.0:>8.2f} {'oui':>9}")
+    for execution in ['threads', 'processus']:
+        for nb in workers:
+            temps, analyseur = chronometrer(df, execution, nb)
+            identique = 'oui' if repr(analyseur.resultats) == repr(serie.resultats) else 'NON'
+            print(f"{execution:<10} {nb:>7} {temps:>10.2f} {reference / temps:>8.2f} {identique:>9}")
+
+
+if __name__ == '__main__':
+    main()
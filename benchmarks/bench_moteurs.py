@@ -0,0 +1,103 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qualite import AnalyseurQualite
+from qualite.chargement import charger, convertir
+from qualite.regles import PLAN_DEFAUT, charger_regles
+from qualite.requetes import analyser_requetes
+
+# règles qui passent par toutes les familles: dates comparées, comparaison numérique, ensemble interdit
+REGLES = PLAN_DEFAUT.etendre(charger_regles([
+    {"nom": "reglement_apres_trade", "check": "dates_metier", "type": "comparaison", "gauche": "SettlementDate",
+     "operateur": ">=", "droite": "Date", "dates": True},
+    {"nom": "commission_sous_prix", "check": "dates_metier", "type": "comparaison", "gauche": "Commission",
+     "operateur": "<", "droite": "Price"},
+    {"nom": "contreparties_exclues", "check": "categoriques", "type": "valeurs", "colonne": "Counterparty",
+     "interdites": ["UBS", "Nomura"]},
+]))
+
+
+def salir(df, graine=0):
+    """Copie du frame avec les défauts que les checks cherchent: dates, espaces, nulls, doublons."""
+    rng = np.random.default_rng(graine)
+    df = df.copy()
+    n = len(df)
+
+    def lignes(part):
+        return rng.choice(n, max(1, int(n * part)), replace=False)
+
+    df.loc[lignes(0.001), 'Date'] = '31/02/2024'
+    df.loc[lignes(0.001), 'SettlementDate'] = '2023-01-01'
+    df.loc[lignes(0.001), 'EntryTime'] = '25:61:00'
+    df.loc[lignes(0.002), 'Counterparty'] = ' ' + df['Counterparty'].iloc[0]
+    df.loc[lignes(0.001), 'Instrument'] = 'eurusd\t'
+    df.loc[lignes(0.001), 'Status'] = 'EXECUTED '
+    for col in ('Quantity', 'Price', 'Counterparty', 'Instrument'):
+        df.loc[lignes(0.003), col] = np.nan
+    df.loc[lignes(0.001), 'Price'] = 0
+    df.loc[lignes(0.001), 'Commission'] = -1
+    return pd.concat([df, df.iloc[lignes(0.002)]], ignore_index=True)
+
+
+def variantes(chemin, repertoire):
+    df = pd.read_csv(chemin)
+    sale = salir(df)
+    fichiers = {'csv': chemin}
+    for nom, frame in [('csv_sale', sale), ('csv_sans_tradeid', sale.drop(columns=['TradeID']))]:
+        fichiers[nom] = os.path.join(repertoire, nom + '.csv')
+        frame.to_csv(fichiers[nom], index=False)
+    for nom in ('csv', 'csv_sale'):
+        fichiers[nom.replace('csv', 'parquet')] = os.path.join(repertoire, nom + '.parquet')
+        convertir(fichiers[nom], fichiers[nom.replace('csv', 'parquet')])
+    return fichiers
+
+
+def analyser(chemin):
+    # référence: le fichier chargé comme par l'application
+    analyseur = AnalyseurQualite(charger(chemin, chemin), regles=REGLES)
+    analyseur.analyser_tout()
+    return analyseur
+
+
+def chronometrer(analyse):
+    debut = time.perf_counter()
+    analyseur = analyse()
+    return time.perf_counter() - debut, analyseur
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Moteur DuckDB contre moteur pandas: temps et parité des résultats")
+    parser.add_argument('--fichier', default='financial_trades_sample.csv')
+    parser.add_argument('--threads', type=int)
+    args = parser.parse_args()
+
+    differences = 0
+    with tempfile.TemporaryDirectory() as repertoire:
+        fichiers = variantes(args.fichier, repertoire)
+        print(f"{'fichier':<18} {'pandas (s)':>10} {'duckdb (s)':>10} {'speedup':>8} {'identique':>9}")
+        for nom, chemin in fichiers.items():
+            reference, pandas_ = chronometrer(lambda: analyser(chemin))
+            temps, duckdb_ = chronometrer(lambda: analyser_requetes(chemin, regles=REGLES, nb_threads=args.threads))
+            identique = (duckdb_.resultats == pandas_.resultats
+                         and repr(duckdb_.resultats) == repr(pandas_.resultats))
+            print(f"{nom:<18} {reference:>10.2f} {temps:>10.2f} {reference / temps:>8.2f} "
+                  f"{'oui' if identique else 'NON':>9}")
+            if not identique:
+                differences += 1
+                for check in pandas_.resultats:
+                    if repr(duckdb_.resultats.get(check)) != repr(pandas_.resultats[check]):
+                        print(f"  {check}: pandas {pandas_.resultats[check]!r}")
+                        print(f"  {' ' * len(check)}  duckdb {duckdb_.resultats.get(check)!r}")
+    sys.exit(1 if differences else 0)
+
+
+if __name__ == '__main__':
+    main()
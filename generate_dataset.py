@@ -1,73 +1,168 @@
+import argparse
+import os
+
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
 
-np.random.seed(42)
-random.seed(42)
+from qualite.chargement import convertir
+
+DATE_DEBUT = np.datetime64('2024-01-01')
+
+instruments = np.array(['EUR/USD', 'GBP/USD', 'USD/CHF', 'EUR/GBP', 'AUD/USD', 'NZD/USD',
+                        'EURUSD.FX', 'GBPUSD.FX', 'IRS_EUR_5Y', 'IRS_USD_10Y', 'SWAP_EUR_3M'], dtype=object)
+
+banques = np.array(['Goldman Sachs', 'Morgan Stanley', 'JP Morgan', 'Barclays', 'Société Générale',
+                    'BNP Paribas', 'Deutsche Bank', 'UBS', 'Credit Suisse', 'Pictet'], dtype=object)
+
+statuts = np.array(['EXECUTED', 'PENDING', 'CANCELLED', 'SETTLED', 'CONFIRMED'], dtype=object)
+types = np.array(['SPOT', 'FORWARD', 'SWAP', 'OPTION', 'NDF'], dtype=object)
 
-nb_lignes = 12000
-date_debut = datetime(2024, 1, 1)
+# part des lignes portant chaque anomalie (exclusives entre elles)
+TAUX = {
+    'quantite_manquante': 0.02,
+    'quantite_aberrante': 0.02,
+    'doublon': 0.02,
+    'prix_negatif': 0.02,
+    'contrepartie_manquante': 0.02,
+}
 
-instruments = ['EUR/USD', 'GBP/USD', 'USD/CHF', 'EUR/GBP', 'AUD/USD', 'NZD/USD', 
-               'EURUSD.FX', 'GBPUSD.FX', 'IRS_EUR_5Y', 'IRS_USD_10Y', 'SWAP_EUR_3M']
+# heures d'exécution 09:00:00 - 17:59:59, indexées par seconde
+HEURES = np.array([f"{h:02d}:{m:02d}:{s:02d}" for h in range(9, 18) for m in range(60) for s in range(60)],
+                  dtype=object)
 
-banques = ['Goldman Sachs', 'Morgan Stanley', 'JP Morgan', 'Barclays', 'Société Générale', 
-           'BNP Paribas', 'Deutsche Bank', 'UBS', 'Credit Suisse', 'Pictet']
 
-statuts = ['EXECUTED', 'PENDING', 'CANCELLED', 'SETTLED', 'CONFIRMED']
-types = ['SPOT', 'FORWARD', 'SWAP', 'OPTION', 'NDF']
+def _identifiants(numeros):
+    # formatage direct: plus rapide que np.char (qui tronque en plus au-delà de 6 chiffres)
+    return np.array([f"TRADE_{i:06d}" for i in numeros.tolist()], dtype=object)
 
-data = []
 
-for i in range(nb_lignes):
-    trade_id = f"TRADE_{i+1:06d}"
-    date = date_debut + timedelta(days=random.randint(0, 330))
-    instrument = np.random.choice(instruments)
-    qty = np.random.normal(loc=1000000, scale=500000)
-    prix = np.random.normal(loc=1.1, scale=0.3)
-    banque = np.random.choice(banques)
-    type_trade = np.random.choice(types)
-    statut = np.random.choice(statuts)
+def generer(nb_lignes, graine=42, taux=None, colonnes_extra=0, debut=0):
+    """Bloc de trades synthétiques, entièrement vectorisé.
+
+    `debut` est le numéro de la première ligne du bloc: les TradeID restent uniques
+    d'un bloc à l'autre et les doublons pointent vers des lignes déjà écrites.
+    Même graine et même `debut` -> même bloc.
+    """
+    taux = {**TAUX, **(taux or {})}
+    rng = np.random.default_rng([graine, debut])
+    n = nb_lignes
+    numeros = np.arange(debut + 1, debut + n + 1)
+
+    jours = rng.integers(0, 331, n)
+    dates = DATE_DEBUT + jours.astype('timedelta64[D]')
+    reglements = dates + rng.integers(1, 6, n).astype('timedelta64[D]')
+    qty = rng.normal(1_000_000, 500_000, n)
+    prix = rng.normal(1.1, 0.3, n)
     valeur = qty * prix
-    
-    alea = random.random()
-    
-    if alea < 0.02:
-        qty = np.nan
-    elif alea < 0.04:
-        qty = np.random.normal(loc=100000000, scale=50000000)
-    elif alea < 0.06:
-        trade_id = f"TRADE_{max(0, i-random.randint(1, 500)):06d}"
-    elif alea < 0.08:
-        prix = -abs(prix)
-    elif alea < 0.10:
-        banque = None
-    
-    data.append({
-        'TradeID': trade_id,
-        'Date': date.strftime('%Y-%m-%d'),
-        'Instrument': instrument,
-        'TradeType': type_trade,
+    banque = rng.choice(banques, n)
+
+    # un tirage par ligne, découpé en tranches: au plus une anomalie par ligne
+    alea = rng.random(n)
+    seuils = np.cumsum([taux[nom] for nom in TAUX])
+    anomalie = np.searchsorted(seuils, alea, side='right')
+    noms = list(TAUX)
+
+    masque = anomalie == noms.index('quantite_manquante')
+    qty[masque] = np.nan
+    masque = anomalie == noms.index('quantite_aberrante')
+    qty[masque] = rng.normal(100_000_000, 50_000_000, masque.sum())
+    masque = anomalie == noms.index('doublon')
+    numeros_doublons = np.maximum(0, numeros[masque] - 1 - rng.integers(1, 501, masque.sum()))
+    masque = anomalie == noms.index('prix_negatif')
+    prix[masque] = -np.abs(prix[masque])
+    banque[anomalie == noms.index('contrepartie_manquante')] = None
+
+    trade_ids = _identifiants(numeros)
+    trade_ids[anomalie == noms.index('doublon')] = _identifiants(numeros_doublons)
+    commission = rng.uniform(0, 0.005, n)
+    commission[np.isnan(qty)] = np.nan
+
+    df = pd.DataFrame({
+        'TradeID': trade_ids,
+        'Date': np.datetime_as_string(dates, unit='D').astype(object),
+        'Instrument': rng.choice(instruments, n),
+        'TradeType': rng.choice(types, n),
         'Quantity': qty,
         'Price': prix,
         'Value': valeur,
         'Counterparty': banque,
-        'Status': statut,
-        'Commission': np.random.uniform(0, 0.005) if qty == qty else np.nan,
-        'EntryTime': f"{random.randint(9, 17):02d}:{random.randint(0, 59):02d}:{random.randint(0, 59):02d}",
-        'SettlementDate': (date + timedelta(days=random.randint(1, 5))).strftime('%Y-%m-%d'),
+        'Status': rng.choice(statuts, n),
+        'Commission': commission,
+        'EntryTime': HEURES[rng.integers(0, len(HEURES), n)],
+        'SettlementDate': np.datetime_as_string(reglements, unit='D').astype(object),
     })
+    for i in range(colonnes_extra):
+        df[f'Attribut_{i + 1:02d}'] = rng.normal(0, 1, n)
+    return df
+
+
+def ecrire(chemin, nb_lignes, taille_bloc=1_000_000, **options):
+    """Écrit `nb_lignes` trades en CSV ou Parquet bloc par bloc, à mémoire bornée."""
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
+    parquet = os.path.splitext(chemin)[1].lower() in ('.parquet', '.pq')
+    ecrivain = None
+    try:
+        for debut in range(0, nb_lignes, taille_bloc):
+            bloc = generer(min(taille_bloc, nb_lignes - debut), debut=debut, **options)
+            if ecrivain is None:
+                schema = pa.Schema.from_pandas(bloc, preserve_index=False)
+                # une colonne entièrement vide dans le premier bloc ne doit pas figer un type null
+                schema = pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                                    for f in schema])
+                # l'écrivain CSV d'Arrow est ~7x plus rapide que DataFrame.to_csv
+                ecrivain = pq.ParquetWriter(chemin, schema) if parquet else pacsv.CSVWriter(chemin, schema)
+            ecrivain.write_table(pa.Table.from_pandas(bloc, schema=schema, preserve_index=False))
+    finally:
+        if ecrivain is not None:
+            ecrivain.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère un jeu de trades synthétiques avec anomalies")
+    parser.add_argument('--lignes', type=int, default=12000)
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--sortie', default='financial_trades_sample.csv', help=".csv ou .parquet")
+    parser.add_argument('--taille-bloc', type=int, default=1_000_000)
+    parser.add_argument('--colonnes-extra', type=int, default=0, help="colonnes numériques en plus")
+    parser.add_argument('--taux', nargs='+', default=[], metavar='ANOMALIE=PART',
+                        help=f"parts d'anomalies, parmi: {', '.join(TAUX)}")
+    parser.add_argument('--sans-conversions', action='store_true',
+                        help="ne pas écrire les copies Parquet et Feather du CSV")
+    args = parser.parse_args()
+
+    taux = {}
+    for option in args.taux:
+        nom, _, part = option.partition('=')
+        if nom not in TAUX:
+            parser.error(f"anomalie inconnue: {nom}")
+        taux[nom] = float(part)
+
+    ecrire(args.sortie, args.lignes, args.taille_bloc, graine=args.graine, taux=taux,
+           colonnes_extra=args.colonnes_extra)
+    base, extension = os.path.splitext(args.sortie)
+    if extension.lower() == '.csv' and not args.sans_conversions:
+        # mêmes données en Parquet et Arrow IPC pour l'ingestion colonnaire
+        convertir(args.sortie, base + '.parquet')
+        convertir(args.sortie, base + '.feather')
+        print(f"✅ Dataset créé : {args.lignes} records (CSV, Parquet, Feather)")
+    else:
+        print(f"✅ Dataset créé : {args.lignes} records ({args.sortie})")
+
+    if args.lignes > 1_000_000:
+        return
+    df = pd.read_csv(args.sortie) if extension.lower() == '.csv' else pd.read_parquet(args.sortie)
+    print(f"\n📊 Preview :")
+    print(df.head(10))
+    print(f"\n⚠️ Anomalies détectées :")
+    print(f"  - Missing Quantity : {df['Quantity'].isna().sum()}")
+    print(f"  - Missing Counterparty : {df['Counterparty'].isna().sum()}")
+    print(f"  - Duplicate TradeID : {len(df) - df['TradeID'].nunique()}")
+    print(f"  - Negative Price : {(df['Price'] < 0).sum()}")
+    print(f"  - Missing Commission : {df['Commission'].isna().sum()}")
+
 
-df = pd.DataFrame(data)
-df.to_csv('financial_trades_sample.csv', index=False)
-
-print(f"✅ Dataset créé : {len(df)} records")
-print(f"\n📊 Preview :")
-print(df.head(10))
-print(f"\n⚠️ Anomalies détectées :")
-print(f"  - Missing Quantity : {df['Quantity'].isna().sum()}")
-print(f"  - Missing Counterparty : {df['Counterparty'].isna().sum()}")
-print(f"  - Duplicate TradeID : {len(df) - df['TradeID'].nunique()}")
-print(f"  - Negative Price : {(df['Price'] < 0).sum()}")
-print(f"  - Missing Commission : {df['Commission'].isna().sum()}")
+if __name__ == '__main__':
+    main()
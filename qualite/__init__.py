@@ -0,0 +1,5 @@
+from qualite.analyseur import AnalyseurQualite
+from qualite.flux import ProfilFlux, analyser_csv
+from qualite.profil import ProfilColonnes
+
+__all__ = ["AnalyseurQualite", "ProfilColonnes", "ProfilFlux", "analyser_csv"]
@@ -0,0 +1,5 @@
+import sys
+
+from qualite.cli import main
+
+sys.exit(main())
@@ -0,0 +1,455 @@
+import copy
+from datetime import datetime
+
+import pandas as pd
+
+from qualite.chaines import COLONNES_TICKER
+from qualite.dates import FORMAT_HEURE
+from qualite.execution import precalculer
+from qualite.groupes import ventiler
+from qualite.instrumentation import Chrono
+from qualite.profil import ProfilColonnes, ProfilFige
+from qualite.regles import PENALITES, PLAN_DEFAUT, SEVERITES
+from qualite.tendances import SEUIL_KS, SEUIL_PSI, date_analyse, derive, nom_jeu
+from qualite.violations import index_violations
+
+
+class AnalyseAnnulee(Exception):
+    """Levée par analyser_tout() quand l'annulation est demandée entre deux checks."""
+
+
+class AnalyseurQualite:
+    
+    checks = ['valeurs_manquantes', 'doublons', 'types', 'outliers', 'ranges', 'dates',
+              'categoriques', 'integrite', 'calculs', 'strings', 'logique_metier',
+              'completude', 'timestamps', 'distribution', 'fraicheur']
+    checks_partitionnables = ['ranges', 'categoriques', 'calculs', 'strings', 'logique_metier']
+    # colonnes lues par chaque check (None = toutes), pour l'élagage à la lecture;
+    # celles des checks déclaratifs (ranges, categoriques, ...) viennent des règles
+    colonnes_par_check = {
+        'valeurs_manquantes': None,
+        'doublons': 'doublons',
+        'types': ['Date', 'SettlementDate', 'CreatedAt'],
+        'outliers': 'numeriques',
+        'dates': ['Date', 'SettlementDate'],
+        'strings': 'texte',
+        'timestamps': ['EntryTime'],
+        'distribution': 'numeriques',
+        'fraicheur': ['Date'],
+        'derive': 'numeriques',
+        **PLAN_DEFAUT.colonnes_par_check(),
+    }
+    
+    def __init__(self, df=None, profil=None, execution='serie', nb_workers=None, checks=None,
+                 historique=None, source=None, approximation=False, regles=None, tendances=None):
+        self.df = df
+        self.historique = historique
+        # historique qualité (qualite.tendances): active le check de dérive des distributions
+        self.tendances = tendances
+        self.source = source
+        # règles déclaratives (qualite.regles); les checks qu'elles ajoutent suivent les checks intégrés
+        self.regles = regles if regles is not None else PLAN_DEFAUT
+        supplementaires = [nom for nom in self.regles.checks() if nom not in self.checks]
+        self.checks = [nom for nom in self.checks + supplementaires if checks is None or nom in checks]
+        self.checks_partitionnables = self.checks_partitionnables + supplementaires
+        if tendances is not None:
+            self.checks.append('derive')
+        self.profil = profil if profil is not None else ProfilColonnes(df, approximation)
+        self.execution = execution
+        self.nb_workers = nb_workers
+        self.resultats = {}
+        self.approximatifs = []
+        # phase -> temps, cpu, horloge_cpu, memoire_mb, lignes_s (voir qualite.instrumentation)
+        self.performances = {}
+        self.checks_ok = 0
+        self.checks_total = len(self.checks)
+        self.timestamp = datetime.now()
+        self._violations = None
+        self._profil_lignes = None
+        self._groupes = {}
+    
+    def check_valeurs_manquantes(self):
+        na = self.profil.na_par_colonne()
+        nb_lignes = self.profil.nb_lignes()
+        missing_pct = {col: n / nb_lignes * 100 if nb_lignes > 0 else 0 for col, n in na.items()}
+        total = sum(na.values())
+        ok = total == 0
+        
+        self.resultats['valeurs_manquantes'] = {
+            'passed': ok,
+            'detail': f"Total missing: {total}",
+            'by_column': missing_pct,
+            'severity': 'CRITICAL' if total > nb_lignes * 0.1 else 'WARNING' if total > 0 else 'OK'
+        }
+        if ok:
+            self.checks_ok += 1
+    
+    def check_doublons(self):
+        nb_lignes = self.profil.nb_lignes()
+        if 'TradeID' in self.profil.colonnes():
+            dupes = self.profil.nb_duplicats('TradeID')
+            ok = dupes == 0
+        else:
+            dupes = self.profil.nb_duplicats(None)
+            ok = dupes == 0
+        
+        resultat = {
+            'passed': ok,
+            'count': dupes,
+            'percentage': dupes / nb_lignes * 100 if nb_lignes > 0 else 0,
+        }
+        if self.historique is not None and self.df is not None and 'TradeID' in self.profil.colonnes():
+            # TradeID déjà vus dans un fichier précédent
+            deja_vus = self.historique.nb_connus(self.df['TradeID'], self.source)
+            resultat['historique'] = deja_vus
+            ok = ok and deja_vus == 0
+            resultat['passed'] = ok
+        resultat['severity'] = 'OK' if ok else 'CRITICAL'
+        self.resultats['doublons'] = resultat
+        if ok:
+            self.checks_ok += 1
+    
+    def check_types(self):
+        problemes = {}
+        colonnes_date = ['Date', 'SettlementDate', 'CreatedAt']
+        
+        for col in colonnes_date:
+            if col in self.profil.colonnes():
+                invalides = self.profil.nb_dates_invalides(col, None)
+                if invalides > 0:
+                    problemes[col] = f"{invalides} dates non parsables"
+        
+        ok = len(problemes) == 0
+        self.resultats['types'] = {
+            'passed': ok,
+            'issues': problemes,
+            'severity': 'WARNING' if problemes else 'OK'
+        }
+        if ok:
+            self.checks_ok += 1
+    
+    def check_outliers(self):
+        nb_outliers = 0
+        details = {}
+        
+        for col in self.profil.colonnes_numeriques():
+            if self.profil.nb_valides(col) > 0:
+                q1, q3 = self.profil.quantiles(col)
+                iqr = q3 - q1
+                lower = q1 - 1.5 * iqr
+                upper = q3 + 1.5 * iqr
+                
+                outliers = self.profil.nb_hors_bornes(col, lower, upper)
+                if outliers > 0:
+                    nb_outliers += outliers
+                    details[col] = outliers
+        
+        ok = nb_outliers == 0
+        self.resultats['outliers'] = {
+            'passed': ok,
+            'total': nb_outliers,
+            'detail': details,
+            'severity': 'WARNING' if nb_outliers > self.profil.nb_lignes() * 0.05 else 'INFO' if nb_outliers > 0 else 'OK'
+        }
+        if ok:
+            self.checks_ok += 1
+    
+    def appliquer_regles(self, nom):
+        """Résultat d'un check déclaratif: une entrée d'issues par règle en échec.
+
+        Les règles dont une colonne est absente sont ignorées; la sévérité est la
+        plus haute des règles en échec.
+        """
+        colonnes = self.profil.colonnes()
+        regles = self.regles.par_check.get(nom, [])
+        problemes = {}
+        severites = []
+        schema = {}
+        for regle in regles:
+            if regle.type == 'colonnes_requises':
+                manquantes = [col for col in regle.colonnes if col not in colonnes]
+                schema.setdefault('colonnes_manquantes', []).extend(manquantes)
+                schema['total_colonnes'] = len(colonnes)
+                if manquantes:
+                    severites.append(regle.severite)
+                continue
+            if any(col not in colonnes for col in regle.colonnes):
+                continue
+            if regle.type == 'non_nul':
+                n = self.profil.nb_na(regle.colonnes[0])
+            else:
+                n = self.profil.nb_violations(regle.cle, self.regles.passe(regle))
+            if n is None:
+                problemes[regle.nom] = 'évaluation impossible'
+            elif n > 0:
+                problemes[regle.nom] = regle.message.format(n=n) if regle.message else n
+            else:
+                continue
+            severites.append(regle.severite)
+        
+        ok = not severites
+        resultat = {'passed': ok}
+        if not schema or any(regle.type != 'colonnes_requises' for regle in regles):
+            resultat['issues'] = problemes
+        resultat.update(schema)
+        resultat['severity'] = max(severites, key=SEVERITES.index) if severites else 'OK'
+        self.resultats[nom] = resultat
+        if ok:
+            self.checks_ok += 1
+    
+    def executer_check(self, nom):
+        methode = getattr(self, 'check_' + nom, None)
+        if methode is not None:
+            methode()
+        else:
+            self.appliquer_regles(nom)
+    
+    def check_ranges(self):
+        self.appliquer_regles('ranges')
+    
+    def check_dates(self):
+        problemes = {}
+        
+        if 'Date' in self.profil.colonnes() and 'SettlementDate' in self.profil.colonnes():
+            # lignes non parsables ignorées ici: elles sont comptées par check_types
+            invalides = self.profil.nb_dates_inversees('Date', 'SettlementDate')
+            if invalides is None:
+                problemes['erreur_parsing'] = True
+            elif invalides > 0:
+                problemes['settlement_avant_trade'] = invalides
+        
+        ok = len(problemes) == 0
+        self.resultats['dates'] = {
+            'passed': ok,
+            'issues': problemes,
+            'severity': 'CRITICAL' if problemes else 'OK'
+        }
+        if ok:
+            self.checks_ok += 1
+    
+    def check_categoriques(self):
+        self.appliquer_regles('categoriques')
+    
+    def check_integrite(self):
+        self.appliquer_regles('integrite')
+    
+    def check_calculs(self):
+        self.appliquer_regles('calculs')
+    
+    def check_strings(self):
+        problemes = {}
+        
+        for col in self.profil.colonnes_texte():
+            defauts = {
+                'espaces': self.profil.nb_espaces(col),
+                'blancs spéciaux': self.profil.nb_blancs_speciaux(col),
+                'non imprimables': self.profil.nb_non_imprimables(col),
+                'variantes de casse': self.profil.nb_variantes_casse(col),
+            }
+            if col in COLONNES_TICKER:
+                defauts['formats de ticker'] = self.profil.nb_variantes_format(col)
+            details = [f"{n} {libelle}" for libelle, n in defauts.items() if n > 0]
+            if details:
+                problemes[col] = ", ".join(details)
+        
+        ok = len(problemes) == 0
+        self.resultats['strings'] = {
+            'passed': ok,
+            'issues': problemes,
+            'severity': 'INFO' if problemes else 'OK'
+        }
+        if ok:
+            self.checks_ok += 1
+    
+    def check_logique_metier(self):
+        self.appliquer_regles('logique_metier')
+    
+    def check_completude(self):
+        self.appliquer_regles('completude')
+    
+    def check_timestamps(self):
+        problemes = {}
+        
+        if 'EntryTime' in self.profil.colonnes():
+            invalides = self.profil.nb_dates_invalides('EntryTime', FORMAT_HEURE)
+            if invalides > 0:
+                problemes['EntryTime'] = f"{invalides} heures non parsables"
+        
+        ok = len(problemes) == 0
+        self.resultats['timestamps'] = {
+            'passed': ok,
+            'issues': problemes,
+            'severity': 'WARNING' if problemes else 'OK'
+        }
+        if ok:
+            self.checks_ok += 1
+    
+    def check_distribution(self):
+        problemes = {}
+        
+        for col in self.profil.colonnes_numeriques():
+            if self.profil.nb_valides(col) > 0:
+                skew = self.profil.asymetrie(col)
+                if abs(skew) > 3:
+                    problemes[col] = f"Skewness élevé: {skew:.2f}"
+        
+        ok = len(problemes) == 0
+        self.resultats['distribution'] = {
+            'passed': ok,
+            'issues': problemes,
+            'severity': 'INFO' if problemes else 'OK'
+        }
+        if ok:
+            self.checks_ok += 1
+    
+    def check_fraicheur(self):
+        problemes = {}
+        
+        if 'Date' in self.profil.colonnes():
+            date_max = self.profil.date_max('Date')
+            if date_max is not None and not pd.isna(date_max):
+                jours = (datetime.now() - date_max).days
+                if jours > 365:
+                    problemes['age_donnees'] = f"Data age: {jours} jours"
+        
+        ok = len(problemes) == 0
+        self.resultats['fraicheur'] = {
+            'passed': ok,
+            'issues': problemes,
+            'severity': 'INFO' if problemes else 'OK'
+        }
+        if ok:
+            self.checks_ok += 1
+    
+    def check_derive(self):
+        """Dérive des colonnes numériques par rapport aux analyses précédentes du même jeu.
+
+        La référence est le mélange des FENETRE dernières analyses datées avant
+        celle-ci; une colonne dérive si son PSI ou son KS dépasse le seuil.
+        """
+        nb_analyses, references = self.tendances.reference(nom_jeu(self.source), date_analyse(self))
+        problemes = {}
+        for col in self.profil.colonnes_numeriques():
+            actuelle = self.profil.repartition(col)
+            if actuelle is None or not references.get(col):
+                continue
+            psi, ks = derive(actuelle, references[col])
+            if psi > SEUIL_PSI or ks > SEUIL_KS:
+                problemes[col] = f"PSI {psi:.3f}, KS {ks:.3f}"
+        
+        ok = len(problemes) == 0
+        self.resultats['derive'] = {
+            'passed': ok,
+            'issues': problemes,
+            'reference': f"{nb_analyses} analyse(s) précédente(s)",
+            'severity': 'WARNING' if problemes else 'OK'
+        }
+        if ok:
+            self.checks_ok += 1
+    
+    def analyser_tout(self, progression=None, annulation=None):
+        """Exécute les checks actifs.
+
+        `progression(analyseur, nom)` est appelée au démarrage (nom None) puis après
+        chaque check; `annulation` (threading.Event) est consultée entre deux checks.
+        """
+        nb_lignes = self.profil.nb_lignes()
+        if progression is not None:
+            progression(self, None)
+        if self.execution != 'serie' and self.df is not None:
+            with Chrono(nb_lignes) as chrono:
+                precalculer(self, self.execution, self.nb_workers)
+            self.performances['precalcul'] = chrono.mesures
+        for nom in self.checks:
+            if annulation is not None and annulation.is_set():
+                raise AnalyseAnnulee(nom)
+            avant = self.profil.nb_approximations
+            with Chrono(nb_lignes, self.profil.horloge_cpu) as chrono:
+                self.executer_check(nom)
+            self.performances[nom] = chrono.mesures
+            if self.profil.nb_approximations > avant:
+                self.approximatifs.append(nom)
+            if progression is not None:
+                progression(self, nom)
+    
+    @classmethod
+    def configuration(cls, checks=None, regles=None):
+        regles = regles if regles is not None else PLAN_DEFAUT
+        noms = cls.checks + [nom for nom in regles.checks() if nom not in cls.checks]
+        return {'checks': tuple(nom for nom in noms if checks is None or nom in checks),
+                'regles': regles.empreinte}
+    
+    @classmethod
+    def colonnes_lues(cls, regles=None):
+        """colonnes_par_check complété par les checks d'un jeu de règles."""
+        if regles is None:
+            return cls.colonnes_par_check
+        return {**cls.colonnes_par_check, **regles.colonnes_par_check()}
+    
+    def profil_lignes(self):
+        """Profil sur le frame, pour les graphiques et l'index des violations.
+
+        C'est celui de l'analyse, sauf quand elle a tourné sur des mesures figées ou
+        extrapolées (scan rapide): un profil neuf est alors créé et gardé.
+        """
+        if isinstance(self.profil, ProfilColonnes) and self.profil.df is self.df:
+            return self.profil
+        profil = getattr(self, '_profil_lignes', None)
+        if profil is None or profil.df is not self.df:
+            profil = self._profil_lignes = ProfilColonnes(self.df)
+        return profil
+    
+    def violations(self):
+        """Index des lignes en violation (qualite.violations), construit à la première demande.
+
+        None sans frame (streaming, résultat relu du cache disque).
+        """
+        if self.df is None:
+            return None
+        if getattr(self, '_violations', None) is None:
+            self._violations = index_violations(self)
+        return self._violations
+    
+    def groupes(self, colonne, periode=None):
+        """Violations et score par groupe (qualite.groupes), gardés par colonne et période.
+
+        None sans frame, comme l'index des violations sur lequel ils reposent.
+        """
+        if self.df is None:
+            return None
+        cle = (colonne, periode)
+        if cle not in self._groupes:
+            self._groupes[cle] = ventiler(self, colonne, periode)
+        return self._groupes[cle]
+    
+    def figer(self):
+        fige = copy.copy(self)
+        fige.df = None
+        fige._violations = None
+        fige._groupes = {}
+        fige._profil_lignes = None
+        fige.historique = None
+        fige.tendances = None
+        fige.profil = ProfilFige(self.profil.mesures)
+        fige.resultats = dict(self.resultats)
+        fige.approximatifs = list(self.approximatifs)
+        fige.performances = dict(self.performances)
+        return fige
+    
+    def score_qualite(self):
+        score = 100
+        
+        for nom, res in self.resultats.items():
+            score -= PENALITES.get(res.get('severity', 'OK'), 0)
+        
+        return max(0, score)
+    
+    def resume(self):
+        return {
+            'total_checks': self.checks_total,
+            'checks_ok': self.checks_ok,
+            'score': self.score_qualite(),
+            'nb_lignes': self.profil.nb_lignes(),
+            'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'approximatif': list(self.approximatifs)
+        }
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def empreinte_contenu(octets, configuration=None):
+    h = hashlib.blake2b(octets, digest_size=16)
+    if configuration is not None:
+        h.update(repr(sorted(configuration.items())).encode())
+    return h.hexdigest()
+
+
+def taille_frame(analyseur):
+    """Octets occupés par le frame d'un analyseur (0 pour une version figée)."""
+    if analyseur.df is None:
+        return 0
+    return int(analyseur.df.memory_usage(deep=True).sum())
+
+
+def _octets(objet, vus):
+    # tableaux atteignables depuis `objet`, chacun compté une fois (le frame est déjà dans `vus`)
+    if objet is None or isinstance(objet, (str, bytes, int, float, bool, np.generic)) or id(objet) in vus:
+        return 0
+    vus.add(id(objet))
+    if isinstance(objet, np.ndarray):
+        return objet.nbytes
+    if isinstance(objet, pd.DataFrame):
+        return int(objet.memory_usage(index=True).sum())
+    if isinstance(objet, (pd.Series, pd.Index)):
+        return int(objet.memory_usage(index=False) if isinstance(objet, pd.Series) else objet.memory_usage())
+    if isinstance(objet, dict):
+        return sum(_octets(valeur, vus) for valeur in list(objet.values()))
+    if isinstance(objet, (list, tuple, set)):
+        return sum(_octets(valeur, vus) for valeur in list(objet))
+    if hasattr(objet, '__dict__'):
+        return sum(_octets(valeur, vus) for valeur in list(vars(objet).values()))
+    return 0
+
+
+def taille_artefacts(analyseur):
+    """Octets des calculs gardés par un analyseur en plus de son frame.
+
+    Caches du profil (dates parsées, valeurs distinctes, flottants, esquisses),
+    profil par ligne, index des violations et ventilations par groupe: construits
+    pendant l'analyse ou à la première vue qui les demande.
+    """
+    vus = {id(analyseur), id(analyseur.df)}
+    profil_lignes = getattr(analyseur, '_profil_lignes', None)
+    return sum(_octets(objet, vus) for objet in (
+        getattr(analyseur.profil, '_cache', None), getattr(profil_lignes, '_cache', None),
+        getattr(analyseur, '_violations', None), getattr(analyseur, '_groupes', None)))
+
+
+def taille_analyseur(analyseur):
+    """Octets occupés par un analyseur: frame et calculs gardés (0 pour une version figée)."""
+    return taille_frame(analyseur) + taille_artefacts(analyseur)
+
+
+class CacheAnalyses:
+    """Cache LRU d'analyseurs, indexé par empreinte du contenu et de la configuration.
+
+    En mémoire l'analyseur est gardé tel quel (frame compris), dans la limite de
+    `capacite` entrées et, si `budget_mb` est donné, de la taille cumulée des
+    analyseurs (frame et calculs gardés, réévalués à chaque accès: l'index des
+    violations ou les groupes se construisent après la mise en cache); les
+    entrées les moins récentes sont évincées en premier. Si un
+    répertoire est donné, une version figée (résultats et mesures, sans le
+    frame) y est aussi écrite et survit au redémarrage du serveur; le disque
+    garde au plus `capacite_disque` fichiers, les moins récemment lus ou écrits
+    (date de modification) supprimés en premier. Un fichier relu du disque
+    repasse en mémoire.
+    """
+
+    def __init__(self, capacite=8, repertoire=None, budget_mb=None, capacite_disque=256):
+        self.capacite = capacite
+        self.repertoire = repertoire
+        self.budget_mb = budget_mb
+        self.capacite_disque = capacite_disque
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entrees = OrderedDict()
+        self._tailles = {}
+        self._frames = {}
+        self._verrou = threading.Lock()
+
+    @property
+    def memoire_mb(self):
+        return sum(self._tailles.values()) / 1024**2
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def _chemin(self, cle):
+        return os.path.join(self.repertoire, f"{cle}.pkl")
+
+    def get(self, cle):
+        with self._verrou:
+            if cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                self.hits += 1
+                analyseur = self._entrees[cle]
+                self._tailles[cle] = self._frames[cle] + taille_artefacts(analyseur)
+                self._evincer()
+                return analyseur
+        # lecture du disque hors verrou: les autres sessions ne l'attendent pas
+        analyseur = self._lire(cle) if self.repertoire else None
+        with self._verrou:
+            if analyseur is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.put(cle, analyseur, disque=False)
+        return analyseur
+
+    def _lire(self, cle):
+        chemin = self._chemin(cle)
+        try:
+            with open(chemin, 'rb') as f:
+                analyseur = pickle.load(f)
+            # date de modification = dernier accès, pour l'éviction du disque
+            os.utime(chemin)
+        except FileNotFoundError:
+            # absent, ou supprimé entre-temps par l'éviction d'un autre put
+            return None
+        return analyseur
+
+    def _evincer(self):
+        # appelant sous verrou; l'entrée la plus récente est gardée même si elle dépasse le budget à elle seule
+        while len(self._entrees) > 1 and (len(self._entrees) > self.capacite or (
+                self.budget_mb is not None and self.memoire_mb > self.budget_mb)):
+            ancienne, _ = self._entrees.popitem(last=False)
+            del self._tailles[ancienne]
+            del self._frames[ancienne]
+            self.evictions += 1
+
+    def put(self, cle, analyseur, disque=True):
+        frame = taille_frame(analyseur)
+        taille = frame + taille_artefacts(analyseur)
+        with self._verrou:
+            self._entrees[cle] = analyseur
+            self._tailles[cle] = taille
+            self._frames[cle] = frame
+            self._entrees.move_to_end(cle)
+            self._evincer()
+        if disque and self.repertoire:
+            self._ecrire(cle, analyseur.figer())
+
+    def _ecrire(self, cle, fige):
+        os.makedirs(self.repertoire, exist_ok=True)
+        # nom temporaire propre à chaque écrivain: deux sessions peuvent finir le même fichier ensemble
+        descripteur, temporaire = tempfile.mkstemp(dir=self.repertoire, suffix='.tmp')
+        try:
+            with os.fdopen(descripteur, 'wb') as f:
+                pickle.dump(fige, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporaire, self._chemin(cle))
+        except BaseException:
+            os.unlink(temporaire)
+            raise
+        self._evincer_disque()
+
+    def _evincer_disque(self):
+        fichiers = []
+        for entree in os.scandir(self.repertoire):
+            if entree.name.endswith('.pkl'):
+                try:
+                    fichiers.append((entree.stat().st_mtime_ns, entree.path))
+                except FileNotFoundError:
+                    continue
+        fichiers.sort()
+        for _, chemin in fichiers[:max(0, len(fichiers) - self.capacite_disque)]:
+            try:
+                os.unlink(chemin)
+            except FileNotFoundError:
+                pass
+            else:
+                with self._verrou:
+                    self.evictions += 1
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+            self._tailles.clear()
+            self._frames.clear()
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+# au-delà, les variantes (casse, format) ne sont pas cherchées: colonne de type identifiant
+LIMITE_DISTINCTES = 10_000
+
+COLONNES_TICKER = ['Instrument']
+
+
+def codes_distincts(s):
+    """Code de la valeur distincte de chaque ligne (-1 si nulle) et valeurs distinctes."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy(), s.cat.categories
+    return pd.factorize(s)
+
+
+def distinctes(s):
+    """Valeurs distinctes non nulles d'une colonne texte et leur nombre d'occurrences.
+
+    Une seule passe de hachage (ou les codes d'une catégorie), sans copie texte des lignes.
+    """
+    codes, uniques = codes_distincts(s)
+    comptes = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    return pd.Index(uniques).astype(str), comptes
+
+
+def _masques_defauts(uniques):
+    # un masque pyarrow par défaut, sur les valeurs distinctes
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    valeurs = pa.array(uniques, type=pa.string())
+    sans_blancs = pc.utf8_trim_whitespace(valeurs)
+    return {
+        'espace_initial': pc.starts_with(valeurs, ' '),
+        'espace_final': pc.ends_with(valeurs, ' '),
+        # tabulations, espaces insécables, retours ligne... en bordure
+        'blancs_speciaux': pc.not_equal(pc.utf8_trim(valeurs, ' '), sans_blancs),
+        'non_imprimables': pc.invert(pc.utf8_is_printable(sans_blancs)),
+    }
+
+
+def defauts(uniques, comptes):
+    """Lignes touchées par chaque défaut d'hygiène, évalué une fois par valeur distincte."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    poids = pa.array(comptes, type=pa.int64())
+    masques = _masques_defauts(uniques)
+
+    def lignes(masque):
+        return int(pc.sum(pc.if_else(masque, poids, 0)).as_py() or 0)
+
+    return {
+        # même compte que l'ancien check: espace initial + espace final
+        'espaces': lignes(masques['espace_initial']) + lignes(masques['espace_final']),
+        'blancs_speciaux': lignes(masques['blancs_speciaux']),
+        'non_imprimables': lignes(masques['non_imprimables']),
+    }
+
+
+def lignes_en_defaut(s, formats=False):
+    """Masque des lignes dont la valeur a un défaut: hygiène (espaces, blancs spéciaux, non imprimables)
+    ou variante minoritaire de casse, et de format de ticker si `formats`.
+
+    Mêmes lignes que celles comptées par le check strings (variantes ignorées au-delà de LIMITE_DISTINCTES).
+    """
+    codes, uniques = codes_distincts(s)
+    if len(uniques) == 0:
+        return np.zeros(len(s), dtype=bool)
+    uniques = pd.Index(uniques).astype(str)
+    en_defaut = np.zeros(len(uniques), dtype=bool)
+    for masque in _masques_defauts(uniques).values():
+        en_defaut |= masque.to_numpy(zero_copy_only=False)
+    if len(uniques) <= LIMITE_DISTINCTES:
+        comptes = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        par_valeur = dict(zip(uniques, comptes.tolist()))
+        minoritaires = minoritaires_casse(par_valeur).index
+        if formats:
+            minoritaires = minoritaires.append(minoritaires_format(par_valeur).index)
+        en_defaut |= uniques.isin(minoritaires)
+    return (codes >= 0) & en_defaut[codes]
+
+
+def _minoritaires(cles, comptes):
+    # positions qui ne portent pas la variante majoritaire de leur groupe (la première en cas d'égalité)
+    majoritaires = pd.Series(comptes).groupby(np.asarray(cles)).idxmax().to_numpy()
+    return np.setdiff1d(np.arange(len(comptes)), majoritaires)
+
+
+def _par_valeur(comptes_par_valeur):
+    # index texte même pour des valeurs mixtes ou non chaînes (pd.Series({}) aurait un RangeIndex)
+    return pd.Series(list(comptes_par_valeur.values()), dtype=np.int64,
+                     index=pd.Index(list(comptes_par_valeur), dtype=object).astype(str))
+
+
+def _sans_espaces(valeurs):
+    # ' EUR/USD' est compté avec 'EUR/USD' (ses espaces sont un défaut d'hygiène à part):
+    # il ne forme pas une graphie ou un format de plus
+    nettes = valeurs.index.str.strip()
+    return nettes, valeurs.groupby(nettes, sort=False).sum()
+
+
+def minoritaires_casse(comptes_par_valeur):
+    """Valeurs (et leurs comptes) qui ne sont pas la graphie majoritaire de leur texte en majuscules."""
+    valeurs = _par_valeur(comptes_par_valeur)
+    if valeurs.empty:
+        return valeurs
+    nettes, par_nette = _sans_espaces(valeurs)
+    minoritaires = par_nette.index[_minoritaires(par_nette.index.str.upper(), par_nette.to_numpy())]
+    return valeurs[nettes.isin(minoritaires)]
+
+
+def minoritaires_format(comptes_par_valeur):
+    """Valeurs (et leurs comptes) dont la forme n'est pas le format majoritaire de leur ticker."""
+    # EUR/USD, EURUSD.FX, eur-usd -> EURUSD; les purs écarts de casse sont comptés à part
+    valeurs = _par_valeur(comptes_par_valeur)
+    if valeurs.empty:
+        return valeurs
+    formes = _sans_espaces(valeurs)[0].str.upper()
+    par_forme = valeurs.groupby(formes).sum()
+    cles = par_forme.index.str.replace(r'\.[A-Z]+$', '', regex=True).str.replace(r'[^0-9A-Z]', '', regex=True)
+    return valeurs[formes.isin(par_forme.index[_minoritaires(cles, par_forme.to_numpy())])]
+
+
+def variantes_casse(comptes_par_valeur):
+    return int(minoritaires_casse(comptes_par_valeur).sum())
+
+
+def variantes_format(comptes_par_valeur):
+    return int(minoritaires_format(comptes_par_valeur).sum())
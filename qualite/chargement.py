@@ -0,0 +1,141 @@
+import os
+
+import pandas as pd
+
+# types attendus pour les colonnes connues d'un blotter de trades
+SCHEMA_TRADES = {
+    'TradeID': 'texte',
+    'Date': 'datetime',
+    'SettlementDate': 'datetime',
+    'CreatedAt': 'datetime',
+    'Instrument': 'texte',
+    'TradeType': 'categorie',
+    'Quantity': 'float',
+    'Price': 'float',
+    'Value': 'float',
+    'Counterparty': 'texte',
+    'Status': 'categorie',
+    'Commission': 'float',
+    'EntryTime': 'texte',
+}
+
+FORMATS = {
+    '.csv': 'csv',
+    '.xlsx': 'excel',
+    '.xls': 'excel',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'arrow',
+    '.arrow': 'arrow',
+    '.ipc': 'arrow',
+}
+
+
+def format_fichier(nom):
+    extension = os.path.splitext(nom)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Format non supporté: {extension}")
+    return FORMATS[extension]
+
+
+def schema_arrow(source, format):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if format == 'parquet':
+        schema = pq.read_schema(source)
+    else:
+        schema = pa.ipc.open_file(source).schema
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return schema
+
+
+def colonnes_requises(checks, colonnes_par_check, schema):
+    """Colonnes à lire pour les checks actifs, ou None s'il faut tout lire."""
+    import pyarrow.types as pat
+
+    requises = []
+    for nom in checks:
+        besoin = colonnes_par_check.get(nom)
+        if besoin == 'doublons':
+            besoin = ['TradeID'] if 'TradeID' in schema.names else None
+        elif besoin == 'numeriques':
+            besoin = [f.name for f in schema if pat.is_integer(f.type) or pat.is_floating(f.type)]
+        elif besoin == 'texte':
+            besoin = [f.name for f in schema if pat.is_string(f.type) or pat.is_large_string(f.type)
+                      or pat.is_dictionary(f.type)]
+        if besoin is None:
+            return None
+        requises += [col for col in besoin if col in schema.names and col not in requises]
+    return [col for col in schema.names if col in requises]
+
+
+def typer(table):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.types as pat
+
+    for i, champ in enumerate(table.schema):
+        cible = SCHEMA_TRADES.get(champ.name)
+        colonne = table.column(i)
+        if cible == 'datetime' and pat.is_string(champ.type):
+            try:
+                colonne = pc.cast(colonne, pa.timestamp('ns'))
+            except pa.ArrowInvalid:
+                # format invalide: on garde le texte pour que check_types le signale
+                continue
+        elif cible == 'categorie' and pat.is_string(champ.type):
+            colonne = colonne.dictionary_encode()
+        elif cible == 'float' and pat.is_integer(champ.type):
+            colonne = pc.cast(colonne, pa.float64())
+        else:
+            continue
+        table = table.set_column(i, champ.name, colonne)
+    return table
+
+
+def charger(source, nom, checks=None, colonnes_par_check=None):
+    """Charge un fichier de trades; Parquet et Arrow sont typés et élagués aux colonnes utiles."""
+    format = format_fichier(nom)
+    if format == 'csv':
+        return pd.read_csv(source)
+    if format == 'excel':
+        return pd.read_excel(source)
+
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    colonnes = None
+    if checks is not None and colonnes_par_check is not None:
+        colonnes = colonnes_requises(checks, colonnes_par_check, schema_arrow(source, format))
+    if format == 'parquet':
+        table = pq.read_table(source, columns=colonnes)
+    else:
+        table = feather.read_table(source, columns=colonnes, memory_map=True)
+    return typer(table).to_pandas()
+
+
+def convertir(source_csv, destination, taille_bloc=1_000_000):
+    """Convertit un CSV en Parquet ou Arrow IPC par blocs, sans le charger en entier."""
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
+    types = {col: pa.string() if cible in ('texte', 'datetime', 'categorie') else pa.float64()
+             for col, cible in SCHEMA_TRADES.items()}
+    lecteur = pacsv.open_csv(source_csv,
+                             read_options=pacsv.ReadOptions(block_size=taille_bloc * 100),
+                             convert_options=pacsv.ConvertOptions(column_types=types,
+                                                                  strings_can_be_null=True))
+    format = format_fichier(destination)
+    if format == 'parquet':
+        ecrivain = pq.ParquetWriter(destination, lecteur.schema)
+    else:
+        ecrivain = pa.ipc.new_file(destination, lecteur.schema)
+    with ecrivain:
+        for lot in lecteur:
+            if format == 'parquet':
+                ecrivain.write_table(pa.Table.from_batches([lot]))
+            else:
+                ecrivain.write_batch(lot)
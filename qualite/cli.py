@@ -0,0 +1,202 @@
+"""Analyse en lot, sans interface: python -m qualite trades/ --seuil 90"""
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from qualite.analyseur import AnalyseurQualite
+from qualite.chargement import FORMATS, charger, format_fichier
+from qualite.flux import analyser_csv
+from qualite.groupes import COLONNES_DATE, PERIODES
+from qualite.instrumentation import Chrono
+from qualite.rapport import ecrire_rapport
+from qualite.regles import PLAN_DEFAUT, charger_regles
+from qualite.tendances import HistoriqueQualite
+
+
+def fichiers(chemins):
+    """Développe répertoires et motifs glob en fichiers de formats supportés, sans doublon."""
+    trouves = []
+    for chemin in chemins:
+        if os.path.isdir(chemin):
+            candidats = sorted(os.path.join(chemin, nom) for nom in os.listdir(chemin))
+        else:
+            candidats = sorted(glob.glob(chemin)) or [chemin]
+        for candidat in candidats:
+            extension = os.path.splitext(candidat)[1].lower()
+            if os.path.isfile(candidat) and extension in FORMATS and candidat not in trouves:
+                trouves.append(candidat)
+    return trouves
+
+
+def analyser_fichier(chemin, checks=None, taille_bloc=None, approximation=False, regles=None, tendances=None,
+                     moteur='pandas'):
+    debut = time.time()
+    if moteur == 'duckdb':
+        # requêtes DuckDB sur le fichier (CSV ou Parquet), sans DataFrame
+        from qualite.requetes import analyser_requetes
+
+        analyseur = analyser_requetes(chemin, checks, regles, tendances)
+    elif taille_bloc and format_fichier(chemin) == 'csv':
+        # gros CSV: lecture par blocs à mémoire bornée
+        analyseur = analyser_csv(chemin, taille_bloc, checks, regles, tendances)
+        analyseur.source = chemin
+    else:
+        with Chrono() as chargement:
+            df = charger(chemin, os.path.basename(chemin), checks, AnalyseurQualite.colonnes_lues(regles))
+            chargement.nb_lignes = len(df)
+        analyseur = AnalyseurQualite(df, checks=checks, source=chemin, approximation=approximation,
+                                     regles=regles, tendances=tendances)
+        analyseur.performances['chargement'] = chargement.mesures
+        analyseur.analyser_tout()
+    if tendances is not None:
+        # même fichier inchangé réanalysé: pas de doublon dans l'historique
+        statut = os.stat(chemin)
+        tendances.enregistrer(analyseur, empreinte=f"{os.path.abspath(chemin)}:{statut.st_size}:"
+                                                   f"{statut.st_mtime_ns}")
+    return analyseur, time.time() - debut
+
+
+def traiter(chemin, sortie, formats, checks=None, taille_bloc=None, memoire=False, approximation=False,
+            regles=None, tendances=None, compression=False, limite=None, par=None, periode='mois', moteur='pandas'):
+    """Analyse un fichier et écrit ses rapports; renvoie sa ligne du résumé global.
+
+    `tendances` est le chemin de l'historique SQLite: chaque worker ouvre sa connexion.
+    """
+    if memoire and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    historique = HistoriqueQualite(tendances) if tendances else None
+    try:
+        analyseur, temps_exec = analyser_fichier(chemin, checks, taille_bloc, approximation, regles, historique,
+                                                 moteur)
+    except Exception as e:
+        return {'fichier': chemin, 'erreur': f"{type(e).__name__}: {e}"}
+    finally:
+        if historique is not None:
+            historique.fermer()
+
+    # extension conservée: a.csv et a.parquet ne s'écrasent pas
+    base = os.path.join(sortie, os.path.basename(chemin))
+    rapports = []
+    for format in formats:
+        # écrit au fil de la génération: pas de copie complète du rapport en mémoire
+        rapports.append(f"{base}.{format}" + (".gz" if compression else ""))
+        ecrire_rapport(analyseur, temps_exec, rapports[-1], format, compression, limite)
+    if par and analyseur.df is not None and par in analyseur.df.columns:
+        # ventilation par groupe: lue dans l'index des violations, sans frame en streaming
+        rapports.append(f"{base}.groupes.csv")
+        analyseur.groupes(par, periode if par in COLONNES_DATE else None).round(3).to_csv(rapports[-1])
+    resume = analyseur.resume()
+    return {
+        'fichier': chemin,
+        'score': resume['score'],
+        'checks_ok': resume['checks_ok'],
+        'total_checks': resume['total_checks'],
+        'nb_lignes': int(resume['nb_lignes']),
+        'temps': round(temps_exec, 3),
+        'echecs': [nom for nom, res in analyseur.resultats.items() if not res['passed']],
+        'rapports': rapports,
+    }
+
+
+def _pool(nb_workers):
+    if 'fork' in mp.get_all_start_methods():
+        return ProcessPoolExecutor(nb_workers, mp_context=mp.get_context('fork'))
+    return ProcessPoolExecutor(nb_workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m qualite',
+                                     description="Analyse qualité d'un lot de fichiers de trades")
+    parser.add_argument('chemins', nargs='+', help="fichiers, répertoires ou motifs glob")
+    parser.add_argument('--sortie', default='rapports', help="répertoire des rapports")
+    parser.add_argument('--format', nargs='+', choices=['json', 'ndjson', 'html'], default=['json'])
+    parser.add_argument('--gzip', action='store_true', help="rapports compressés (.gz)")
+    parser.add_argument('--limite-detail', type=int, default=None,
+                        help="entrées gardées par section de détail (défaut: 50 en HTML, tout en JSON/NDJSON)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seuil', type=float, default=None,
+                        help="code retour 1 si un score est inférieur à ce seuil")
+    parser.add_argument('--checks', nargs='+',
+                        help="checks à exécuter (intégrés ou ajoutés par --regles)")
+    parser.add_argument('--taille-bloc', type=int, default=None,
+                        help="lit les CSV par blocs de N lignes (mémoire bornée)")
+    parser.add_argument('--memoire', action='store_true',
+                        help="relève le pic d'allocation par check (tracemalloc, plus lent)")
+    parser.add_argument('--approx', action='store_true',
+                        help="quantiles et outliers lus dans une esquisse (voir qualite.sketches)")
+    parser.add_argument('--regles', help="règles métier en plus des règles par défaut (JSON ou YAML)")
+    parser.add_argument('--par', metavar='COLONNE',
+                        help="score et violations par groupe de cette colonne (<fichier>.groupes.csv, "
+                             "moteur pandas sans --taille-bloc)")
+    parser.add_argument('--periode', choices=list(PERIODES), default='mois',
+                        help="période des groupes quand --par est une colonne de dates")
+    parser.add_argument('--tendances', metavar='FICHIER.sqlite',
+                        help="enregistre chaque analyse dans cet historique et contrôle la dérive des "
+                             "colonnes numériques")
+    parser.add_argument('--moteur', choices=['pandas', 'duckdb'], default='pandas',
+                        help="duckdb: checks évalués par requêtes sur le CSV ou Parquet, sans le charger "
+                             "(mêmes résultats, demande duckdb)")
+    args = parser.parse_args(argv)
+    regles = PLAN_DEFAUT.etendre(charger_regles(args.regles)) if args.regles else None
+    disponibles = AnalyseurQualite.configuration(None, regles)['checks']
+    inconnus = [nom for nom in args.checks or [] if nom not in disponibles]
+    if inconnus:
+        parser.error(f"checks inconnus: {', '.join(inconnus)} (disponibles: {', '.join(disponibles)})")
+
+    a_traiter = fichiers(args.chemins)
+    if not a_traiter:
+        print("Aucun fichier à analyser", file=sys.stderr)
+        return 2
+    os.makedirs(args.sortie, exist_ok=True)
+
+    debut = time.time()
+    nb_workers = max(1, min(args.workers, len(a_traiter)))
+    if nb_workers == 1:
+        lignes = [traiter(chemin, args.sortie, args.format, args.checks, args.taille_bloc, args.memoire,
+                          args.approx, regles, args.tendances, args.gzip, args.limite_detail, args.par,
+                          args.periode, args.moteur)
+                  for chemin in a_traiter]
+    else:
+        with _pool(nb_workers) as pool:
+            lignes = list(pool.map(traiter, a_traiter, [args.sortie] * len(a_traiter),
+                                   [args.format] * len(a_traiter), [args.checks] * len(a_traiter),
+                                   [args.taille_bloc] * len(a_traiter), [args.memoire] * len(a_traiter),
+                                   [args.approx] * len(a_traiter), [regles] * len(a_traiter),
+                                   [args.tendances] * len(a_traiter), [args.gzip] * len(a_traiter),
+                                   [args.limite_detail] * len(a_traiter), [args.par] * len(a_traiter),
+                                   [args.periode] * len(a_traiter), [args.moteur] * len(a_traiter)))
+
+    scores = [ligne['score'] for ligne in lignes if 'score' in ligne]
+    sous_seuil = [ligne['fichier'] for ligne in lignes
+                  if args.seuil is not None and 'score' in ligne and ligne['score'] < args.seuil]
+    erreurs = [ligne['fichier'] for ligne in lignes if 'erreur' in ligne]
+    synthese = {
+        'nb_fichiers': len(lignes),
+        'score_min': min(scores) if scores else None,
+        'score_moyen': round(sum(scores) / len(scores), 2) if scores else None,
+        'seuil': args.seuil,
+        'sous_seuil': sous_seuil,
+        'erreurs': erreurs,
+        'temps': round(time.time() - debut, 3),
+        'fichiers': lignes,
+    }
+    with open(os.path.join(args.sortie, 'resume.json'), 'w', encoding='utf-8') as f:
+        json.dump(synthese, f, ensure_ascii=False, indent=2)
+
+    for ligne in lignes:
+        if 'erreur' in ligne:
+            print(f"ERREUR  {ligne['fichier']}: {ligne['erreur']}")
+        else:
+            marque = 'KO' if ligne['fichier'] in sous_seuil else 'OK'
+            print(f"{marque:<7} {ligne['fichier']}: score {ligne['score']}% "
+                  f"({ligne['checks_ok']}/{ligne['total_checks']} checks, {ligne['nb_lignes']:,} lignes, "
+                  f"{ligne['temps']:.2f}s)")
+    print(f"{len(lignes)} fichier(s), score min {synthese['score_min']}, "
+          f"moyen {synthese['score_moyen']} -> {os.path.join(args.sortie, 'resume.json')}")
+    return 1 if sous_seuil or erreurs else 0
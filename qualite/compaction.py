@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+FORMATS_DATES = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%H:%M:%S']
+
+
+def memoire(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _format_date(uniques):
+    # un format n'est retenu que si chaque valeur distincte se relit à l'identique
+    for format in FORMATS_DATES:
+        try:
+            dates = pd.to_datetime(uniques, format=format)
+        except (ValueError, TypeError):
+            continue
+        if (dates.strftime(format) == uniques).all():
+            return format
+    return None
+
+
+def _flottant_sans_perte(s):
+    reduit = s.astype(np.float32)
+    return bool(((reduit.astype(np.float64) == s) | s.isna()).all())
+
+
+def compacter(df, seuil_cardinalite=0.5):
+    """Réduit l'empreinte mémoire du frame sans changer le résultat des checks.
+
+    - textes de dates/heures qui se relisent à l'identique -> datetime64
+    - textes de faible cardinalité -> category
+    - float64 représentables exactement en float32 -> float32
+
+    Renvoie le frame compacté et un rapport (mémoire avant/après, conversions).
+    """
+    avant = memoire(df)
+    compact = df.copy()
+    conversions = {}
+    for col in df.columns:
+        s = df[col]
+        if s.dtype == object:
+            non_nuls = s.dropna()
+            if len(non_nuls) == 0 or not all(isinstance(v, str) for v in non_nuls.iloc[:1000]):
+                continue
+            uniques = pd.Index(non_nuls.unique())
+            if not all(isinstance(v, str) for v in uniques):
+                continue
+            format = _format_date(uniques)
+            if format is not None:
+                compact[col] = pd.to_datetime(s, format=format)
+            elif len(uniques) <= seuil_cardinalite * len(s):
+                compact[col] = s.astype('category')
+            else:
+                continue
+        elif s.dtype == np.float64 and _flottant_sans_perte(s):
+            compact[col] = s.astype(np.float32)
+        else:
+            continue
+        conversions[col] = (str(s.dtype), str(compact[col].dtype))
+    rapport = {'avant': avant, 'apres': memoire(compact), 'conversions': conversions}
+    compact.attrs['compaction'] = rapport
+    return compact, rapport
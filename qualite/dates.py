@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from qualite.chaines import codes_distincts
+
+# formats essayés dans l'ordre: à égalité, le premier l'emporte (jour avant mois)
+FORMATS = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S.%f',
+           '%Y-%m-%dT%H:%M:%S.%f', '%Y/%m/%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%d.%m.%Y',
+           '%Y%m%d', '%d/%m/%Y %H:%M:%S', '%m/%d/%Y %H:%M:%S']
+FORMAT_HEURE = '%H:%M:%S'
+TAILLE_ECHANTILLON = 1000
+
+
+def detecter_format(valeurs, formats=FORMATS, taille=TAILLE_ECHANTILLON):
+    """Format qui parse le plus de valeurs d'un échantillon réparti sur `valeurs` (None si aucune)."""
+    valeurs = pd.Index(valeurs)
+    if len(valeurs) > taille:
+        valeurs = valeurs[np.linspace(0, len(valeurs) - 1, taille).astype(np.int64)]
+    meilleur, nb_meilleur = None, 0
+    for format in formats:
+        nb = int(pd.to_datetime(valeurs, format=format, errors='coerce').notna().sum())
+        if nb > nb_meilleur:
+            meilleur, nb_meilleur = format, nb
+            if nb == len(valeurs):
+                break
+    return meilleur
+
+
+def parser_dates(s, format=None):
+    """Parse une colonne de dates: (dates, format, nombre de valeurs non nulles non parsables).
+
+    Chaque valeur distincte est parsée une fois, avec un format explicite (détecté
+    sur un échantillon si `format` est None), puis reportée sur les lignes: les
+    quelques centaines de dates d'un fichier de trades coûtent autant que le
+    factorize de la colonne. Les valeurs non conformes deviennent NaT. Dates à
+    None si aucun format ne convient.
+    """
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s, format, 0
+    codes, uniques = codes_distincts(s)
+    textes = pd.Index(uniques).astype(str)
+    if format is None:
+        format = detecter_format(textes)
+    if format is None and len(textes):
+        return None, None, int((codes >= 0).sum())
+    parsees = pd.to_datetime(textes, format=format or FORMATS[0], errors='coerce').to_numpy()
+    valeurs = np.append(parsees, np.datetime64('NaT', 'ns'))[codes]
+    nb_invalides = int(((codes >= 0) & np.isnat(valeurs)).sum())
+    return pd.Series(valeurs, index=s.index, name=s.name), format, nb_invalides
@@ -0,0 +1,134 @@
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+def empreintes(donnees):
+    # empreinte 64 bits par valeur (Series) ou par ligne complète (DataFrame)
+    return pd.util.hash_pandas_object(donnees, index=False).to_numpy()
+
+
+class IndexEmpreintes:
+    """Ensemble d'empreintes vues, stocké en paquets triés de tailles croissantes."""
+
+    def __init__(self):
+        self.paquets = []
+
+    def __len__(self):
+        return sum(len(p) for p in self.paquets)
+
+    def contient(self, empreintes):
+        trouve = np.zeros(len(empreintes), dtype=bool)
+        for paquet in self.paquets:
+            pos = np.searchsorted(paquet, empreintes)
+            pos[pos == len(paquet)] = 0
+            trouve |= paquet[pos] == empreintes
+        return trouve
+
+    def ajouter(self, empreintes):
+        """Enregistre un bloc et renvoie le nombre de doublons qu'il contient."""
+        uniques = np.unique(empreintes)
+        nouveaux = uniques[~self.contient(uniques)]
+        paquet = nouveaux
+        while self.paquets and len(self.paquets[-1]) <= len(paquet):
+            paquet = np.union1d(self.paquets.pop(), paquet)
+        if len(paquet):
+            self.paquets.append(paquet)
+        return len(empreintes) - len(nouveaux)
+
+
+def premieres_occurrences(donnees):
+    """Position de la première occurrence de chaque ligne (ou valeur) répétée.
+
+    Renvoie (positions des doublons, position de leur première occurrence).
+    """
+    codes, _ = pd.factorize(empreintes(donnees))
+    # factorize numérote dans l'ordre d'apparition: la k-ième première occurrence a le code k
+    premieres = np.flatnonzero(~pd.Series(codes).duplicated().to_numpy())[codes]
+    positions = np.flatnonzero(premieres != np.arange(len(codes)))
+    return positions, premieres[positions]
+
+
+def table_doublons(df, col=None):
+    donnees = df if col is None else df[col]
+    positions, premieres = premieres_occurrences(donnees)
+    table = pd.DataFrame({'ligne': df.index[positions], 'premiere_ligne': df.index[premieres]})
+    if col is not None:
+        table.insert(0, col, df[col].to_numpy()[positions])
+    return table
+
+
+class HistoriqueTradeIDs:
+    """Index SQLite persistant des TradeID déjà vus, avec leur première apparition.
+
+    La clé primaire (B-tree) donne une recherche en O(log n) par identifiant;
+    les lots sont joints via une table temporaire plutôt qu'une requête par ligne.
+    Une connexion partagée par les threads (verrou): la table temporaire d'un lot
+    n'est remplie et jointe que par un appel à la fois.
+    """
+
+    def __init__(self, chemin):
+        import sqlite3
+
+        os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+        self.chemin = chemin
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self._verrou = threading.Lock()
+        self.connexion.execute("""
+            CREATE TABLE IF NOT EXISTS trade_ids (
+                trade_id TEXT PRIMARY KEY,
+                fichier TEXT NOT NULL,
+                ligne INTEGER NOT NULL,
+                vu_le TEXT NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self.connexion.commit()
+
+    def __len__(self):
+        with self._verrou:
+            return self.connexion.execute("SELECT COUNT(*) FROM trade_ids").fetchone()[0]
+
+    def _lot(self, ids):
+        self.connexion.execute("CREATE TEMP TABLE IF NOT EXISTS lot (trade_id TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.connexion.execute("DELETE FROM lot")
+        valeurs = pd.Series(ids).dropna().astype(str).unique()
+        self.connexion.executemany("INSERT INTO lot VALUES (?)", ((v,) for v in valeurs))
+
+    def rechercher(self, ids, fichier=None):
+        """TradeID de `ids` déjà vus dans un autre fichier, avec leur première apparition."""
+        with self._verrou:
+            return self._rechercher(ids, fichier)
+
+    def _rechercher(self, ids, fichier):
+        # appelant sous verrou: DELETE/INSERT du lot puis jointure sans entrelacement
+        self._lot(ids)
+        requete = "SELECT t.trade_id, t.fichier, t.ligne, t.vu_le FROM lot JOIN trade_ids t USING (trade_id)"
+        params = ()
+        if fichier is not None:
+            requete += " WHERE t.fichier != ?"
+            params = (fichier,)
+        return pd.read_sql_query(requete, self.connexion, params=params)
+
+    def nb_connus(self, ids, fichier=None):
+        """Nombre de lignes dont le TradeID a déjà été vu dans un autre fichier."""
+        with self._verrou:
+            connus = self._rechercher(ids, fichier)['trade_id']
+        return int(pd.Series(ids).astype(str).isin(connus).sum())
+
+    def enregistrer(self, ids, fichier):
+        # INSERT OR IGNORE: la première apparition d'un TradeID est conservée
+        serie = pd.Series(ids)
+        premieres = ~serie.duplicated() & serie.notna()
+        lignes = zip(serie[premieres].astype(str), [fichier] * int(premieres.sum()),
+                     (int(i) for i in serie.index[premieres]),
+                     [datetime.now().isoformat(timespec='seconds')] * int(premieres.sum()))
+        with self._verrou:
+            self.connexion.executemany("INSERT OR IGNORE INTO trade_ids VALUES (?, ?, ?, ?)", lignes)
+            self.connexion.commit()
+
+    def fermer(self):
+        with self._verrou:
+            self.connexion.close()
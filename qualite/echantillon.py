@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+from qualite.analyseur import AnalyseurQualite
+from qualite.profil import MESURES, ProfilFige
+
+STRATES = ['Instrument', 'Date']
+Z = {0.90: 1.645, 0.95: 1.96, 0.99: 2.576}
+
+
+def codes_strates(df, colonnes=STRATES):
+    """Code de strate par ligne: croisement des colonnes, les dates regroupées par mois."""
+    codes = np.zeros(len(df), dtype=np.int64)
+    for col in colonnes:
+        if col not in df.columns:
+            continue
+        valeurs, uniques = pd.factorize(df[col])
+        if col == 'Date':
+            # quelques centaines de dates distinctes: on ne parse que celles-là
+            mois = pd.to_datetime(pd.Index(uniques), errors='coerce').to_period('M')
+            par_unique, mois_uniques = pd.factorize(mois)
+            valeurs = np.where(valeurs >= 0, par_unique[valeurs], -1)
+            uniques = mois_uniques
+        codes = codes * (len(uniques) + 1) + valeurs + 1
+    return pd.factorize(codes)[0]
+
+
+def echantillon_stratifie(df, taille, colonnes=STRATES, graine=0):
+    """Échantillon à allocation proportionnelle: chaque strate garde la même fraction.
+
+    Les arrondis sont tirés au sort (floor + Bernoulli sur le reste), donc chaque
+    ligne a la même probabilité d'inclusion taille / len(df).
+    """
+    if taille >= len(df):
+        return df
+    rng = np.random.default_rng(graine)
+    codes = codes_strates(df, colonnes)
+    fraction = taille / len(df)
+    tailles = np.bincount(codes)
+    cibles = np.floor(tailles * fraction)
+    cibles += rng.random(len(tailles)) < tailles * fraction - cibles
+    # tri par strate puis ordre aléatoire dans la strate: on garde les `cible` premières
+    ordre = np.argsort(codes + rng.random(len(codes)), kind='stable')
+    debuts = np.r_[0, np.cumsum(tailles)[:-1]]
+    rangs = np.arange(len(ordre)) - debuts[codes[ordre]]
+    return df.iloc[np.sort(ordre[rangs < cibles[codes[ordre]]])]
+
+
+def intervalle(x, n, nb_lignes, z=1.96):
+    """Extrapolation d'un comptage x observé sur n lignes tirées parmi nb_lignes.
+
+    Intervalle de Wilson sur la proportion, avec correction de population finie;
+    la stratification proportionnelle ne fait que réduire la variance, l'intervalle
+    est donc conservateur. Au-delà d'une occurrence par ligne (espaces en début et
+    fin), approximation de Poisson.
+    """
+    if n >= nb_lignes:
+        return x, x, x
+    p = x / n
+    fpc = np.sqrt((nb_lignes - n) / (nb_lignes - 1))
+    if p > 1:
+        demi = z * np.sqrt(x) * fpc
+        bas, haut = (x - demi) / n, (x + demi) / n
+    else:
+        denominateur = 1 + z ** 2 / n
+        centre = (p + z ** 2 / (2 * n)) / denominateur
+        demi = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominateur * fpc
+        bas, haut = max(0.0, centre - demi), min(1.0, centre + demi)
+    estimation = p * nb_lignes
+    return (int(round(estimation)), int(np.floor(min(bas * nb_lignes, estimation))),
+            int(np.ceil(max(haut * nb_lignes, estimation))))
+
+
+class EstimationEchantillon:
+    """Résultat d'un scan rapide: analyse sur mesures extrapolées et fourchette de score."""
+
+    def __init__(self, taille, nb_lignes, estimations, analyseur, score_bas, score_haut):
+        self.taille = taille
+        self.nb_lignes = nb_lignes
+        self.estimations = estimations
+        self.analyseur = analyseur
+        self.score_bas = score_bas
+        self.score_haut = score_haut
+
+    @property
+    def exact(self):
+        return self.taille >= self.nb_lignes
+
+    def tableau(self):
+        lignes = [{'mesure': cle[0], 'arguments': ', '.join(map(str, cle[1:])),
+                   'estimation': est, 'bas': bas, 'haut': haut}
+                  for cle, (est, bas, haut) in self.estimations.items() if haut > 0]
+        return pd.DataFrame(lignes, columns=['mesure', 'arguments', 'estimation', 'bas', 'haut'])
+
+
+def _extrapoler(mesures, n, nb_lignes, z):
+    # mesure -> (estimation, bas, haut); les autres mesures sont reprises telles quelles
+    estimations = {}
+    for cle, valeur in mesures.items():
+        nom = cle[0]
+        if valeur is None or isinstance(valeur, (bool, np.bool_)):
+            continue
+        if nom == 'nb_duplicats':
+            # une paire n'est vue que si ses deux lignes sont tirées: probabilité f²
+            # (intervalle de Poisson sur le nombre de paires vues, borné par le nombre de lignes)
+            f2 = (n / nb_lignes) ** 2
+            demi = z * np.sqrt(valeur)
+            estimations[cle] = (min(int(round(valeur / f2)), nb_lignes - 1),
+                                int(max(0.0, valeur - demi) / f2),
+                                min(int(np.ceil((valeur + demi + z ** 2) / f2)), nb_lignes - 1))
+        elif (MESURES.get(nom) == 'somme' and nom != 'nb_lignes') or nom == 'nb_hors_bornes':
+            estimations[cle] = intervalle(int(valeur), n, nb_lignes, z)
+    return estimations
+
+
+def _profil(mesures, estimations, position, nb_lignes, facteur):
+    valeurs = dict(mesures)
+    valeurs[('nb_lignes',)] = nb_lignes
+    for cle, bornes in estimations.items():
+        # un défaut absent de l'échantillon reste à zéro: sa borne haute n'apparaît que dans le tableau
+        valeurs[cle] = bornes[position] if bornes[0] else 0
+    for cle, valeur in mesures.items():
+        if MESURES.get(cle[0]) == 'comptes' and valeur is not None:
+            # comptes entiers, comme ceux d'un profil exact (variantes, doublons de valeurs)
+            valeurs[cle] = {v: int(round(n * facteur)) for v, n in valeur.items()}
+    return ProfilFige(valeurs)
+
+
+def estimer(df, taille=50_000, checks=None, niveau=0.95, graine=0, colonnes=STRATES, regles=None):
+    """Analyse un échantillon stratifié et extrapole les comptages au frame entier.
+
+    Renvoie une EstimationEchantillon; à taille >= len(df) l'analyse est exacte.
+    La fourchette de score rejoue les checks aux bornes basses puis hautes des
+    comptages observés dans l'échantillon.
+    """
+    echantillon = echantillon_stratifie(df, taille, colonnes, graine)
+    n, nb_lignes = len(echantillon), len(df)
+    analyse = AnalyseurQualite(echantillon, checks=checks, regles=regles)
+    analyse.analyser_tout()
+    if n >= nb_lignes:
+        return EstimationEchantillon(n, nb_lignes, {}, analyse, analyse.score_qualite(), analyse.score_qualite())
+
+    mesures = analyse.profil.mesures
+    estimations = _extrapoler(mesures, n, nb_lignes, Z.get(niveau, 1.96))
+    analyseurs = []
+    for position in range(3):
+        analyseur = AnalyseurQualite(profil=_profil(mesures, estimations, position, nb_lignes, nb_lignes / n),
+                                     checks=checks, regles=regles)
+        analyseur.analyser_tout()
+        analyseurs.append(analyseur)
+    estimation = analyseurs[0]
+    estimation.performances = analyse.performances
+    scores = [a.score_qualite() for a in analyseurs]
+    return EstimationEchantillon(n, nb_lignes, estimations, estimation, min(scores), max(scores))
+
+
+def affiner(df, taille=50_000, facteur=4, **options):
+    """Estimations successives sur des échantillons de plus en plus grands, jusqu'à l'exact."""
+    while taille < len(df):
+        yield estimer(df, taille, **options)
+        taille *= facteur
+    yield estimer(df, len(df), **options)
@@ -0,0 +1,113 @@
+import math
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from qualite.profil import MESURES, ProfilColonnes, fusionner
+
+EXECUTIONS = ['serie', 'threads', 'processus']
+
+# checks sur le frame complet regroupés par primitives partagées (Date parsée une fois par groupe)
+GROUPES = [
+    ['types', 'dates', 'fraicheur', 'timestamps'],
+    ['doublons'],
+    ['outliers'],
+    ['distribution'],
+    ['valeurs_manquantes', 'integrite', 'completude'],
+]
+
+LIGNES_MIN_PARTITION = 50_000
+
+# frame hérité par les workers (fork) ou reçu par l'initializer (forkserver, spawn);
+# remis à None dans le parent une fois le pool fermé
+_df_worker = None
+
+
+def _initialiser(df):
+    global _df_worker
+    _df_worker = df
+
+
+def _mesures(df, checks, debut=None, fin=None, approximation=False, regles=None):
+    from qualite.analyseur import AnalyseurQualite
+
+    if df is None:
+        df = _df_worker
+    if debut is not None:
+        df = df.iloc[debut:fin]
+    profil = ProfilColonnes(df, approximation)
+    analyseur = AnalyseurQualite(profil=profil, regles=regles)
+    for nom in checks:
+        analyseur.executer_check(nom)
+    return profil.mesures
+
+
+def methode_demarrage():
+    """fork si le processus n'a qu'un thread (CLI, benchmark), sinon forkserver ou spawn.
+
+    Forker un processus multi-thread (service d'analyses, connexions SQLite, serveur
+    Streamlit) peut copier un verrou tenu par un autre thread et bloquer le worker.
+    """
+    methodes = mp.get_all_start_methods()
+    if 'fork' in methodes and threading.active_count() == 1:
+        return 'fork'
+    return 'forkserver' if 'forkserver' in methodes else 'spawn'
+
+
+def _pool(execution, nb_workers, df):
+    if execution == 'threads':
+        return ThreadPoolExecutor(nb_workers)
+    methode = methode_demarrage()
+    if methode == 'fork':
+        _initialiser(df)
+        return ProcessPoolExecutor(nb_workers, mp_context=mp.get_context('fork'))
+    return ProcessPoolExecutor(nb_workers, mp_context=mp.get_context(methode), initializer=_initialiser,
+                               initargs=(df,))
+
+
+def partitions(nb_lignes, nb_workers):
+    nb = max(1, min(nb_workers, math.ceil(nb_lignes / LIGNES_MIN_PARTITION)))
+    taille = math.ceil(nb_lignes / nb) if nb_lignes else 0
+    return [(i, min(i + taille, nb_lignes)) for i in range(0, nb_lignes, taille or 1)]
+
+
+def precalculer(analyseur, execution, nb_workers=None):
+    """Calcule en parallèle les mesures de tous les checks et les injecte dans le profil.
+
+    Les checks partitionnables par lignes sont évalués par blocs puis fusionnés
+    (sommes exactes); les autres tournent par groupe sur le frame complet.
+    Les checks eux-mêmes sont ensuite rejoués en série sur le cache rempli.
+    """
+    if execution not in EXECUTIONS:
+        raise ValueError(f"Exécution inconnue: {execution}")
+    df = analyseur.df
+    nb_workers = nb_workers or os.cpu_count() or 1
+    partitionnables = [nom for nom in analyseur.checks if nom in analyseur.checks_partitionnables]
+    groupes = [[nom for nom in groupe if nom in analyseur.checks] for groupe in GROUPES]
+    groupes = [groupe for groupe in groupes if groupe]
+    # en mode processus le frame n'est pas re-sérialisé à chaque tâche
+    source = df if execution == 'threads' else None
+
+    try:
+        with _pool(execution, nb_workers, df) as pool:
+            futurs_blocs = [pool.submit(_mesures, source, partitionnables, debut, fin, regles=analyseur.regles)
+                            for debut, fin in partitions(len(df), nb_workers)] if partitionnables else []
+            futurs_groupes = [pool.submit(_mesures, source, groupe, approximation=analyseur.profil.approximation,
+                                          regles=analyseur.regles)
+                              for groupe in groupes]
+
+            fusion = {}
+            for futur in futurs_blocs:
+                for cle, valeur in futur.result().items():
+                    if MESURES[cle[0]] is None:
+                        continue
+                    fusion[cle] = fusionner(MESURES[cle[0]], fusion[cle], valeur) if cle in fusion else valeur
+            for futur in futurs_groupes:
+                fusion.update(futur.result())
+    finally:
+        # fork: le parent ne doit pas garder le dernier frame analysé
+        _initialiser(None)
+
+    for cle, valeur in fusion.items():
+        analyseur.profil.mesures.setdefault(cle, valeur)
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+from qualite.analyseur import AnalyseurQualite
+from qualite.chaines import codes_distincts
+from qualite.dates import detecter_format
+from qualite.doublons import IndexEmpreintes, empreintes
+from qualite.instrumentation import Chrono
+from qualite.profil import MESURES, ProfilColonnes, ProfilFige, fusionner
+from qualite.sketches import EsquisseNumerique
+from qualite.tendances import NIVEAUX
+
+# lignes du début du fichier sur lesquelles le format de chaque colonne de dates est détecté
+TAILLE_ECHANTILLON = 10_000
+
+
+class _ProfilBloc(ProfilColonnes):
+    # Profil d'un bloc: les mesures non fusionnables alimentent les états du flux
+    # au lieu d'être calculées sur le bloc seul.
+
+    def __init__(self, df, flux):
+        super().__init__(df)
+        self.flux = flux
+
+    def dates_parsees(self, col, format=None):
+        # format détecté une fois pour le fichier: chaque bloc est lu pareil, quelle que soit sa taille
+        s = self.df[col]
+        if format is None and not pd.api.types.is_datetime64_any_dtype(s):
+            format = self.flux.format_date(col, s)
+            if format is None and s.notna().any():
+                # aucun format ne convient à la colonne: comme en mémoire, pas de dates
+                return self._memo(('dates', col, None), lambda: (None, None, int(s.notna().sum())))
+        return super().dates_parsees(col, format)
+
+    def nb_duplicats(self, col):
+        self.flux.ajouter_empreintes(col, empreintes(self.df if col is None else self.df[col]))
+        return 0
+
+    def alimenter(self):
+        # une passe sur toutes les colonnes numériques du bloc, au premier check qui en a besoin
+        self._memo(('esquisse',), lambda: self.flux.esquisse.ajouter(self.df, self.colonnes_numeriques()))
+
+    def quantiles(self, col):
+        self.alimenter()
+        return np.nan, np.nan
+
+    def nb_hors_bornes(self, col, lower, upper):
+        return 0
+
+    def asymetrie(self, col):
+        self.alimenter()
+        return 0.0
+
+
+class ProfilFlux(ProfilFige):
+    """Profil construit bloc par bloc, à mémoire bornée.
+
+    Les comptages sont exacts. Les quantiles (et donc les outliers IQR) viennent
+    d'histogrammes logarithmiques et sont approximatifs (voir HistogrammeLog);
+    l'asymétrie vient de moments fusionnés. Le format des colonnes de dates est
+    détecté une fois, sur `echantillon` (début du fichier, voir alimenter), puis
+    imposé à tous les blocs: une valeur non conforme est comptée non parsable.
+    """
+
+    def __init__(self, precision=0.001, regles=None):
+        super().__init__()
+        self.regles = regles
+        self.esquisse = EsquisseNumerique(precision)
+        self.index_doublons = {}
+        self.doublons = {}
+        self.nb_approximations = 0
+        self.formats_dates = {}
+        self.echantillon = None
+
+    def format_date(self, col, valeurs):
+        """Format des dates de `col`: décidé sur l'échantillon, sinon sur le premier bloc non vide."""
+        if col not in self.formats_dates:
+            if self.echantillon is not None and col in self.echantillon.columns \
+                    and self.echantillon[col].notna().any():
+                valeurs = self.echantillon[col]
+            _, uniques = codes_distincts(valeurs)
+            if len(uniques) == 0:
+                return None
+            self.formats_dates[col] = detecter_format(pd.Index(uniques).astype(str))
+        return self.formats_dates[col]
+
+    def ajouter(self, bloc):
+        profil = _ProfilBloc(bloc, self)
+        AnalyseurQualite(profil=profil, regles=self.regles).analyser_tout()
+        for cle, valeur in profil.mesures.items():
+            if cle in self.mesures:
+                valeur = fusionner(MESURES[cle[0]], self.mesures[cle], valeur)
+            self.mesures[cle] = valeur
+
+    def ajouter_empreintes(self, col, valeurs):
+        index = self.index_doublons.setdefault(col, IndexEmpreintes())
+        self.doublons[col] = self.doublons.get(col, 0) + index.ajouter(valeurs)
+
+    def nb_duplicats(self, col):
+        return self.doublons.get(col, 0)
+
+    def quantiles(self, col):
+        self.nb_approximations += 1
+        q1, q3 = self.esquisse.histogrammes[col].quantile([0.25, 0.75])
+        return q1, q3
+
+    def nb_hors_bornes(self, col, lower, upper):
+        self.nb_approximations += 1
+        return self.esquisse.histogrammes[col].nb_hors(lower, upper)
+
+    def asymetrie(self, col):
+        return self.esquisse.moments[col].asymetrie()
+
+    def histogramme(self, col, nb_classes=50):
+        return self.esquisse.histogrammes[col].classes(nb_classes)
+
+    def repartition(self, col):
+        histogramme = self.esquisse.histogrammes.get(col)
+        return histogramme.quantile(NIVEAUX) if histogramme is not None and histogramme.total else None
+
+
+def alimenter(profil, lecteur):
+    """Ajoute au profil les blocs de `lecteur`; renvoie le nombre de lignes lues.
+
+    Les premiers blocs sont gardés jusqu'à TAILLE_ECHANTILLON lignes, le temps de
+    détecter les formats de dates sur cet échantillon.
+    """
+    lecteur = iter(lecteur)
+    premiers = []
+    for bloc in lecteur:
+        premiers.append(bloc)
+        if sum(len(b) for b in premiers) >= TAILLE_ECHANTILLON:
+            break
+    if premiers:
+        profil.echantillon = pd.concat(premiers) if len(premiers) > 1 else premiers[0]
+    nb_lignes = 0
+    try:
+        while premiers:
+            bloc = premiers.pop(0)
+            profil.ajouter(bloc)
+            nb_lignes += len(bloc)
+        profil.echantillon = None
+        for bloc in lecteur:
+            profil.ajouter(bloc)
+            nb_lignes += len(bloc)
+    finally:
+        profil.echantillon = None
+    return nb_lignes
+
+
+def analyser_csv(source, taille_bloc=500_000, checks=None, regles=None, tendances=None, **options):
+    profil = ProfilFlux(regles=regles)
+    # en flux le chargement inclut les mesures faites bloc par bloc
+    with Chrono() as chargement:
+        alimenter(profil, pd.read_csv(source, chunksize=taille_bloc, **options))
+        chargement.nb_lignes = profil.nb_lignes()
+    analyseur = AnalyseurQualite(profil=profil, checks=checks, regles=regles, tendances=tendances,
+                                 source=source if isinstance(source, str) else None)
+    analyseur.performances['chargement'] = chargement.mesures
+    analyseur.analyser_tout()
+    return analyseur
@@ -0,0 +1,91 @@
+"""Ventilation des violations et du score par groupe (contrepartie, instrument, période).
+
+Une seule passe pour tous les groupes: chaque entrée de l'index des violations
+(qualite.violations) est comptée par groupe avec un bincount sur les codes de
+groupe de ses lignes. Le coût suit le nombre de lignes en violation, pas le
+nombre de groupes; aucun check n'est relancé sur une tranche du frame.
+"""
+import numpy as np
+import pandas as pd
+
+from qualite.chaines import codes_distincts
+from qualite.regles import PENALITES, SEVERITES
+
+# colonnes regroupées par période plutôt que par valeur
+COLONNES_DATE = ('Date', 'SettlementDate', 'CreatedAt')
+PERIODES = {'jour': 'D', 'semaine': 'W', 'mois': 'M'}
+# checks qui jugent des colonnes entières: rien à ventiler par ligne
+NON_VENTILES = ('distribution', 'fraicheur', 'completude', 'derive')
+# seuils de check_valeurs_manquantes et check_outliers, rapportés aux lignes du groupe:
+# check -> (sévérité au-delà du seuil, part des lignes, sévérité en deçà)
+SEUILS = {'valeurs_manquantes': ('CRITICAL', 0.1, 'WARNING'), 'outliers': ('WARNING', 0.05, 'INFO')}
+VIDE = '(vide)'
+
+
+def codes_groupes(analyseur, colonne, periode=None):
+    """(code de groupe par ligne, libellés) pour les valeurs d'une colonne ou, avec `periode`, ses dates."""
+    profil = analyseur.profil_lignes()
+    if periode is not None:
+        dates = profil.dates(colonne)
+        if dates is None:
+            raise ValueError(f"Colonne sans dates lisibles: {colonne}")
+        codes, uniques = pd.factorize(dates.dt.to_period(PERIODES[periode]), sort=True)
+        libelles = pd.Index(uniques).astype(str)
+    else:
+        codes, uniques = codes_distincts(analyseur.df[colonne])
+        libelles = pd.Index(uniques).astype(str)
+    codes = np.asarray(codes, dtype=np.int64)
+    if (codes < 0).any():
+        # valeurs nulles ou dates non parsables: un groupe à part
+        codes = np.where(codes < 0, len(libelles), codes)
+        libelles = libelles.append(pd.Index([VIDE]))
+    return codes, libelles
+
+
+def _rangs(analyseur, nom, resultat, comptes, lignes):
+    # sévérité de chaque groupe: 0 = OK, sinon 1 + rang dans SEVERITES
+    rangs = np.zeros(len(lignes), dtype=np.int64)
+    if not comptes:
+        return rangs
+    if nom in SEUILS:
+        haute, part, basse = SEUILS[nom]
+        total = sum(comptes.values())
+        return np.where(total > lignes * part, SEVERITES.index(haute) + 1,
+                        np.where(total > 0, SEVERITES.index(basse) + 1, 0))
+    # check déclaratif: la plus haute sévérité des règles violées dans le groupe
+    severites = {regle.nom: regle.severite for regle in analyseur.regles.par_check.get(nom, [])}
+    for element, n in comptes.items():
+        rang = SEVERITES.index(severites.get(element, resultat['severity'])) + 1
+        rangs = np.maximum(rangs, np.where(n > 0, rang, 0))
+    return rangs
+
+
+def ventiler(analyseur, colonne, periode=None):
+    """Table des groupes: lignes, score et, par check ventilé, % des lignes du groupe en violation.
+
+    Le score d'un groupe suit score_qualite(): la pénalité d'un check s'applique au
+    groupe s'il y a des lignes en violation, avec les seuils du check rapportés à
+    ses lignes. Les bornes des outliers et les doublons restent ceux du fichier
+    entier. Les checks de NON_VENTILES, et les échecs sans ligne à lister (variantes
+    de casse d'une colonne texte), n'entrent pas dans le score des groupes.
+    """
+    codes, libelles = codes_groupes(analyseur, colonne, periode)
+    nb_groupes = len(libelles)
+    lignes = np.bincount(codes, minlength=nb_groupes)
+    index = analyseur.violations()
+    penalites = np.r_[0, [PENALITES[severite] for severite in SEVERITES]]
+    score = np.full(nb_groupes, 100)
+    parts = {}
+    for nom, resultat in analyseur.resultats.items():
+        if nom in NON_VENTILES:
+            continue
+        cles = index.cles(nom)
+        comptes = {element: np.bincount(codes[index.entrees[(nom, element)].positions()], minlength=nb_groupes)
+                   for _, element in cles}
+        en_violation = np.bincount(codes[index.lignes(cles)], minlength=nb_groupes)
+        parts[nom] = 100 * en_violation / np.maximum(lignes, 1)
+        score -= penalites[_rangs(analyseur, nom, resultat, comptes, lignes)]
+    table = pd.DataFrame(parts, index=pd.Index(libelles, name=colonne))
+    table.insert(0, 'score', np.maximum(score, 0))
+    table.insert(0, 'lignes', lignes)
+    return table
@@ -0,0 +1,127 @@
+import hashlib
+import io
+import os
+import pickle
+
+import pandas as pd
+
+from qualite.analyseur import AnalyseurQualite
+from qualite.flux import ProfilFlux, alimenter
+from qualite.instrumentation import Chrono
+from qualite.regles import PLAN_DEFAUT
+
+TAILLE_LECTURE = 16 * 1024**2
+# à incrémenter quand le contenu du profil persisté change: l'ancien état est alors ignoré
+VERSION_ETAT = 5
+
+
+class EtatIncremental:
+    """État persisté entre deux passes sur un fichier qui ne fait que grandir."""
+
+    version = 1
+
+    def __init__(self, colonnes, profil, taille, empreinte, fin_de_ligne):
+        self.version = VERSION_ETAT
+        self.colonnes = colonnes
+        self.profil = profil
+        self.taille = taille
+        self.empreinte = empreinte
+        self.fin_de_ligne = fin_de_ligne
+
+
+def charger_etat(chemin):
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, 'rb') as f:
+        return pickle.load(f)
+
+
+def sauver_etat(etat, chemin):
+    os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+    temporaire = chemin + '.tmp'
+    with open(temporaire, 'wb') as f:
+        pickle.dump(etat, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporaire, chemin)
+
+
+class _LectureBornee(io.RawIOBase):
+    """Lecture de `f` arrêtée à l'octet `fin`: les lignes ajoutées pendant l'analyse attendent l'incrément suivant."""
+
+    def __init__(self, f, fin):
+        self.f = f
+        self.fin = fin
+
+    def readable(self):
+        return True
+
+    def readinto(self, tampon):
+        donnees = self.f.read(max(0, min(len(tampon), self.fin - self.f.tell())))
+        tampon[:len(donnees)] = donnees
+        return len(donnees)
+
+
+def _hacher(f, nb_octets, h):
+    while nb_octets > 0:
+        bloc = f.read(min(TAILLE_LECTURE, nb_octets))
+        if not bloc:
+            break
+        h.update(bloc)
+        nb_octets -= len(bloc)
+    return h
+
+
+def _empreinte_regles(regles):
+    return (regles if regles is not None else PLAN_DEFAUT).empreinte
+
+
+def analyser_increment(source, etat=None, taille_bloc=500_000, regles=None):
+    """Analyse un CSV en ajout seul en repartant de l'état de la passe précédente.
+
+    Si les `etat.taille` premiers octets sont inchangés, seules les lignes ajoutées
+    sont lues et fusionnées dans le profil; sinon (ou si les règles ont changé) le
+    fichier est réanalysé en entier.
+    Renvoie (analyseur, nouvel état, nombre de lignes lues, mode) avec mode parmi
+    'increment', 'inchange' et 'complet'.
+    """
+    f = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    try:
+        taille = f.seek(0, os.SEEK_END)
+        f.seek(0)
+        h = hashlib.blake2b(digest_size=16)
+        mode = 'complet'
+        if (etat is not None and etat.version == VERSION_ETAT and etat.fin_de_ligne and taille >= etat.taille
+                and _empreinte_regles(etat.profil.regles) == _empreinte_regles(regles)):
+            _hacher(f, etat.taille, h)
+            if h.hexdigest() == etat.empreinte:
+                mode = 'increment' if taille > etat.taille else 'inchange'
+
+        if mode == 'complet':
+            f.seek(0)
+            h = hashlib.blake2b(digest_size=16)
+            profil = ProfilFlux(regles=regles)
+            debut = 0
+            lecteur = pd.read_csv(io.BufferedReader(_LectureBornee(f, taille)), chunksize=taille_bloc)
+        else:
+            profil = etat.profil
+            debut = etat.taille
+            lecteur = [] if mode == 'inchange' else pd.read_csv(io.BufferedReader(_LectureBornee(f, taille)),
+                                                                header=None, names=etat.colonnes,
+                                                                chunksize=taille_bloc)
+        with Chrono() as chargement:
+            # un incrément garde les formats de dates de l'état: les lignes ajoutées sont lues pareil
+            nb_lignes = alimenter(profil, lecteur)
+            chargement.nb_lignes = nb_lignes
+
+        f.seek(debut)
+        _hacher(f, taille - debut, h)
+        f.seek(max(taille - 1, 0))
+        fin_de_ligne = f.read(1) in (b'\n', b'')
+    finally:
+        if f is not source:
+            f.close()
+
+    nouvel_etat = EtatIncremental(profil.colonnes(), profil, taille, h.hexdigest(), fin_de_ligne)
+    analyseur = AnalyseurQualite(profil=profil, regles=regles)
+    analyseur.performances['chargement'] = chargement.mesures
+    analyseur.analyser_tout()
+    return analyseur, nouvel_etat, nb_lignes, mode
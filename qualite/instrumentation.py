@@ -0,0 +1,107 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+
+
+# horloge CPU -> fonction de lecture
+HORLOGES = {'processus': time.process_time, 'thread': time.thread_time}
+# un profilage à la fois: tracemalloc (démarrage, arrêt, pic) est global au processus
+_VERROU_PROFILAGE = threading.Lock()
+
+
+class Chrono:
+    """Temps mur, temps CPU et pic d'allocation d'un bloc de code.
+
+    `horloge` 'processus' compte le CPU de tous les threads du processus: c'est la
+    bonne mesure d'une phase qui délègue à un pool ou à un moteur multi-thread
+    (pyarrow, DuckDB), mais elle inclut les autres analyses qui tournent en même
+    temps dans le service. 'thread' ne compte que le thread qui exécute le bloc.
+
+    Le pic mémoire n'est relevé que si tracemalloc est actif à l'entrée du bloc (il
+    ralentit tout le reste); sinon `memoire_mb` vaut None. Le pic de tracemalloc est
+    global au processus: la mesure n'a de sens que si une seule analyse tourne à la
+    fois, ce que garantit le profilage de l'application (exécuté à part, sous verrou).
+    """
+
+    def __init__(self, nb_lignes=None, horloge='processus'):
+        self.nb_lignes = nb_lignes
+        self.horloge = horloge
+        self.mesures = {}
+
+    def __enter__(self):
+        # tracemalloc peut démarrer ou s'arrêter pendant le bloc (profilage lancé par une autre session)
+        self._trace = tracemalloc.is_tracing()
+        self._base = 0
+        if self._trace:
+            self._base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._debut = time.perf_counter()
+        self._cpu = HORLOGES[self.horloge]()
+        return self
+
+    def __exit__(self, *exc):
+        temps = time.perf_counter() - self._debut
+        self.mesures = {
+            'temps': temps,
+            'cpu': HORLOGES[self.horloge]() - self._cpu,
+            'horloge_cpu': self.horloge,
+            'memoire_mb': (tracemalloc.get_traced_memory()[1] - self._base) / 1024**2
+                          if self._trace and tracemalloc.is_tracing() else None,
+            'lignes_s': self.nb_lignes / temps if self.nb_lignes and temps > 0 else None,
+        }
+        return False
+
+
+def tableau(performances):
+    """Une ligne par phase, pour affichage ou export.
+
+    Sans tracemalloc, la colonne du pic mémoire (vide) n'y figure pas.
+    """
+    import pandas as pd
+
+    table = pd.DataFrame.from_dict(performances, orient='index').reindex(
+        columns=['temps', 'cpu', 'horloge_cpu', 'memoire_mb', 'lignes_s'])
+    # mesures antérieures à horloge_cpu: toujours le CPU du processus
+    table['horloge_cpu'] = table['horloge_cpu'].fillna('processus')
+    if table['memoire_mb'].isna().all():
+        table = table.drop(columns='memoire_mb')
+    return table
+
+
+def profiler(fonction, nb_lignes_stats=40):
+    """Exécute `fonction` sous cProfile et tracemalloc.
+
+    Renvoie (résultat, rapport texte, statistiques cProfile au format .prof).
+    Les profilages de sessions différentes s'exécutent l'un après l'autre.
+    """
+    with _VERROU_PROFILAGE:
+        deja_actif = tracemalloc.is_tracing()
+        if not deja_actif:
+            tracemalloc.start(10)
+        profileur = cProfile.Profile()
+        try:
+            resultat = profileur.runcall(fonction)
+            instantane = tracemalloc.take_snapshot()
+        finally:
+            if not deja_actif:
+                tracemalloc.stop()
+
+    texte = io.StringIO()
+    texte.write("== cProfile (temps cumulé) ==\n")
+    pstats.Stats(profileur, stream=texte).sort_stats('cumulative').print_stats(nb_lignes_stats)
+    texte.write("\n== tracemalloc (mémoire encore allouée, par ligne) ==\n")
+    for stat in instantane.statistics('lineno')[:nb_lignes_stats]:
+        texte.write(f"{stat}\n")
+
+    profileur.create_stats()
+    return resultat, texte.getvalue(), _octets_stats(profileur)
+
+
+def _octets_stats(profileur):
+    # pstats n'écrit que dans un fichier: même format marshal, lisible par snakeviz
+    import marshal
+
+    return marshal.dumps(profileur.stats)
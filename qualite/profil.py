@@ -0,0 +1,271 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+from qualite import chaines, regles
+from qualite.dates import parser_dates
+from qualite.doublons import empreintes
+from qualite.sketches import EsquisseNumerique
+from qualite.tendances import NIVEAUX
+
+# nom de mesure -> règle de fusion entre blocs de lignes (None = non fusionnable)
+MESURES = {}
+NEUTRES = {'somme': 0, 'ou': False}
+
+
+def mesure(fusion):
+    def decorer(methode):
+        @functools.wraps(methode)
+        def enveloppe(self, *args):
+            cle = (methode.__name__,) + args
+            if cle not in self.mesures:
+                self.mesures[cle] = methode(self, *args)
+            if methode.__name__ in self.mesures_approchees:
+                # compté même quand la mesure vient d'un précalcul
+                self.nb_approximations += 1
+            return self.mesures[cle]
+        enveloppe.fusion = fusion
+        MESURES[methode.__name__] = fusion
+        return enveloppe
+    return decorer
+
+
+def fusionner(fusion, a, b):
+    if fusion == 'somme':
+        # None = parsing impossible sur au moins un bloc
+        if a is None or b is None:
+            return None
+        return a + b
+    if fusion == 'ou':
+        return bool(a or b)
+    if fusion == 'max':
+        if a is None or b is None:
+            return None
+        if pd.isna(a):
+            return b
+        if pd.isna(b):
+            return a
+        return max(a, b)
+    if fusion == 'premier':
+        return a
+    if fusion == 'union':
+        return a + [c for c in b if c not in a]
+    if fusion == 'intersection':
+        return [c for c in a if c in b]
+    if fusion == 'comptes':
+        # None = trop de valeurs distinctes pour être suivies
+        if a is None or b is None:
+            return None
+        comptes = dict(a)
+        for valeur, n in b.items():
+            comptes[valeur] = comptes.get(valeur, 0) + n
+        return comptes if len(comptes) <= chaines.LIMITE_DISTINCTES else None
+    raise ValueError(f"Fusion inconnue: {fusion}")
+
+
+class ProfilBase:
+    """Interface commune des profils lus par AnalyseurQualite."""
+
+    # incrémenté à chaque mesure servie par une approximation
+    nb_approximations = 0
+    mesures_approchees = ()
+    # temps CPU d'un check (qualite.instrumentation.HORLOGES): calculé sur le thread qui l'exécute
+    horloge_cpu = 'thread'
+
+    def na_par_colonne(self):
+        return {col: self.nb_na(col) for col in self.colonnes()}
+
+    def nb_valides(self, col):
+        return self.nb_lignes() - self.nb_na(col)
+
+    def nb_variantes_casse(self, col):
+        comptes = self.comptes_distincts(col)
+        return 0 if comptes is None else chaines.variantes_casse(comptes)
+
+    def nb_variantes_format(self, col):
+        comptes = self.comptes_distincts(col)
+        return 0 if comptes is None else chaines.variantes_format(comptes)
+
+    def _memo(self, cle, calcul):
+        # calculs intermédiaires (hors mesures) gardés dans self._cache
+        if cle not in self._cache:
+            self._cache[cle] = calcul()
+        return self._cache[cle]
+
+    def histogramme(self, col, nb_classes=50):
+        # (comptes, bords) pour les graphiques; None si le profil n'a plus les valeurs
+        return None
+
+    def repartition(self, col):
+        # centiles (tendances.NIVEAUX) pour l'historique et la dérive; None sans les valeurs
+        return None
+
+
+class ProfilColonnes(ProfilBase):
+    """Primitives par colonne calculées une seule fois et partagées par les checks.
+
+    Avec `approximation=True`, quantiles et outliers sont lus dans une esquisse de
+    toutes les colonnes numériques, faite en une passe (bornes d'erreur: voir
+    HistogrammeLog).
+    """
+
+    def __init__(self, df, approximation=False, precision=0.001):
+        self.df = df
+        self.mesures = {}
+        self._cache = {}
+        self.approximation = approximation
+        self.precision = precision
+        if approximation:
+            self.mesures_approchees = ('quantiles', 'nb_hors_bornes')
+
+    @mesure('somme')
+    def nb_lignes(self):
+        return len(self.df)
+
+    @mesure('premier')
+    def colonnes(self):
+        return list(self.df.columns)
+
+    @mesure('intersection')
+    def colonnes_numeriques(self):
+        return list(self.df.select_dtypes(include=[np.number]).columns)
+
+    @mesure('union')
+    def colonnes_texte(self):
+        return list(self.df.select_dtypes(include=['object', 'category']).columns)
+
+    def flottants(self, col):
+        # calculs en float64 même sur un frame compacté en float32
+        s = self.df[col]
+        if s.dtype == np.float32:
+            return self._memo(('flottants', col), lambda: s.astype(np.float64))
+        return s
+
+    def masque_na(self, col):
+        return self._memo(('masque_na', col), lambda: self.df[col].isna())
+
+    @mesure('somme')
+    def nb_na(self, col):
+        return self.masque_na(col).sum()
+
+    @mesure(None)
+    def nb_duplicats(self, col):
+        if col is None:
+            # empreintes 64 bits: bien plus rapide que df.duplicated() sur un frame large
+            return pd.Series(empreintes(self.df)).duplicated().sum()
+        return self.df[col].duplicated().sum()
+
+    def dates_parsees(self, col, format=None):
+        # (dates, format, nb non parsables): une seule analyse par colonne, partagée par les checks
+        return self._memo(('dates', col, format), lambda: parser_dates(self.df[col], format))
+
+    def dates(self, col, format=None):
+        # None si aucun format ne convient à la colonne
+        return self.dates_parsees(col, format)[0]
+
+    @mesure('somme')
+    def nb_dates_invalides(self, col, format):
+        return self.dates_parsees(col, format)[2]
+
+    @mesure('somme')
+    def nb_dates_inversees(self, debut, fin):
+        dates, fins = self.dates(debut), self.dates(fin)
+        if dates is None or fins is None:
+            return None
+        return (fins < dates).sum()
+
+    @mesure('max')
+    def date_max(self, col):
+        dates = self.dates(col)
+        return None if dates is None else dates.max()
+
+    def histogramme(self, col, nb_classes=50):
+        # agrégé côté serveur: le graphique reçoit nb_classes barres, pas les lignes
+        def calcul():
+            x = self.flottants(col).to_numpy(dtype=float)
+            return np.histogram(x[np.isfinite(x)], bins=nb_classes)
+        return self._memo(('histogramme', col, nb_classes), calcul)
+
+    def repartition(self, col):
+        def calcul():
+            x = self.flottants(col).to_numpy(dtype=float)
+            x = x[np.isfinite(x)]
+            return np.quantile(x, NIVEAUX) if len(x) else None
+        return self._memo(('repartition', col), calcul)
+
+    def esquisse(self):
+        def calcul():
+            esquisse = EsquisseNumerique(self.precision)
+            esquisse.ajouter(self.df, self.colonnes_numeriques())
+            return esquisse
+        return self._memo(('esquisse',), calcul)
+
+    @mesure(None)
+    def quantiles(self, col):
+        if self.approximation:
+            q1, q3 = self.esquisse().histogrammes[col].quantile([0.25, 0.75])
+            return q1, q3
+        q = self.flottants(col).quantile([0.25, 0.75])
+        return q.iloc[0], q.iloc[1]
+
+    @mesure(None)
+    def nb_hors_bornes(self, col, lower, upper):
+        if self.approximation:
+            return self.esquisse().histogrammes[col].nb_hors(lower, upper)
+        s = self.df[col]
+        return ((s < lower) | (s > upper)).sum()
+
+    @mesure(None)
+    def asymetrie(self, col):
+        if self.approximation:
+            return self.esquisse().moments[col].asymetrie()
+        return self.flottants(col).skew()
+
+    def passe_regles(self, passe):
+        # toutes les règles d'un groupe (même colonne, même paire...) en une évaluation
+        return self._memo(('regles', passe), lambda: regles.evaluer(self, passe))
+
+    @mesure('somme')
+    def nb_violations(self, regle, passe):
+        return self.passe_regles(passe)[regle]
+
+    def distinctes(self, col):
+        return self._memo(('distinctes', col), lambda: chaines.distinctes(self.df[col]))
+
+    def defauts_texte(self, col):
+        # chaque défaut est évalué une fois par valeur distincte puis pondéré
+        return self._memo(('defauts_texte', col), lambda: chaines.defauts(*self.distinctes(col)))
+
+    @mesure('somme')
+    def nb_espaces(self, col):
+        return self.defauts_texte(col)['espaces']
+
+    @mesure('somme')
+    def nb_blancs_speciaux(self, col):
+        return self.defauts_texte(col)['blancs_speciaux']
+
+    @mesure('somme')
+    def nb_non_imprimables(self, col):
+        return self.defauts_texte(col)['non_imprimables']
+
+    @mesure('comptes')
+    def comptes_distincts(self, col):
+        uniques, comptes = self.distinctes(col)
+        if len(uniques) > chaines.LIMITE_DISTINCTES:
+            return None
+        return dict(zip(uniques, comptes.tolist()))
+
+
+class ProfilFige(ProfilBase):
+    """Profil réduit à des mesures déjà calculées: sans frame, sérialisable."""
+
+    def __init__(self, mesures=None):
+        self.mesures = dict(mesures or {})
+
+    def _lire(self, nom, *args):
+        return self.mesures.get((nom,) + args, NEUTRES.get(MESURES[nom]))
+
+
+for _nom in MESURES:
+    setattr(ProfilFige, _nom, lambda self, *args, _nom=_nom: self._lire(_nom, *args))
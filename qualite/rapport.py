@@ -0,0 +1,310 @@
+"""Rapports HTML, JSON et NDJSON écrits bloc par bloc.
+
+Chaque format est un générateur de fragments de texte: le rapport n'est jamais
+assemblé en une seule chaîne avant l'écriture, et les sections de détail (un
+dictionnaire par colonne, règle ou paire de colonnes) sont tronquées à `limite`
+entrées dans le HTML. Les graphiques sont tracés à partir des classes déjà
+agrégées dans le profil: leur taille ne dépend pas du nombre de lignes.
+"""
+import gzip
+import html
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+# entrées affichées par section de détail du rapport HTML (le NDJSON garde tout)
+LIMITE_DETAIL = 50
+# colonnes numériques tracées et barres par distribution
+NB_DISTRIBUTIONS = 12
+NB_CLASSES = 30
+# fragments regroupés avant écriture
+TAILLE_TAMPON = 64 * 1024
+
+ENTETE_HTML = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Rapport Qualité Données</title>
+    <style>
+        body {{ font-family: Arial; margin: 20px; background: #f5f5f5; }}
+        .header {{ background: #2c3e50; color: white; padding: 20px; border-radius: 5px; }}
+        .summary {{ background: #ecf0f1; padding: 15px; margin: 20px 0; border-radius: 5px; }}
+        .check {{ background: white; padding: 15px; margin: 10px 0; border-left: 4px solid #3498db; }}
+        .passed {{ border-left-color: #27ae60; }}
+        .failed {{ border-left-color: #e74c3c; }}
+        .tronque {{ color: #7f8c8d; font-style: italic; }}
+        .barre {{ background: #3498db; height: 12px; }}
+        table {{ border-collapse: collapse; background: white; }}
+        th, td {{ padding: 4px 12px; text-align: right; border-bottom: 1px solid #ecf0f1; }}
+        td:first-child, th:first-child {{ text-align: left; }}
+        svg {{ background: white; margin: 4px; }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>Rapport Qualité Données</h1>
+        <p>Généré: {timestamp}</p>
+        {fichier}
+    </div>
+
+    <div class="summary">
+        <h2>Résumé</h2>
+        <p><strong>Score:</strong> {score}%</p>
+        <p><strong>Lignes:</strong> {nb_lignes:,}</p>
+        <p><strong>Checks OK:</strong> {checks_ok}/{total_checks}</p>
+        <p><strong>Temps:</strong> {temps:.2f}s</p>
+    </div>
+
+    <h2>Checks Détaillés</h2>
+"""
+
+CHECK_HTML = """
+    <div class="check {classe}">
+        <h3>{titre} [{severite}]</h3>
+        <p><strong>Status:</strong> {statut}</p>
+"""
+
+TRONQUE_HTML = '<p class="tronque">… {nb:,} entrée(s) de plus sur {total:,} (rapport NDJSON pour le détail complet)</p>\n'
+
+PIED_HTML = "</body>\n</html>\n"
+
+
+def _serialisable(valeur):
+    # types numpy/pandas présents dans les résultats des checks
+    if isinstance(valeur, np.integer):
+        return int(valeur)
+    if isinstance(valeur, np.floating):
+        return float(valeur)
+    if isinstance(valeur, np.bool_):
+        return bool(valeur)
+    if isinstance(valeur, (pd.Timestamp, np.datetime64)):
+        return str(valeur)
+    if isinstance(valeur, (set, tuple, np.ndarray)):
+        return list(valeur)
+    return str(valeur)
+
+
+def _texte(valeur, limite=10):
+    # valeur d'une cellule: dictionnaires et listes imbriqués sur une ligne, tronqués
+    if isinstance(valeur, dict):
+        elements = [f"{k}: {_texte(v)}" for k, v in list(valeur.items())[:limite]]
+        return ", ".join(elements) + (", …" if len(valeur) > limite else "")
+    if isinstance(valeur, (list, tuple, set, np.ndarray)):
+        valeurs = list(valeur)
+        return ", ".join(_texte(v) for v in valeurs[:limite]) + (", …" if len(valeurs) > limite else "")
+    if isinstance(valeur, (float, np.floating)):
+        return f"{valeur:,.4g}"
+    if isinstance(valeur, (int, np.integer)) and not isinstance(valeur, (bool, np.bool_)):
+        return f"{valeur:,}"
+    return str(valeur)
+
+
+def _champ_html(nom, valeur, limite):
+    nom = html.escape(str(nom))
+    if isinstance(valeur, dict) and valeur:
+        yield f"<table><tr><th>{nom}</th><th></th></tr>\n"
+        for i, (element, v) in enumerate(valeur.items()):
+            if limite is not None and i == limite:
+                yield "</table>\n"
+                yield TRONQUE_HTML.format(nb=len(valeur) - limite, total=len(valeur))
+                return
+            yield f"<tr><td>{html.escape(str(element))}</td><td>{html.escape(_texte(v))}</td></tr>\n"
+        yield "</table>\n"
+    elif isinstance(valeur, (list, tuple, set)) and len(valeur) > (limite or len(valeur)):
+        valeurs = list(valeur)
+        yield f"<p><strong>{nom}:</strong> {html.escape(_texte(valeurs, limite))}</p>\n"
+        yield TRONQUE_HTML.format(nb=len(valeurs) - limite, total=len(valeurs))
+    else:
+        vide = isinstance(valeur, (dict, list, tuple, set)) and not valeur
+        yield f"<p><strong>{nom}:</strong> {'aucun' if vide else html.escape(_texte(valeur))}</p>\n"
+
+
+def _histogramme_svg(titre, comptes, largeur=320, hauteur=90):
+    maximum = max(int(np.max(comptes)), 1) if len(comptes) else 1
+    pas = largeur / max(len(comptes), 1)
+    barres = "".join(
+        f'<rect x="{i * pas:.1f}" y="{hauteur - h:.1f}" width="{max(pas - 1, 1):.1f}" height="{h:.1f}" fill="#3498db"/>'
+        for i, h in enumerate(np.asarray(comptes) / maximum * (hauteur - 14)))
+    return (f'<svg width="{largeur}" height="{hauteur}" role="img"><title>{html.escape(titre)}</title>'
+            f'<text x="4" y="11" font-size="11">{html.escape(titre)}</text>{barres}</svg>\n')
+
+
+def _graphiques_html(analyseur, limite):
+    # uniquement des agrégats du profil: nombre de colonnes x NB_CLASSES valeurs
+    profil = analyseur.profil_lignes() if analyseur.df is not None else analyseur.profil
+    nb_lignes = max(int(analyseur.profil.nb_lignes()), 1)
+    na = {col: int(n) for col, n in analyseur.profil.na_par_colonne().items() if n}
+    if na:
+        yield "<h2>Valeurs manquantes par colonne</h2>\n<table><tr><th>Colonne</th><th>%</th><th></th></tr>\n"
+        for i, (col, n) in enumerate(sorted(na.items(), key=lambda e: -e[1])):
+            if limite is not None and i == limite:
+                yield "</table>\n"
+                yield TRONQUE_HTML.format(nb=len(na) - limite, total=len(na))
+                break
+            pct = 100 * n / nb_lignes
+            yield (f"<tr><td>{html.escape(str(col))}</td><td>{pct:.2f}</td>"
+                   f'<td><div class="barre" style="width: {max(pct, 0.5) * 2:.0f}px"></div></td></tr>\n')
+        else:
+            yield "</table>\n"
+    graphiques = []
+    for col in analyseur.profil.colonnes_numeriques()[:NB_DISTRIBUTIONS]:
+        classes = profil.histogramme(col, NB_CLASSES)
+        if classes is not None:
+            comptes, bords = classes
+            graphiques.append(_histogramme_svg(f"{col} [{_texte(bords[0])} ; {_texte(bords[-1])}]", comptes))
+    if graphiques:
+        yield "<h2>Distributions</h2>\n<div>\n"
+        yield from graphiques
+        yield "</div>\n"
+
+
+def fragments_html(analyseur, temps_exec, limite=LIMITE_DETAIL):
+    """Rapport HTML fragment par fragment; sections de détail tronquées à `limite` entrées."""
+    resume = analyseur.resume()
+    fichier = f"<p>Fichier: {html.escape(str(analyseur.source))}</p>" if analyseur.source else ""
+    yield ENTETE_HTML.format(fichier=fichier, temps=temps_exec, **resume)
+
+    if resume['approximatif']:
+        yield (f"<p><em>Valeurs approximatives (esquisses de quantiles): "
+               f"{html.escape(', '.join(resume['approximatif']))}</em></p>\n")
+
+    for nom, res in analyseur.resultats.items():
+        titre = nom.replace('_', ' ').title()
+        if nom in analyseur.approximatifs:
+            titre += " (approx.)"
+        yield CHECK_HTML.format(classe='passed' if res['passed'] else 'failed', titre=html.escape(titre),
+                                severite=res.get('severity', 'OK'),
+                                statut='PASSED ✓' if res['passed'] else 'FAILED ✗')
+        for k, v in res.items():
+            if k not in ('passed', 'severity'):
+                yield from _champ_html(k, v, limite)
+        yield "    </div>\n"
+
+    yield from _graphiques_html(analyseur, limite)
+
+    if analyseur.performances:
+        # pic mémoire relevé seulement sous tracemalloc: colonne omise sinon
+        avec_memoire = any(mesures['memoire_mb'] is not None for mesures in analyseur.performances.values())
+        yield ("<h2>Performances</h2>\n<table><tr><th>Phase</th><th>Temps (s)</th><th>CPU (s)</th>"
+               "<th>CPU de</th>" + ("<th>Pic mémoire (MB)</th>" if avec_memoire else "") + "<th>Lignes/s</th></tr>\n")
+        for phase, mesures in analyseur.performances.items():
+            memoire = f"{mesures['memoire_mb']:.1f}" if mesures['memoire_mb'] is not None else "-"
+            debit = f"{mesures['lignes_s']:,.0f}" if mesures['lignes_s'] is not None else "-"
+            yield (f"<tr><td>{html.escape(str(phase))}</td><td>{mesures['temps']:.3f}</td>"
+                   f"<td>{mesures['cpu']:.3f}</td><td>{mesures.get('horloge_cpu', 'processus')}</td>"
+                   + (f"<td>{memoire}</td>" if avec_memoire else "") + f"<td>{debit}</td></tr>\n")
+        yield "</table>\n"
+
+    yield PIED_HTML
+
+
+def _tronquer(resultats, limite):
+    # copie des résultats avec les dictionnaires et listes réduits à `limite` entrées
+    tronques, totaux = {}, {}
+    for nom, res in resultats.items():
+        tronques[nom] = dict(res)
+        for k, v in res.items():
+            if isinstance(v, (dict, list, tuple)) and len(v) > limite:
+                tronques[nom][k] = dict(list(v.items())[:limite]) if isinstance(v, dict) else list(v)[:limite]
+                totaux.setdefault(nom, {})[k] = len(v)
+    return tronques, totaux
+
+
+def fragments_json(analyseur, temps_exec, limite=None):
+    """Rapport JSON fragment par fragment; avec `limite`, les entrées tronquées sont comptées dans 'tronques'."""
+    resultats, totaux = (analyseur.resultats, {}) if limite is None else _tronquer(analyseur.resultats, limite)
+    contenu = {
+        'fichier': analyseur.source,
+        **analyseur.resume(),
+        'temps': round(temps_exec, 3),
+        'resultats': resultats,
+        'performances': analyseur.performances,
+    }
+    if totaux:
+        contenu['tronques'] = totaux
+    encodeur = json.JSONEncoder(default=_serialisable, ensure_ascii=False, indent=2)
+    return encodeur.iterencode(contenu)
+
+
+def fragments_ndjson(analyseur, temps_exec, limite=None):
+    """Une ligne JSON par enregistrement: résumé, check, entrée de détail, phase de performance.
+
+    Chaque entrée des dictionnaires de détail est une ligne `detail`: le fichier se lit
+    en flux (jq, pandas.read_json(lines=True)) quelle que soit sa taille.
+    """
+    encodeur = json.JSONEncoder(default=_serialisable, ensure_ascii=False)
+    yield encodeur.encode({'type': 'resume', 'fichier': analyseur.source, **analyseur.resume(),
+                           'temps': round(temps_exec, 3)}) + "\n"
+    for nom, res in analyseur.resultats.items():
+        scalaires = {k: v for k, v in res.items() if not isinstance(v, (dict, list, tuple))}
+        yield encodeur.encode({'type': 'check', 'nom': nom, **scalaires}) + "\n"
+        for champ, v in res.items():
+            if isinstance(v, dict):
+                entrees = v.items()
+            elif isinstance(v, (list, tuple)):
+                entrees = ((i, element) for i, element in enumerate(v))
+            else:
+                continue
+            for i, (element, valeur) in enumerate(entrees):
+                if limite is not None and i == limite:
+                    break
+                yield encodeur.encode({'type': 'detail', 'check': nom, 'champ': champ, 'element': element,
+                                       'valeur': valeur}) + "\n"
+    for phase, mesures in analyseur.performances.items():
+        yield encodeur.encode({'type': 'performance', 'phase': phase, **mesures}) + "\n"
+
+
+FORMATS_RAPPORT = {'html': fragments_html, 'json': fragments_json, 'ndjson': fragments_ndjson}
+# le HTML est lu par des humains: tronqué par défaut; les formats machine sont complets
+LIMITES_DEFAUT = {'html': LIMITE_DETAIL, 'json': None, 'ndjson': None}
+TYPES_MIME = {'html': 'text/html', 'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+
+
+def _par_blocs(fragments, taille=TAILLE_TAMPON):
+    # regroupe les petits fragments (iterencode en produit un par jeton) avant l'encodage
+    tampon, longueur = [], 0
+    for fragment in fragments:
+        tampon.append(fragment)
+        longueur += len(fragment)
+        if longueur >= taille:
+            yield "".join(tampon)
+            tampon, longueur = [], 0
+    if tampon:
+        yield "".join(tampon)
+
+
+def ecrire_rapport(analyseur, temps_exec, destination, format='html', compression=False, limite=None):
+    """Écrit le rapport au fil de sa génération dans un chemin ou un fichier binaire ouvert.
+
+    `limite`: entrées gardées par section de détail (LIMITES_DEFAUT selon le format
+    si None). `compression` écrit du gzip.
+    """
+    limite = LIMITES_DEFAUT[format] if limite is None else limite
+    fragments = FORMATS_RAPPORT[format](analyseur, temps_exec, limite)
+    sortie = open(destination, 'wb') if isinstance(destination, str) else destination
+    try:
+        flux = gzip.GzipFile(fileobj=sortie, mode='wb', mtime=0) if compression else sortie
+        for bloc in _par_blocs(fragments):
+            flux.write(bloc.encode('utf-8'))
+        if compression:
+            flux.close()
+    finally:
+        if sortie is not destination:
+            sortie.close()
+
+
+def rapport_octets(analyseur, temps_exec, format='html', compression=False, limite=None):
+    """Rapport complet en octets (téléchargement depuis l'application)."""
+    tampon = io.BytesIO()
+    ecrire_rapport(analyseur, temps_exec, tampon, format, compression, limite)
+    return tampon.getvalue()
+
+
+def rapport_html(analyseur, temps_exec, limite=LIMITE_DETAIL):
+    return "".join(fragments_html(analyseur, temps_exec, limite))
+
+
+def rapport_json(analyseur, temps_exec, limite=None):
+    return "".join(fragments_json(analyseur, temps_exec, limite))
@@ -0,0 +1,331 @@
+"""Règles métier déclaratives (JSON ou YAML) et leur évaluation groupée.
+
+Une règle est un dict:
+
+    {"nom": "Commission", "check": "ranges", "type": "intervalle", "colonne": "Commission",
+     "min": 0, "max": 1, "severite": "CRITICAL", "message": "{n} hors range"}
+
+Types:
+- intervalle: `colonne`, `min` et/ou `max` (valeurs strictement hors bornes);
+- valeurs: `colonne`, `autorisees` (hors liste, valeurs nulles comprises) ou `interdites`;
+- comparaison: `gauche`, `operateur` (< <= > >= == !=), `droite`, `dates` (bool);
+  les lignes où un côté est nul ne sont pas comptées;
+- identite: `resultat`, `facteurs`, `operation` (produit ou somme), `tolerance`
+  (écart relatif |r - f| / (|f| + 1) au-delà duquel la ligne est en écart);
+- non_nul: `colonne`;
+- colonnes_requises: `colonnes` (schéma, aucune lecture de données).
+
+Le plan regroupe les règles qui lisent les mêmes colonnes (toutes les bornes et
+valeurs numériques d'une colonne, tous les opérateurs d'une paire de colonnes,
+toutes les tolérances d'une identité): chaque groupe est évalué en une passe,
+quel que soit le nombre de règles qu'il contient.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from qualite import chaines
+
+SEVERITES = ['INFO', 'WARNING', 'CRITICAL']
+# points retirés du score qualité par check en échec, selon sa sévérité
+PENALITES = {'INFO': 1, 'WARNING': 5, 'CRITICAL': 15}
+OPERATEURS = ['<', '<=', '>', '>=', '==', '!=']
+# type -> champs obligatoires
+TYPES = {
+    'intervalle': ['colonne'],
+    'valeurs': ['colonne'],
+    'comparaison': ['gauche', 'operateur', 'droite'],
+    'identite': ['resultat', 'facteurs'],
+    'non_nul': ['colonne'],
+    'colonnes_requises': ['colonnes'],
+}
+# au-delà de ce nombre de seuils sur une colonne, une recherche dichotomique par ligne
+# (O(n log k)) bat k comparaisons vectorisées: ~35 seuils sur 2M lignes
+SEUILS_DIRECTS = 32
+
+FICHIER_DEFAUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'regles_defaut.json')
+
+
+class Regle:
+    """Règle validée: `cle` identifie son évaluation, `groupe` la passe qui la calcule."""
+
+    def __init__(self, definition):
+        manquants = [champ for champ in ['nom', 'type'] + TYPES.get(definition.get('type'), [])
+                     if champ not in definition]
+        if definition.get('type') not in TYPES:
+            raise ValueError(f"Règle {definition.get('nom')!r}: type inconnu {definition.get('type')!r}")
+        if manquants:
+            raise ValueError(f"Règle {definition['nom']!r}: champs manquants {manquants}")
+        self.nom = definition['nom']
+        self.type = definition['type']
+        self.check = definition.get('check', 'regles')
+        self.severite = definition.get('severite', 'WARNING')
+        if self.severite not in SEVERITES:
+            raise ValueError(f"Règle {self.nom!r}: sévérité inconnue {self.severite!r}")
+        self.message = definition.get('message')
+        self.cle, self.groupe, self.colonnes = self._compiler(definition)
+
+    def _compiler(self, d):
+        if self.type == 'intervalle':
+            if d.get('min') is None and d.get('max') is None:
+                raise ValueError(f"Règle {self.nom!r}: min ou max requis")
+            bornes = (_nombre(d.get('min')), _nombre(d.get('max')))
+            return ('intervalle', d['colonne']) + bornes, ('seuils', d['colonne']), [d['colonne']]
+        if self.type == 'valeurs':
+            if ('autorisees' in d) == ('interdites' in d):
+                raise ValueError(f"Règle {self.nom!r}: autorisees ou interdites (un seul des deux)")
+            mode = 'autorisees' if 'autorisees' in d else 'interdites'
+            valeurs = tuple(d[mode])
+            # valeurs numériques: mêmes seuils que les intervalles de la colonne
+            famille = 'seuils' if all(_est_nombre(v) for v in valeurs) else 'ensemble'
+            if famille == 'seuils':
+                valeurs = tuple(float(v) for v in valeurs)
+            else:
+                valeurs = tuple(str(v) for v in valeurs)
+            return (mode, d['colonne'], valeurs), (famille, d['colonne']), [d['colonne']]
+        if self.type == 'comparaison':
+            if d['operateur'] not in OPERATEURS:
+                raise ValueError(f"Règle {self.nom!r}: opérateur inconnu {d['operateur']!r}")
+            dates = bool(d.get('dates', False))
+            return (('comparaison', d['gauche'], d['operateur'], d['droite'], dates),
+                    ('comparaison', d['gauche'], d['droite'], dates), [d['gauche'], d['droite']])
+        if self.type == 'identite':
+            operation = d.get('operation', 'produit')
+            if operation not in ('produit', 'somme'):
+                raise ValueError(f"Règle {self.nom!r}: opération inconnue {operation!r}")
+            facteurs = tuple(d['facteurs'])
+            groupe = ('identite', d['resultat'], operation, facteurs)
+            return groupe + (float(d.get('tolerance', 0.01)),), groupe, [d['resultat'], *facteurs]
+        if self.type == 'non_nul':
+            return None, None, [d['colonne']]
+        return None, None, list(d['colonnes'])
+
+
+def _est_nombre(v):
+    return isinstance(v, (int, float, np.number)) and not isinstance(v, bool)
+
+
+def _nombre(v):
+    return None if v is None else float(v)
+
+
+class Plan:
+    """Règles compilées, regroupées par check et par passe."""
+
+    def __init__(self, definitions):
+        self.definitions = list(definitions)
+        self.regles = [Regle(d) for d in self.definitions]
+        groupes = {}
+        for regle in self.regles:
+            if regle.groupe is not None and regle.cle not in groupes.setdefault(regle.groupe, []):
+                groupes[regle.groupe].append(regle.cle)
+        # passe = (groupe, clés de toutes ses règles): argument de la mesure nb_violations
+        self.passes = {groupe: (groupe, tuple(cles)) for groupe, cles in groupes.items()}
+        self.par_check = {}
+        for regle in self.regles:
+            self.par_check.setdefault(regle.check, []).append(regle)
+        self.empreinte = hashlib.blake2b(json.dumps(self.definitions, sort_keys=True, default=str).encode(),
+                                         digest_size=8).hexdigest()
+
+    def checks(self):
+        return list(self.par_check)
+
+    def etendre(self, autre):
+        """Plan complété par les règles d'`autre`; une règle de même check et même nom est remplacée."""
+        remplacees = {(regle.check, regle.nom) for regle in autre.regles}
+        gardees = [d for d, regle in zip(self.definitions, self.regles) if (regle.check, regle.nom) not in remplacees]
+        return Plan(gardees + autre.definitions)
+
+    def passe(self, regle):
+        return self.passes.get(regle.groupe)
+
+    def colonnes_par_check(self):
+        """Colonnes lues par chaque check (None si le schéma complet est nécessaire)."""
+        colonnes = {}
+        for nom, regles in self.par_check.items():
+            if any(regle.type == 'colonnes_requises' for regle in regles):
+                colonnes[nom] = None
+            else:
+                colonnes[nom] = list(dict.fromkeys(col for regle in regles for col in regle.colonnes))
+        return colonnes
+
+
+def charger_regles(source):
+    """Plan depuis un chemin ou un fichier ouvert (.json, .yaml/.yml), ou une liste de définitions."""
+    if isinstance(source, (list, tuple)):
+        return Plan(source)
+    nom = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding='utf-8') as f:
+            texte = f.read()
+    else:
+        texte = source.read()
+        if isinstance(texte, bytes):
+            texte = texte.decode('utf-8')
+    if str(nom).lower().endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Les règles YAML demandent PyYAML (pip install pyyaml)")
+        contenu = yaml.safe_load(texte)
+    else:
+        contenu = json.loads(texte)
+    # liste de règles, ou {"regles": [...]}
+    if isinstance(contenu, dict):
+        contenu = contenu.get('regles', [])
+    return Plan(contenu)
+
+
+def evaluer(profil, passe):
+    """Nombre de lignes en violation pour chaque règle d'une passe (clé -> compte)."""
+    groupe, cles = passe
+    famille = groupe[0]
+    if famille == 'seuils':
+        return _seuils(profil.flottants(groupe[1]).to_numpy(dtype=float), profil.masque_na(groupe[1]).sum(), cles)
+    if famille == 'ensemble':
+        return _ensemble(profil, groupe[1], cles)
+    if famille == 'comparaison':
+        return _comparaison(profil, groupe, cles)
+    return _identite(profil, groupe, cles)
+
+
+def _comptes_seuils(x, seuils):
+    # (x < t, x > t) pour chaque seuil t, sur des valeurs sans NaN
+    t = np.asarray(seuils, dtype=float)
+    if len(t) <= SEUILS_DIRECTS:
+        return (np.array([(x < s).sum() for s in t], dtype=np.int64),
+                np.array([(x > s).sum() for s in t], dtype=np.int64))
+    # une recherche par côté, en O(n log k): x < t[j] <=> #(t <= x) <= j
+    inferieurs = np.cumsum(np.bincount(np.searchsorted(t, x, 'right'), minlength=len(t) + 1))[:len(t)]
+    superieurs = len(x) - np.cumsum(np.bincount(np.searchsorted(t, x, 'left'), minlength=len(t) + 1))[:len(t)]
+    return inferieurs, superieurs
+
+
+def _seuils(x, nb_na, cles):
+    valides = x[~np.isnan(x)]
+    seuils = sorted({v for cle in cles for v in (cle[2:] if cle[0] == 'intervalle' else cle[2]) if v is not None})
+    inferieurs, superieurs = _comptes_seuils(valides, seuils)
+    rang = {s: i for i, s in enumerate(seuils)}
+
+    def egaux(v):
+        i = rang[v]
+        return len(valides) - inferieurs[i] - superieurs[i]
+
+    resultats = {}
+    for cle in cles:
+        if cle[0] == 'intervalle':
+            bas, haut = cle[2], cle[3]
+            resultats[cle] = int((inferieurs[rang[bas]] if bas is not None else 0)
+                                 + (superieurs[rang[haut]] if haut is not None else 0))
+        elif cle[0] == 'interdites':
+            resultats[cle] = int(sum(egaux(v) for v in set(cle[2])))
+        else:
+            resultats[cle] = int(len(valides) - sum(egaux(v) for v in set(cle[2])) + nb_na)
+    return resultats
+
+
+def _dans_liste(uniques, valeurs):
+    # valeurs distinctes comparées en texte, comme les listes des règles (et CAST AS VARCHAR en DuckDB)
+    return pd.Index(uniques).astype(str).isin(valeurs)
+
+
+def _ensemble(profil, col, cles):
+    # une passe de hachage sur la colonne, puis chaque liste testée sur les valeurs distinctes
+    uniques, comptes = profil.distinctes(col)
+    nb_na = int(profil.masque_na(col).sum())
+    resultats = {}
+    for cle in cles:
+        dans_liste = int(comptes[_dans_liste(uniques, cle[2])].sum())
+        resultats[cle] = dans_liste if cle[0] == 'interdites' else int(comptes.sum()) - dans_liste + nb_na
+    return resultats
+
+
+def _comparaison(profil, groupe, cles):
+    _, gauche, droite, dates = groupe
+    if dates:
+        g, d = profil.dates(gauche), profil.dates(droite)
+        if g is None or d is None:
+            # parsing impossible: pas de comptage, comme check_dates
+            return {cle: None for cle in cles}
+    else:
+        g, d = profil.flottants(gauche), profil.flottants(droite)
+    inferieurs = int((g < d).sum())
+    superieurs = int((g > d).sum())
+    egaux = int((g.notna() & d.notna()).sum()) - inferieurs - superieurs
+    return comptes_comparaison(inferieurs, superieurs, egaux, cles)
+
+
+def comptes_comparaison(inferieurs, superieurs, egaux, cles):
+    """Violations de chaque règle de comparaison, à partir des lignes où gauche <, > ou == droite."""
+    violations = {'<': egaux + superieurs, '<=': superieurs, '>': inferieurs + egaux, '>=': inferieurs,
+                  '==': inferieurs + superieurs, '!=': egaux}
+    return {cle: violations[cle[2]] for cle in cles}
+
+
+def _identite(profil, groupe, cles):
+    _, resultat, operation, facteurs = groupe
+    attendu = profil.flottants(facteurs[0]).to_numpy(dtype=float)
+    for facteur in facteurs[1:]:
+        valeurs = profil.flottants(facteur).to_numpy(dtype=float)
+        attendu = attendu * valeurs if operation == 'produit' else attendu + valeurs
+    ecart = np.abs(profil.flottants(resultat).to_numpy(dtype=float) - attendu) / (np.abs(attendu) + 1)
+    ecart = ecart[~np.isnan(ecart)]
+    tolerances = sorted({cle[4] for cle in cles})
+    _, superieurs = _comptes_seuils(ecart, tolerances)
+    return {cle: int(superieurs[tolerances.index(cle[4])]) for cle in cles}
+
+
+# opérateur -> condition respectée (une violation est une ligne valide qui ne la respecte pas)
+_CONDITIONS = {'<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+               '==': np.equal, '!=': np.not_equal}
+
+
+def masque(profil, regle):
+    """Masque booléen des lignes en violation d'une règle (None si non évaluable).
+
+    Mêmes conventions que les comptages d'`evaluer`, règle par règle: sert à
+    retrouver les lignes une fois les checks exécutés.
+    """
+    if regle.type == 'colonnes_requises':
+        return None
+    if regle.type == 'non_nul':
+        return profil.masque_na(regle.colonnes[0]).to_numpy()
+    cle, famille = regle.cle, regle.groupe[0]
+    if famille == 'seuils':
+        x = profil.flottants(cle[1]).to_numpy(dtype=float)
+        if cle[0] == 'intervalle':
+            violations = np.zeros(len(x), dtype=bool)
+            if cle[2] is not None:
+                violations |= x < cle[2]
+            if cle[3] is not None:
+                violations |= x > cle[3]
+            return violations
+        dans_liste = np.isin(x, cle[2])
+        return dans_liste if cle[0] == 'interdites' else ~dans_liste
+    if famille == 'ensemble':
+        codes, uniques = chaines.codes_distincts(profil.df[cle[1]])
+        dans_liste = np.append(_dans_liste(uniques, cle[2]), False)[codes]
+        return dans_liste if cle[0] == 'interdites' else ~dans_liste
+    if famille == 'comparaison':
+        _, gauche, operateur, droite, dates = cle
+        if dates:
+            g, d = profil.dates(gauche), profil.dates(droite)
+            if g is None or d is None:
+                return None
+        else:
+            g, d = profil.flottants(gauche), profil.flottants(droite)
+        valides = (g.notna() & d.notna()).to_numpy()
+        return valides & ~_CONDITIONS[operateur](g.to_numpy(), d.to_numpy())
+    _, resultat, operation, facteurs, tolerance = cle
+    attendu = profil.flottants(facteurs[0]).to_numpy(dtype=float)
+    for facteur in facteurs[1:]:
+        valeurs = profil.flottants(facteur).to_numpy(dtype=float)
+        attendu = attendu * valeurs if operation == 'produit' else attendu + valeurs
+    ecart = np.abs(profil.flottants(resultat).to_numpy(dtype=float) - attendu) / (np.abs(attendu) + 1)
+    return ecart > tolerance
+
+
+PLAN_DEFAUT = charger_regles(FICHIER_DEFAUT)
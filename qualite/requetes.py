@@ -0,0 +1,567 @@
+"""Moteur DuckDB: les mesures du profil calculées par requêtes sur un CSV ou un Parquet.
+
+Le fichier n'est jamais chargé dans un DataFrame. Comptages de valeurs manquantes,
+règles, doublons, quantiles, outliers et asymétrie sont des agrégats SQL évalués
+par DuckDB (multi-thread, colonnes lues à la demande). Les colonnes texte et de
+dates ne renvoient que des valeurs distinctes et leur nombre de lignes: les
+fonctions du moteur pandas (qualite.dates, qualite.chaines) s'y appliquent, si
+bien que les résultats des checks sont ceux de l'analyse du fichier chargé
+(vérifié par benchmarks/bench_moteurs.py).
+"""
+import numpy as np
+import pandas as pd
+
+from qualite import chaines
+from qualite.analyseur import AnalyseurQualite
+from qualite.chargement import SCHEMA_TRADES, format_fichier
+from qualite.dates import parser_dates
+from qualite.instrumentation import Chrono
+from qualite.profil import ProfilBase, mesure
+from qualite.regles import PLAN_DEFAUT, comptes_comparaison
+from qualite.tendances import NIVEAUX
+
+# colonnes parsées comme dates par les checks (types, dates, timestamps, fraîcheur)
+COLONNES_DATES = ('Date', 'SettlementDate', 'CreatedAt', 'EntryTime')
+PAIRES_DATES = (('Date', 'SettlementDate'),)
+TYPES_NUMERIQUES = ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT', 'UTINYINT', 'USMALLINT',
+                    'UINTEGER', 'UBIGINT', 'FLOAT', 'DOUBLE')
+# types Parquet qui arrivent en objets (texte) côté pandas
+TYPES_TEXTE = ('VARCHAR', 'DATE', 'TIME')
+BOOLEENS = ('True', 'TRUE', 'true', 'False', 'FALSE', 'false')
+# valeurs lues comme manquantes par pd.read_csv par défaut (pandas 2.x), recopiées: pas d'API publique
+VALEURS_NA = ('', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>',
+              'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null')
+# lignes lues pour écarter d'emblée les colonnes CSV qui ne sont pas numériques
+TAILLE_ECHANTILLON = 2048
+
+
+def _ident(col):
+    return '"' + str(col).replace('"', '""') + '"'
+
+
+def _chaine(valeur):
+    return "'" + str(valeur).replace("'", "''") + "'"
+
+
+def _flottant(valeur):
+    # via une chaîne: 0.1 serait sinon un DECIMAL, inf et nan n'ont pas de littéral
+    return f"{_chaine(repr(float(valeur)))}::DOUBLE"
+
+
+class ProfilRequetes(ProfilBase):
+    """Profil d'un fichier CSV ou Parquet évalué par DuckDB, sans DataFrame.
+
+    Les types des colonnes suivent ceux du moteur pandas: une colonne CSV est
+    numérique si toutes ses valeurs se lisent comme des nombres; en Parquet, les
+    colonnes datetime de SCHEMA_TRADES sont converties comme par chargement.typer.
+    Un premier agrégat calcule en une passe tout ce qui est comptable (lignes,
+    valeurs manquantes, distinctes, quantiles, asymétrie, règles du plan); une
+    requête GROUPING SETS renvoie ensuite les valeurs distinctes des dates, des
+    paires de dates et les valeurs texte à examiner.
+    """
+
+    # les checks s'exécutent dans les threads de DuckDB
+    horloge_cpu = 'processus'
+
+    def __init__(self, source, regles=None, nb_threads=None):
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("Le moteur DuckDB demande duckdb (pip install duckdb)")
+        self.source = source
+        self.regles = regles if regles is not None else PLAN_DEFAUT
+        self.mesures = {}
+        self._cache = {}
+        self.format = format_fichier(source)
+        self.connexion = duckdb.connect()
+        if nb_threads:
+            self.connexion.execute(f"SET threads = {int(nb_threads)}")
+        if self.format == 'csv':
+            # en-tête lu par pandas (mêmes noms, doublons renommés); dialecte fixé, comme pd.read_csv
+            colonnes = pd.read_csv(source, nrows=0).columns
+            valeurs_na = ", ".join(_chaine(v) for v in VALEURS_NA)
+            types = ", ".join(f"{_chaine(col)}: 'VARCHAR'" for col in colonnes)
+            lecture = (f"read_csv({_chaine(source)}, auto_detect = false, header = true, delim = ',', quote = '\"', "
+                       f"escape = '\"', columns = {{{types}}}, nullstr = [{valeurs_na}])")
+        elif self.format == 'parquet':
+            lecture = f"read_parquet({_chaine(source)})"
+        else:
+            raise ValueError(f"Le moteur DuckDB lit les fichiers CSV et Parquet, pas {self.format}")
+        self.connexion.execute(f"CREATE VIEW brut AS SELECT * FROM {lecture}")
+        if self.format == 'parquet':
+            self.types = self._schema_parquet()
+            self._creer('VIEW')
+            return
+        # un CSV est parsé une seule fois, dans une table DuckDB en colonnes compressées (déversée dans
+        # le répertoire temporaire de DuckDB au-delà de sa limite mémoire) plutôt qu'à chaque requête
+        self.types = self._schema_csv()
+        try:
+            self._creer('TABLE')
+        except duckdb.ConversionException:
+            # colonne numérique sur l'échantillon seulement: types vérifiés sur tout le fichier
+            self.types = self._schema_csv(verifier=True)
+            self._creer('TABLE')
+        booleens = [col for col, type_col in self.types.items() if type_col == 'autre']
+        if booleens:
+            complets = self._comptes([self._booleen(col) for col in booleens], 'donnees')
+            self.types.update({col: 'texte' for col, complet in zip(booleens, complets) if not complet})
+
+    def _creer(self, nature):
+        # vue (ou table) typée: chaque requête lit les nombres et horodatages déjà convertis
+        colonnes = []
+        for col, type_col in self.types.items():
+            if type_col == 'numerique':
+                # NaN ramené à NULL: pour DuckDB NaN est une valeur, plus grande que toutes les autres
+                colonnes.append(f"nullif(CAST({_ident(col)} AS DOUBLE), 'nan'::DOUBLE) AS {_ident(col)}")
+            elif type_col == 'horodatage':
+                colonnes.append(f"CAST({_ident(col)} AS TIMESTAMP) AS {_ident(col)}")
+            else:
+                colonnes.append(_ident(col))
+        self.connexion.execute(f"CREATE OR REPLACE TEMP {nature} donnees AS SELECT {', '.join(colonnes)} FROM brut")
+
+    def _requete(self, sql):
+        return self.connexion.execute(sql)
+
+    def _comptes(self, exprs, source='brut'):
+        return self._requete(f"SELECT {', '.join(exprs)} FROM {source}").fetchone()
+
+    @staticmethod
+    def _booleen(col):
+        # colonne bool pour pandas: True/False partout, sans valeur manquante
+        q = _ident(col)
+        return f"count(*) > 0 AND count({q}) = count(*) AND bool_and({q} IN ({', '.join(map(_chaine, BOOLEENS))}))"
+
+    def _schema_csv(self, verifier=False):
+        # colonne -> 'numerique', 'texte' ou 'autre' (booléens), comme les dtypes de pd.read_csv;
+        # sur un échantillon (conversion vérifiée à la création de la table), ou sur tout le fichier
+        noms = [ligne[0] for ligne in self._requete("DESCRIBE brut").fetchall()]
+        exprs = []
+        for nom in noms:
+            exprs += [f"count({_ident(nom)}) = count(TRY_CAST({_ident(nom)} AS DOUBLE))", self._booleen(nom)]
+        source = "brut" if verifier else f"(SELECT * FROM brut LIMIT {TAILLE_ECHANTILLON})"
+        comptes = self._comptes(exprs, source)
+        return {nom: 'numerique' if comptes[2 * i] else 'autre' if comptes[2 * i + 1] else 'texte'
+                for i, nom in enumerate(noms)}
+
+    def _schema_parquet(self):
+        # types de la table pandas après chargement.typer
+        colonnes = [(ligne[0], ligne[1]) for ligne in self._requete("DESCRIBE brut").fetchall()]
+        types = {}
+        a_verifier = []
+        for nom, type_sql in colonnes:
+            if type_sql in TYPES_NUMERIQUES:
+                types[nom] = 'numerique'
+            elif type_sql.startswith('TIMESTAMP'):
+                types[nom] = 'horodatage'
+            elif type_sql == 'VARCHAR' and SCHEMA_TRADES.get(nom) == 'datetime':
+                a_verifier.append(nom)
+            elif type_sql in TYPES_TEXTE or type_sql.startswith('DECIMAL') or type_sql == 'BOOLEAN':
+                types[nom] = 'texte'
+            else:
+                types[nom] = 'autre'
+        exprs = [f"count({_ident(nom)}) = count(TRY_CAST({_ident(nom)} AS TIMESTAMP))" for nom in a_verifier]
+        booleens = [nom for nom, type_sql in colonnes if type_sql == 'BOOLEAN']
+        exprs += [f"count({_ident(nom)}) = count(*)" for nom in booleens]
+        if exprs:
+            comptes = self._comptes(exprs)
+            for nom, convertible in zip(a_verifier, comptes):
+                # texte non convertible: gardé tel quel pour que check_types le signale
+                types[nom] = 'horodatage' if convertible else 'texte'
+            for nom, complet in zip(booleens, comptes[len(a_verifier):]):
+                # booléens sans valeur manquante: dtype bool, sinon objets
+                if complet:
+                    types[nom] = 'autre'
+        return {nom: types[nom] for nom, _ in colonnes}
+
+    def _nombre(self, col):
+        if self.types.get(col) == 'numerique':
+            return _ident(col)
+        return f"TRY_CAST({_ident(col)} AS DOUBLE)"
+
+    def _valeur(self, col):
+        # valeur comparable à celle du frame pandas: nombre, horodatage ou texte
+        if self.types[col] in ('numerique', 'horodatage'):
+            return _ident(col)
+        return f"CAST({_ident(col)} AS VARCHAR)"
+
+    def apercu(self, nb=20):
+        return self._requete(f"SELECT * FROM donnees LIMIT {int(nb)}").df()
+
+    # -- agrégat en une passe -------------------------------------------------
+
+    def _sql_passe(self, passe):
+        # expressions d'une passe de règles et calcul des violations à partir de leurs valeurs
+        groupe, cles = passe
+        famille = groupe[0]
+        if famille == 'seuils':
+            x = self._nombre(groupe[1])
+            exprs = []
+            for cle in cles:
+                if cle[0] == 'intervalle':
+                    termes = []
+                    if cle[2] is not None:
+                        termes.append(f"count_if({x} < {_flottant(cle[2])})")
+                    if cle[3] is not None:
+                        termes.append(f"count_if({x} > {_flottant(cle[3])})")
+                    exprs.append(" + ".join(termes))
+                else:
+                    dans_liste = f"count_if({x} IN ({', '.join(_flottant(v) for v in sorted(set(cle[2])))}))"
+                    exprs.append(dans_liste if cle[0] == 'interdites' else f"count(*) - {dans_liste}")
+            return exprs, lambda valeurs: {cle: int(n or 0) for cle, n in zip(cles, valeurs)}
+        if famille == 'ensemble':
+            t = f"CAST({_ident(groupe[1])} AS VARCHAR)"
+            exprs = []
+            for cle in cles:
+                dans_liste = f"count_if({t} IN ({', '.join(map(_chaine, sorted(set(cle[2]))))}))"
+                exprs.append(dans_liste if cle[0] == 'interdites' else f"count(*) - {dans_liste}")
+            return exprs, lambda valeurs: {cle: int(n or 0) for cle, n in zip(cles, valeurs)}
+        if famille == 'comparaison':
+            _, gauche, droite, dates = groupe
+            if dates:
+                # comparées en Python sur les paires distinctes, après parsing
+                return None
+            g, d = self._nombre(gauche), self._nombre(droite)
+            exprs = [f"count_if({g} < {d})", f"count_if({g} > {d})",
+                     f"count_if({g} IS NOT NULL AND {d} IS NOT NULL)"]
+
+            def violations(valeurs):
+                inferieurs, superieurs, valides = (int(n or 0) for n in valeurs)
+                return comptes_comparaison(inferieurs, superieurs, valides - inferieurs - superieurs, cles)
+            return exprs, violations
+        _, resultat, operation, facteurs = groupe
+        attendu = self._nombre(facteurs[0])
+        for facteur in facteurs[1:]:
+            attendu = f"({attendu} {'*' if operation == 'produit' else '+'} {self._nombre(facteur)})"
+        ecart = f"(abs({self._nombre(resultat)} - {attendu}) / (abs({attendu}) + 1))"
+        tolerances = sorted({cle[4] for cle in cles})
+        exprs = [f"count_if(NOT isnan({ecart}) AND {ecart} > {_flottant(t)})" for t in tolerances]
+        return exprs, lambda valeurs: {cle: int(valeurs[tolerances.index(cle[4])] or 0) for cle in cles}
+
+    def _agregats(self):
+        def calcul():
+            exprs = {('lignes',): "count(*)"}
+            numeriques = self.colonnes_numeriques()
+            for col in self.colonnes():
+                exprs[('non_nuls', col)] = f"count({_ident(col)})"
+            for col in self.colonnes_texte() + [c for c in ('TradeID',) if c in self.types]:
+                exprs[('distinctes', col)] = f"count(DISTINCT {self._valeur(col)})"
+            for col in numeriques:
+                x = self._nombre(col)
+                exprs[('quantiles', col)] = f"quantile_cont({x}, [0.25, 0.75])"
+                # DuckDB refuse l'asymétrie d'une colonne avec ±inf; pandas renvoie NaN
+                exprs[('asymetrie', col)] = f"skewness({x}) FILTER (WHERE isfinite({x}))"
+                exprs[('infinis', col)] = f"count_if(isinf({x}))"
+            finitions = {}
+            for passe in self.regles.passes.values():
+                if any(col not in self.types for col in self._colonnes_passe(passe)):
+                    continue
+                sql = self._sql_passe(passe)
+                if sql is not None:
+                    for i, expr in enumerate(sql[0]):
+                        exprs[('regles', passe, i)] = expr
+                    finitions[passe] = sql[1]
+            cles = list(exprs)
+            valeurs = self._requete(
+                f"SELECT {', '.join(exprs[cle] for cle in cles)} FROM donnees").fetchone()
+            resultats = dict(zip(cles, valeurs))
+            for passe, finition in finitions.items():
+                resultats[('passe', passe)] = finition(
+                    [resultats[cle] for cle in cles if cle[:2] == ('regles', passe)])
+            return resultats
+        return self._memo(('agregats',), calcul)
+
+    @staticmethod
+    def _colonnes_passe(passe):
+        groupe = passe[0]
+        if groupe[0] in ('seuils', 'ensemble'):
+            return [groupe[1]]
+        if groupe[0] == 'comparaison':
+            return [groupe[1], groupe[2]]
+        return [groupe[1], *groupe[3]]
+
+    # -- valeurs distinctes ---------------------------------------------------
+
+    def _ensembles(self):
+        # ensembles de colonnes dont les valeurs distinctes sont lues en Python
+        colonnes = [col for col in COLONNES_DATES if col in self.types]
+        paires = [paire for paire in PAIRES_DATES if all(col in self.types for col in paire)]
+        for passe in self.regles.passes.values():
+            groupe = passe[0]
+            if groupe[0] == 'comparaison' and groupe[3] and all(col in self.types for col in groupe[1:3]):
+                colonnes += [col for col in groupe[1:3] if col not in colonnes]
+                if groupe[1:3] not in paires:
+                    paires.append(groupe[1:3])
+        texte = [col for col in self.colonnes_texte() if col not in colonnes]
+        return colonnes, paires, texte
+
+    def _distinctes(self):
+        """Valeurs distinctes non nulles et leur nombre de lignes, en une requête GROUPING SETS.
+
+        Clés: ('complet', col) pour les colonnes de dates, ('paire', debut, fin) pour
+        les paires comparées et ('texte', col) pour les autres colonnes texte, dont
+        ne remontent que les valeurs qui peuvent porter un défaut d'hygiène, ou toutes
+        si la colonne a au plus LIMITE_DISTINCTES valeurs (variantes de casse et de format).
+        """
+        def calcul():
+            colonnes, paires, texte = self._ensembles()
+            agregats = self._agregats()
+            exprs, ensembles = [], {}
+            for col in colonnes:
+                exprs.append(self._valeur(col))
+                ensembles[('complet', col)] = [len(exprs) - 1]
+            for debut, fin in paires:
+                ensembles[('paire', debut, fin)] = [ensembles[('complet', debut)][0],
+                                                     ensembles[('complet', fin)][0]]
+            for col in texte:
+                t = self._valeur(col)
+                complet = agregats[('distinctes', col)] <= chaines.LIMITE_DISTINCTES
+                suspect = f"(prefix({t}, ' ') OR suffix({t}, ' ') OR NOT regexp_full_match({t}, '[ -~]*'))"
+                exprs.append(f"CASE WHEN {'true' if complet else 'false'} OR {suspect} THEN {t} END")
+                ensembles[('texte', col)] = [len(exprs) - 1]
+            if not exprs:
+                return {}
+            noms = [f"e{i}" for i in range(len(exprs))]
+            selection = ", ".join(f"{expr} AS {nom}" for expr, nom in zip(exprs, noms))
+            # une paire et son inverse forment le même ensemble: une seule fois dans GROUPING SETS
+            uniques = dict.fromkeys(tuple(sorted(indices)) for indices in ensembles.values())
+            sets = ", ".join("(" + ", ".join(noms[i] for i in indices) + ")" for indices in uniques)
+            table = self._requete(
+                f"SELECT {', '.join(noms)}, grouping({', '.join(noms)}) AS ensemble, count(*) AS n "
+                f"FROM (SELECT {selection} FROM donnees) GROUP BY GROUPING SETS ({sets})").df()
+            resultats = {}
+            for cle, indices in ensembles.items():
+                # grouping(): bit à 1 pour chaque expression hors de l'ensemble, la première en poids fort
+                code = sum(1 << (len(noms) - 1 - i) for i in range(len(noms)) if i not in indices)
+                lignes = table[table['ensemble'] == code]
+                valeurs = lignes[[noms[i] for i in indices]]
+                lignes = lignes[valeurs.notna().all(axis=1).to_numpy()]
+                resultats[cle] = ([lignes[noms[i]].reset_index(drop=True) for i in indices],
+                                  lignes['n'].to_numpy(dtype=np.int64))
+            return resultats
+        return self._memo(('distinctes',), calcul)
+
+    def _groupe(self, *cle):
+        # valeurs distinctes d'un ensemble, lues à part s'il n'a pas été prévu par _ensembles
+        distinctes = self._distinctes()
+        if cle in distinctes:
+            return distinctes[cle]
+
+        def calcul():
+            colonnes = [cle[1]] if cle[0] == 'complet' else list(cle[1:])
+            exprs = [self._valeur(col) for col in colonnes]
+            table = self._requete(
+                f"SELECT {', '.join(exprs)}, count(*) AS n FROM donnees "
+                f"WHERE {' AND '.join(f'{e} IS NOT NULL' for e in exprs)} GROUP BY ALL").df()
+            return [table.iloc[:, i] for i in range(len(colonnes))], table['n'].to_numpy(dtype=np.int64)
+        return self._memo(('groupe',) + cle, calcul)
+
+    def distinctes(self, col):
+        # (valeurs, comptes) comme chaines.distinctes, sur les valeurs remontées de la colonne
+        cle = ('complet', col) if ('complet', col) in self._distinctes() else ('texte', col)
+        valeurs, comptes = self._groupe(*cle)
+        return pd.Index(valeurs[0]).astype(str), comptes
+
+    # -- mesures --------------------------------------------------------------
+
+    @mesure('somme')
+    def nb_lignes(self):
+        return int(self._agregats()[('lignes',)])
+
+    @mesure('premier')
+    def colonnes(self):
+        return list(self.types)
+
+    @mesure('intersection')
+    def colonnes_numeriques(self):
+        return [col for col, type_col in self.types.items() if type_col == 'numerique']
+
+    @mesure('union')
+    def colonnes_texte(self):
+        return [col for col, type_col in self.types.items() if type_col == 'texte']
+
+    @mesure('somme')
+    def nb_na(self, col):
+        # entier numpy comme Series.sum(): mêmes résultats qu'en pandas
+        return np.int64(self.nb_lignes() - int(self._agregats()[('non_nuls', col)]))
+
+    @mesure(None)
+    def nb_duplicats(self, col):
+        if col is None:
+            valeurs = ", ".join(self._valeur(c) for c in self.colonnes())
+            distinctes = self._requete(f"SELECT count(*) FROM (SELECT DISTINCT {valeurs} FROM donnees)").fetchone()
+            return self.nb_lignes() - int(distinctes[0])
+        # les valeurs manquantes comptent comme une valeur, comme Series.duplicated()
+        nb_na = self.nb_na(col)
+        return self.nb_lignes() - int(self._agregats()[('distinctes', col)]) - (1 if nb_na else 0)
+
+    def dates_parsees(self, col, format=None):
+        # (dates des valeurs distinctes, format, nombre de lignes non parsables)
+        def calcul():
+            valeurs, comptes = self._groupe('complet', col)
+            if self.types[col] == 'horodatage':
+                return pd.Series(pd.to_datetime(valeurs[0]).to_numpy()), format, 0
+            dates, format_detecte, _ = parser_dates(valeurs[0].astype(str), format)
+            if dates is None:
+                return None, None, int(comptes.sum())
+            return dates, format_detecte, int(comptes[np.isnat(dates.to_numpy())].sum())
+        return self._memo(('dates', col, format), calcul)
+
+    def dates(self, col, format=None):
+        return self.dates_parsees(col, format)[0]
+
+    def _dates_paire(self, debut, fin):
+        # dates des paires distinctes (debut, fin), chacune au format détecté sur sa colonne
+        valeurs, comptes = self._groupe('paire', debut, fin)
+        dates = []
+        for col, serie in zip((debut, fin), valeurs):
+            if self.types[col] == 'horodatage':
+                dates.append(pd.to_datetime(serie).to_numpy())
+                continue
+            parsees, format, _ = self.dates_parsees(col)
+            if parsees is None:
+                return None
+            dates.append(parser_dates(serie.astype(str), format)[0].to_numpy())
+        return dates[0], dates[1], comptes
+
+    @mesure('somme')
+    def nb_dates_invalides(self, col, format):
+        return self.dates_parsees(col, format)[2]
+
+    @mesure('somme')
+    def nb_dates_inversees(self, debut, fin):
+        paires = self._dates_paire(debut, fin)
+        if paires is None:
+            return None
+        dates, fins, comptes = paires
+        return int(comptes[fins < dates].sum())
+
+    @mesure('max')
+    def date_max(self, col):
+        dates = self.dates(col)
+        return None if dates is None else dates.max()
+
+    @mesure(None)
+    def quantiles(self, col):
+        q = self._agregats()[('quantiles', col)]
+        if q is None:
+            return np.nan, np.nan
+        return q[0], q[1]
+
+    def _bornes(self):
+        # bornes de check_outliers pour toutes les colonnes numériques, comptées en une requête
+        def calcul():
+            bornes = {}
+            for col in self.colonnes_numeriques():
+                if self.nb_valides(col) > 0:
+                    q1, q3 = self.quantiles(col)
+                    iqr = q3 - q1
+                    bornes[col] = (q1 - 1.5 * iqr, q3 + 1.5 * iqr)
+            if not bornes:
+                return {}
+            exprs = [f"count_if({self._nombre(col)} < {_flottant(lower)} OR {self._nombre(col)} > {_flottant(upper)})"
+                     for col, (lower, upper) in bornes.items()]
+            comptes = self._requete(f"SELECT {', '.join(exprs)} FROM donnees").fetchone()
+            return {(col, *limites): int(n or 0) for (col, limites), n in zip(bornes.items(), comptes)}
+        return self._memo(('bornes',), calcul)
+
+    @mesure(None)
+    def nb_hors_bornes(self, col, lower, upper):
+        bornes = self._bornes()
+        if (col, lower, upper) in bornes:
+            return bornes[(col, lower, upper)]
+        x = self._nombre(col)
+        return int(self._requete(
+            f"SELECT count_if({x} < {_flottant(lower)} OR {x} > {_flottant(upper)}) FROM donnees").fetchone()[0])
+
+    @mesure(None)
+    def asymetrie(self, col):
+        asymetrie = self._agregats()[('asymetrie', col)]
+        if asymetrie is None or self._agregats()[('infinis', col)]:
+            return np.nan
+        if np.isnan(asymetrie) and self.nb_valides(col) >= 3:
+            # variance nulle: pandas renvoie 0
+            return 0.0
+        return asymetrie
+
+    def passe_regles(self, passe):
+        def calcul():
+            agregats = self._agregats()
+            if ('passe', passe) in agregats:
+                return agregats[('passe', passe)]
+            groupe, cles = passe
+            if groupe[0] == 'comparaison' and groupe[3]:
+                paires = self._dates_paire(groupe[1], groupe[2])
+                if paires is None:
+                    return {cle: None for cle in cles}
+                g, d, comptes = paires
+                inferieurs, superieurs = int(comptes[g < d].sum()), int(comptes[g > d].sum())
+                return comptes_comparaison(inferieurs, superieurs, int(comptes.sum()) - inferieurs - superieurs, cles)
+            # passe absente du plan du profil: évaluée seule
+            exprs, finition = self._sql_passe(passe)
+            return finition(self._requete(f"SELECT {', '.join(exprs)} FROM donnees").fetchone())
+        return self._memo(('regles', passe), calcul)
+
+    @mesure('somme')
+    def nb_violations(self, regle, passe):
+        return self.passe_regles(passe)[regle]
+
+    def defauts_texte(self, col):
+        return self._memo(('defauts_texte', col), lambda: chaines.defauts(*self.distinctes(col)))
+
+    @mesure('somme')
+    def nb_espaces(self, col):
+        return self.defauts_texte(col)['espaces']
+
+    @mesure('somme')
+    def nb_blancs_speciaux(self, col):
+        return self.defauts_texte(col)['blancs_speciaux']
+
+    @mesure('somme')
+    def nb_non_imprimables(self, col):
+        return self.defauts_texte(col)['non_imprimables']
+
+    @mesure('comptes')
+    def comptes_distincts(self, col):
+        if self._agregats()[('distinctes', col)] > chaines.LIMITE_DISTINCTES:
+            return None
+        uniques, comptes = self.distinctes(col)
+        return dict(zip(uniques, comptes.tolist()))
+
+    def histogramme(self, col, nb_classes=50):
+        # classes de np.histogram, comptées par DuckDB
+        def calcul():
+            x = self._nombre(col)
+            bas, haut = self._requete(f"SELECT min({x}), max({x}) FROM donnees WHERE isfinite({x})").fetchone()
+            if bas is None:
+                return np.histogram(np.array([]), bins=nb_classes)
+            if bas == haut:
+                bas, haut = bas - 0.5, haut + 0.5
+            bords = np.linspace(bas, haut, nb_classes + 1)
+            rang = f"CAST(floor(({x} - {_flottant(bas)}) / {_flottant(haut - bas)} * {nb_classes}) AS BIGINT)"
+            classes = self._requete(f"SELECT least({rang}, {nb_classes - 1}) AS classe, count(*) FROM donnees "
+                                    f"WHERE isfinite({x}) GROUP BY classe").fetchall()
+            comptes = np.zeros(nb_classes, dtype=np.int64)
+            for classe, n in classes:
+                comptes[classe] = n
+            return comptes, bords
+        return self._memo(('histogramme', col, nb_classes), calcul)
+
+    def repartition(self, col):
+        def calcul():
+            x = self._nombre(col)
+            niveaux = ", ".join(_flottant(niveau) for niveau in NIVEAUX)
+            centiles = self._requete(
+                f"SELECT quantile_cont({x}, [{niveaux}]) FROM donnees WHERE isfinite({x})").fetchone()[0]
+            return None if centiles is None else np.asarray(centiles, dtype=np.float64)
+        return self._memo(('repartition', col), calcul)
+
+
+def analyser_requetes(source, checks=None, regles=None, tendances=None, nb_threads=None):
+    """Analyse d'un fichier CSV ou Parquet par le moteur DuckDB (mêmes résultats que le chargement pandas)."""
+    # le chargement se limite à la lecture du schéma (et, en CSV, au typage des colonnes)
+    with Chrono() as chargement:
+        profil = ProfilRequetes(source, regles=regles, nb_threads=nb_threads)
+    analyseur = AnalyseurQualite(profil=profil, checks=checks, regles=regles, tendances=tendances, source=source)
+    analyseur.performances['chargement'] = chargement.mesures
+    analyseur.analyser_tout()
+    return analyseur
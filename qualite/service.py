@@ -0,0 +1,109 @@
+import os
+import threading
+from collections import OrderedDict, deque
+
+from qualite.cache import CacheAnalyses
+from qualite.taches import TacheAnalyse
+
+
+class ServiceAnalyses:
+    """Analyses partagées par toutes les sessions d'un même processus.
+
+    - un pool borné de `nb_workers` threads exécute les tâches;
+    - chaque utilisateur a sa file: les workers servent les files à tour de rôle,
+      un lot soumis par une personne ne bloque donc pas les autres;
+    - deux soumissions de même clé (empreinte du contenu et de la configuration)
+      partagent une seule tâche, et le résultat va dans un CacheAnalyses commun
+      borné par `budget_mb`.
+
+    Les analyseurs renvoyés sont partagés: les appelants ne doivent pas les modifier.
+    """
+
+    def __init__(self, nb_workers=None, capacite=8, budget_mb=None, repertoire=None):
+        self.resultats = CacheAnalyses(capacite, repertoire, budget_mb)
+        self.nb_workers = nb_workers or os.cpu_count() or 1
+        self._files = OrderedDict()
+        self._taches = {}
+        self._abonnes = {}
+        self._condition = threading.Condition()
+        for _ in range(self.nb_workers):
+            threading.Thread(target=self._boucle, daemon=True).start()
+
+    def soumettre(self, cle, fonction, utilisateur, cache=True):
+        """(analyseur, None) si le résultat est déjà connu, sinon (None, tâche partagée).
+
+        Avec `cache=False` le résultat n'est ni lu ni gardé dans `resultats`: analyses
+        qui dépendent d'un état extérieur au fichier (historique TradeID).
+        """
+        analyseur = self.resultats.get(cle) if cache else None
+        if analyseur is not None:
+            return analyseur, None
+        with self._condition:
+            tache = self._taches.get(cle)
+            if tache is None:
+                tache = self._taches[cle] = TacheAnalyse(fonction, cle, demarrer=False)
+                tache.garder = cache
+                self._files.setdefault(utilisateur, deque()).append(tache)
+                self._condition.notify()
+            self._abonnes.setdefault(cle, set()).add(utilisateur)
+        return None, tache
+
+    def abandonner(self, tache, utilisateur):
+        """Désabonne l'utilisateur; la tâche n'est annulée que si plus personne ne l'attend."""
+        with self._condition:
+            abonnes = self._abonnes.get(tache.cle, set())
+            abonnes.discard(utilisateur)
+            if abonnes or self._taches.get(tache.cle) is not tache:
+                return
+            tache.annuler()
+            for file in self._files.values():
+                if tache in file:
+                    # encore en file: retirée tout de suite, sans attendre un worker
+                    file.remove(tache)
+                    tache.executer()
+            self._oublier(tache)
+
+    def position(self, tache):
+        """Nombre de tâches servies avant celle-ci (0 si elle tourne déjà)."""
+        with self._condition:
+            for file in self._files.values():
+                if tache in file:
+                    rang = file.index(tache)
+                    return sum(min(len(autre), rang + 1) for autre in self._files.values()) - 1
+            return 0
+
+    def etat(self):
+        with self._condition:
+            en_attente = sum(len(file) for file in self._files.values())
+            en_cours = len(self._taches) - en_attente
+        return {'en_cours': en_cours, 'en_attente': en_attente, 'resultats': len(self.resultats),
+                'memoire_mb': self.resultats.memoire_mb, 'budget_mb': self.resultats.budget_mb}
+
+    def _suivante(self):
+        # tourniquet: l'utilisateur servi repasse en fin d'ordre
+        for utilisateur in list(self._files):
+            file = self._files.pop(utilisateur)
+            if file:
+                tache = file.popleft()
+                if file:
+                    self._files[utilisateur] = file
+                return tache
+        return None
+
+    def _oublier(self, tache):
+        if self._taches.get(tache.cle) is tache:
+            del self._taches[tache.cle]
+            self._abonnes.pop(tache.cle, None)
+
+    def _boucle(self):
+        while True:
+            with self._condition:
+                tache = self._suivante()
+                while tache is None:
+                    self._condition.wait()
+                    tache = self._suivante()
+            tache.executer()
+            if tache.etat == 'terminee' and tache.garder:
+                self.resultats.put(tache.cle, tache.analyseur)
+            with self._condition:
+                self._oublier(tache)
@@ -0,0 +1,266 @@
+import numpy as np
+
+
+class HistogrammeLog:
+    """Histogramme à seaux logarithmiques (type DDSketch), fusionnable exactement.
+
+    Une valeur x va dans le seau ceil(log|x| / log γ), avec γ = (1+α)/(1-α), du
+    côté de son signe; |x| <= `minimum` tombe dans un seau zéro. Construction en
+    O(n) (log + bincount, sans tri); la fusion additionne les comptes, donc un
+    flux ou des partitions donnent le même histogramme qu'une passe unique.
+
+    Bornes d'erreur (α = precision):
+    - un quantile est interpolé dans le seau qui contient la vraie valeur:
+      erreur relative <= 2α/(1-α) (0,2 % pour α = 0,001);
+    - un comptage hors bornes n'est approché que dans les deux seaux qui
+      contiennent les bornes; toutes les autres valeurs sont comptées exactement.
+
+    ±inf n'entre dans aucun seau: les infinis sont comptés à part et placés aux
+    extrémités pour les quantiles et les comptages hors bornes, comme en exact.
+    """
+
+    # attributs de classe: les esquisses sérialisées avant leur ajout restent lisibles
+    infinis_negatifs = 0
+    infinis_positifs = 0
+
+    def __init__(self, precision=0.001, minimum=1e-12):
+        self.precision = precision
+        self.minimum = minimum
+        self.log_gamma = np.log((1 + precision) / (1 - precision))
+        # index (au sens de ceil(log|x|/log γ)) de la borne `minimum`
+        self.index_min = int(np.floor(np.log(minimum) / self.log_gamma))
+        self.debut = 0
+        self.comptes = np.zeros(0, dtype=np.int64)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def total(self):
+        return int(self.comptes.sum())
+
+    def cles(self, v):
+        """Clé signée de chaque valeur: 0 pour le seau zéro, ±k ailleurs (croissante avec x)."""
+        # calcul en place sur un seul tampon flottant, converti en entier à la fin
+        with np.errstate(divide='ignore'):
+            k = np.log(np.abs(v))
+        k *= 1 / self.log_gamma
+        np.ceil(k, out=k)
+        k -= self.index_min
+        np.maximum(k, 0, out=k)
+        k *= np.sign(v)
+        return k.astype(np.int64)
+
+    def ajouter_comptes(self, debut, comptes, mini, maxi):
+        if len(comptes) == 0:
+            return
+        self.min = min(self.min, mini)
+        self.max = max(self.max, maxi)
+        if len(self.comptes) == 0:
+            self.debut, self.comptes = debut, comptes.astype(np.int64)
+            return
+        bas = min(self.debut, debut)
+        haut = max(self.debut + len(self.comptes), debut + len(comptes))
+        fusion = np.zeros(haut - bas, dtype=np.int64)
+        fusion[self.debut - bas:self.debut - bas + len(self.comptes)] += self.comptes
+        fusion[debut - bas:debut - bas + len(comptes)] += comptes
+        self.debut, self.comptes = bas, fusion
+
+    def ajouter_infinis(self, negatifs, positifs):
+        self.infinis_negatifs += int(negatifs)
+        self.infinis_positifs += int(positifs)
+
+    def ajouter(self, valeurs):
+        v = np.asarray(valeurs, dtype=float)
+        self.ajouter_infinis(np.isneginf(v).sum(), np.isposinf(v).sum())
+        v = v[np.isfinite(v)]
+        if len(v) == 0:
+            return
+        cles = self.cles(v)
+        debut = cles.min()
+        self.ajouter_comptes(debut, np.bincount(cles - debut), v.min(), v.max())
+
+    def fusionner(self, autre):
+        self.ajouter_infinis(autre.infinis_negatifs, autre.infinis_positifs)
+        self.ajouter_comptes(autre.debut, autre.comptes, autre.min, autre.max)
+
+    def _points(self):
+        # fonction de répartition linéaire dans chaque seau non vide
+        cles = np.arange(self.debut, self.debut + len(self.comptes))
+        non_vides = self.comptes > 0
+        cles, comptes = cles[non_vides], self.comptes[non_vides]
+        index = np.abs(cles) + self.index_min
+        gamma = np.exp(self.log_gamma)
+        bas = np.where(cles > 0, gamma ** (index - 1.0), np.where(cles < 0, -gamma ** index, -self.minimum))
+        haut = np.where(cles > 0, gamma ** index, np.where(cles < 0, -gamma ** (index - 1.0), self.minimum))
+        bas = np.clip(bas, self.min, self.max)
+        haut = np.clip(haut, self.min, self.max)
+        cumul = np.cumsum(comptes)
+        valeurs = np.column_stack([bas, haut]).ravel()
+        rangs = np.column_stack([cumul - comptes, cumul]).ravel().astype(float)
+        return rangs, valeurs
+
+    def quantile(self, q):
+        total = self.total
+        nb = total + self.infinis_negatifs + self.infinis_positifs
+        if nb == 0:
+            return np.full(np.shape(q), np.nan)
+        # rang parmi les valeurs finies: en deçà ou au-delà, le quantile est infini
+        rang = np.asarray(q, dtype=float) * nb - self.infinis_negatifs
+        if total == 0:
+            return np.where(rang <= 0, -np.inf, np.inf)
+        rangs, valeurs = self._points()
+        interpoles = np.interp(np.clip(rang, 0, total), rangs, valeurs)
+        return np.where(rang < 0, -np.inf, np.where(rang > total, np.inf, interpoles))
+
+    def rang(self, x):
+        if len(self.comptes) == 0:
+            return np.zeros(np.shape(x))
+        rangs, valeurs = self._points()
+        return np.interp(x, valeurs, rangs)
+
+    def classes(self, nb_classes=50):
+        """Histogramme à classes égales entre min et max, réparti depuis les seaux: (comptes, bords).
+
+        Chaque classe reçoit l'écart des rangs interpolés à ses bornes; seules les
+        lignes des seaux à cheval sur une borne de classe sont approchées.
+        """
+        if len(self.comptes) == 0:
+            return np.zeros(nb_classes, dtype=np.int64), np.linspace(0.0, 1.0, nb_classes + 1)
+        if self.min == self.max:
+            return np.array([self.total]), np.array([self.min - 0.5, self.max + 0.5])
+        bords = np.linspace(self.min, self.max, nb_classes + 1)
+        rangs = np.round(self.rang(bords))
+        rangs[0], rangs[-1] = 0, self.total
+        return np.diff(rangs).astype(np.int64), bords
+
+    def nb_hors(self, bas, haut):
+        # bornes NaN (IQR infini): aucune comparaison ne compte, comme en exact
+        infinis = (self.infinis_negatifs if bas > -np.inf else 0) + (self.infinis_positifs if haut < np.inf else 0)
+        if len(self.comptes) == 0:
+            return infinis
+        inferieurs = self.rang(bas) if bas > self.min else 0.0
+        superieurs = self.total - self.rang(haut) if haut < self.max else 0.0
+        return int(round(inferieurs + superieurs)) + infinis
+
+
+class Moments:
+    """Moments centrés jusqu'à l'ordre 3, fusionnables (formules de Pébay)."""
+
+    def __init__(self):
+        self.n = 0
+        self.moyenne = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+
+    def ajouter(self, valeurs):
+        v = np.asarray(valeurs, dtype=float)
+        v = v[~np.isnan(v)]
+        if len(v) == 0:
+            return
+        autre = Moments()
+        autre.n = len(v)
+        autre.moyenne = v.mean()
+        ecarts = v - autre.moyenne
+        autre.m2 = (ecarts ** 2).sum()
+        autre.m3 = (ecarts ** 3).sum()
+        self.fusionner(autre)
+
+    def fusionner(self, autre):
+        if autre.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.moyenne, self.m2, self.m3 = autre.n, autre.moyenne, autre.m2, autre.m3
+            return
+        na, nb = self.n, autre.n
+        n = na + nb
+        delta = autre.moyenne - self.moyenne
+        m3 = (self.m3 + autre.m3 + delta ** 3 * na * nb * (na - nb) / n ** 2
+              + 3 * delta * (na * autre.m2 - nb * self.m2) / n)
+        self.m2 = self.m2 + autre.m2 + delta ** 2 * na * nb / n
+        self.m3 = m3
+        self.moyenne += delta * nb / n
+        self.n = n
+
+    def asymetrie(self):
+        # même estimateur que pandas.Series.skew (Fisher-Pearson ajusté)
+        n = self.n
+        if n < 3:
+            return np.nan
+        if abs(self.m2) < 1e-14:
+            return 0.0
+        return n * (n - 1) ** 0.5 / (n - 2) * self.m3 / self.m2 ** 1.5
+
+
+class EsquisseNumerique:
+    """Histogrammes de quantiles et moments de toutes les colonnes numériques, en une passe.
+
+    Les colonnes sont converties une fois en matrice float64; un seul log et un
+    seul bincount (clés décalées par colonne) remplissent tous les histogrammes,
+    et les moments sont calculés pour toutes les colonnes d'un coup.
+    Fusionnable: blocs d'un flux ou partitions d'un frame. L'asymétrie vient de
+    moments exacts (aux arrondis près); seuls les quantiles et les comptages
+    d'outliers sont approchés, avec les bornes de HistogrammeLog.
+    """
+
+    def __init__(self, precision=0.001):
+        self.precision = precision
+        self.histogrammes = {}
+        self.moments = {}
+
+    def ajouter(self, df, colonnes):
+        if not colonnes or len(df) == 0:
+            return
+        # une ligne par colonne, contiguë: les réductions se font le long des lignes
+        valeurs = np.ascontiguousarray(df[colonnes].to_numpy(dtype=float).T)
+        valides = ~np.isnan(valeurs)
+        # ±inf compte dans les moments (asymétrie NaN, comme pandas) mais pas dans les seaux
+        infinis = np.isinf(valeurs)
+        avec_infinis = infinis.any()
+        nb = valides.sum(axis=1)
+        zeros = np.where(valides, valeurs, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            moyennes = zeros.sum(axis=1) / nb
+            ecarts = valeurs - moyennes[:, None]
+            ecarts[~valides] = 0.0
+            carres = ecarts * ecarts
+            m2 = carres.sum(axis=1)
+            carres *= ecarts
+            m3 = carres.sum(axis=1)
+        finis, finies, bornes = valides, zeros, valeurs
+        if avec_infinis:
+            finis = valides & ~infinis
+            finies = np.where(finis, valeurs, 0.0)
+            bornes = np.where(finis, valeurs, np.nan)
+        nb_finis = finis.sum(axis=1)
+        mins = np.fmin.reduce(bornes, axis=1)
+        maxs = np.fmax.reduce(bornes, axis=1)
+
+        for col in colonnes:
+            self.histogrammes.setdefault(col, HistogrammeLog(self.precision))
+        cles = self.histogrammes[colonnes[0]].cles(finies)
+        # NaN et infinis (clé 0 ici) sont rangés dans un seau poubelle au-delà de la dernière clé
+        debut = cles.min()
+        largeur = int(cles.max() - debut) + 1
+        decalees = cles - debut
+        decalees[~finis] = largeur
+        decalees += (np.arange(len(colonnes)) * (largeur + 1))[:, None]
+        comptes = np.bincount(decalees.ravel(), minlength=len(colonnes) * (largeur + 1))
+        comptes = comptes.reshape(len(colonnes), largeur + 1)[:, :largeur]
+
+        if avec_infinis:
+            negatifs = (infinis & (valeurs < 0)).sum(axis=1)
+            for i, col in enumerate(colonnes):
+                self.histogrammes[col].ajouter_infinis(negatifs[i], infinis[i].sum() - negatifs[i])
+        for i, col in enumerate(colonnes):
+            bloc = Moments()
+            if nb_finis[i]:
+                self.histogrammes[col].ajouter_comptes(debut, comptes[i], mins[i], maxs[i])
+            if nb[i]:
+                bloc.n, bloc.moyenne, bloc.m2, bloc.m3 = int(nb[i]), moyennes[i], m2[i], m3[i]
+            self.moments.setdefault(col, Moments()).fusionner(bloc)
+
+    def fusionner(self, autre):
+        for col, histogramme in autre.histogrammes.items():
+            self.histogrammes.setdefault(col, HistogrammeLog(self.precision)).fusionner(histogramme)
+        for col, moments in autre.moments.items():
+            self.moments.setdefault(col, Moments()).fusionner(moments)
@@ -0,0 +1,70 @@
+import threading
+
+from qualite.analyseur import AnalyseAnnulee
+
+
+class TacheAnalyse:
+    """Analyse exécutée hors du thread appelant, lisible au fil des checks.
+
+    `fonction(progression, annulation)` renvoie l'analyseur et transmet ses deux
+    arguments à analyser_tout(). `analyseur` est disponible dès le début des
+    checks et ses `resultats` se remplissent au fur et à mesure. L'annulation
+    est coopérative: elle prend effet entre deux checks.
+
+    Par défaut la tâche a son propre thread; avec `demarrer=False` elle attend
+    qu'un worker appelle executer() (voir qualite.service).
+    """
+
+    def __init__(self, fonction, cle=None, demarrer=True):
+        self.cle = cle
+        self.annulation = threading.Event()
+        self.analyseur = None
+        self.phase = 'chargement'
+        self.fait = 0
+        self.total = None
+        self.etat = 'en_attente'
+        self.erreur = None
+        self._fonction = fonction
+        self._fini = threading.Event()
+        if demarrer:
+            threading.Thread(target=self.executer, daemon=True).start()
+
+    def _progression(self, analyseur, nom):
+        self.analyseur = analyseur
+        self.total = len(analyseur.checks)
+        if nom is None:
+            self.phase = 'checks'
+        else:
+            self.fait += 1
+            self.phase = nom
+
+    def executer(self):
+        try:
+            if self.annulation.is_set():
+                raise AnalyseAnnulee('en_attente')
+            self.etat = 'en_cours'
+            self.analyseur = self._fonction(self._progression, self.annulation)
+            self.etat = 'terminee'
+        except AnalyseAnnulee:
+            self.etat = 'annulee'
+        except Exception as e:
+            self.erreur = f"{type(e).__name__}: {e}"
+            self.etat = 'erreur'
+        finally:
+            # la fonction retient les octets du fichier source
+            self._fonction = None
+            self._fini.set()
+
+    @property
+    def en_cours(self):
+        return self.etat in ('en_attente', 'en_cours')
+
+    @property
+    def avancement(self):
+        return self.fait / self.total if self.total else 0.0
+
+    def annuler(self):
+        self.annulation.set()
+
+    def attendre(self, delai=None):
+        return self._fini.wait(delai)
@@ -0,0 +1,230 @@
+"""Historique des analyses et dérive des distributions d'une analyse à l'autre.
+
+Chaque analyse enregistrée garde son résumé, l'état de ses checks, les comptages
+lus dans ses résultats et, par colonne, le nombre de valeurs manquantes et les
+centiles des colonnes numériques (101 valeurs, 808 octets). Les vues de tendance
+et le check de dérive ne lisent que ces tables, jamais les fichiers d'origine.
+"""
+import os
+import re
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+# niveaux de la répartition gardée par colonne numérique: les centiles
+NIVEAUX = np.linspace(0.0, 1.0, 101)
+# analyses précédentes du même jeu qui forment la référence de la dérive
+FENETRE = 30
+# seuils usuels: PSI > 0,2 = changement significatif de population
+SEUIL_PSI = 0.2
+SEUIL_KS = 0.1
+
+
+def nom_jeu(source):
+    """Nom du jeu de données d'un fichier: sans répertoire, extension ni date (trades_2024-05-01.csv -> trades)."""
+    if not source:
+        return 'sans_nom'
+    nom = os.path.splitext(os.path.basename(str(source)))[0]
+    nom = re.sub(r'[_\-. ]?\d{4}[-_]?\d{2}[-_]?\d{2}', '', nom)
+    return nom or 'sans_nom'
+
+
+def date_analyse(analyseur):
+    """Date à laquelle rattacher une analyse: la dernière date des données, sinon l'heure de l'analyse.
+
+    Des archives analysées après coup se rangent ainsi à leur date métier.
+    """
+    if 'Date' in analyseur.profil.colonnes():
+        date_max = analyseur.profil.date_max('Date')
+        if date_max is not None and not pd.isna(date_max):
+            return pd.Timestamp(date_max).strftime('%Y-%m-%d %H:%M:%S')
+    return analyseur.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _nombre(valeur):
+    if isinstance(valeur, (bool, np.bool_)):
+        return float(valeur)
+    if isinstance(valeur, (int, float, np.integer, np.floating)):
+        return float(valeur)
+    if isinstance(valeur, str):
+        # "244 valeurs négatives", "Data age: 689 jours", "PSI 0.312, KS 0.08"
+        nombre = re.search(r'-?\d+(?:\.\d+)?', valeur)
+        return float(nombre.group()) if nombre else None
+    return None
+
+
+def comptes(resultats):
+    """(check, élément, valeur) pour chaque comptage lisible dans les résultats des checks."""
+    lignes = []
+    for nom, resultat in resultats.items():
+        # by_column: % de valeurs manquantes par colonne
+        for champ in ('issues', 'detail', 'by_column'):
+            if isinstance(resultat.get(champ), dict):
+                for element, valeur in resultat[champ].items():
+                    nombre = _nombre(valeur)
+                    if nombre is not None:
+                        lignes.append((nom, str(element), nombre))
+        for champ in ('count', 'historique'):
+            if champ in resultat:
+                lignes.append((nom, champ, float(resultat[champ])))
+    return lignes
+
+
+def _repartition(points, quantiles):
+    # fonction de répartition, aux points donnés, d'une colonne résumée par ses centiles
+    return np.interp(points, quantiles, NIVEAUX, left=0.0, right=1.0)
+
+
+def derive(actuelle, references):
+    """(PSI, KS) entre les centiles d'une colonne et ceux de ses analyses de référence.
+
+    La référence est le mélange des répartitions précédentes. KS est l'écart
+    maximal entre les deux fonctions de répartition; le PSI compare les parts de
+    lignes dans les déciles de la référence.
+    """
+    points = np.unique(np.concatenate([actuelle, *references]))
+    f_actuelle = _repartition(points, actuelle)
+    f_reference = np.mean([_repartition(points, q) for q in references], axis=0)
+    ks = float(np.max(np.abs(f_actuelle - f_reference)))
+    bords = np.interp(np.linspace(0.1, 0.9, 9), f_reference, points)
+    parts_reference = np.diff(np.r_[0.0, np.interp(bords, points, f_reference), 1.0])
+    parts_actuelles = np.diff(np.r_[0.0, np.interp(bords, points, f_actuelle), 1.0])
+    parts_reference = np.clip(parts_reference, 1e-4, None)
+    parts_actuelles = np.clip(parts_actuelles, 1e-4, None)
+    psi = float(np.sum((parts_actuelles - parts_reference) * np.log(parts_actuelles / parts_reference)))
+    return psi, ks
+
+
+class HistoriqueQualite:
+    """Historique SQLite des analyses, indexé par jeu de données et date.
+
+    Une connexion partagée par les threads (verrou) ; plusieurs processus peuvent
+    écrire dans le même fichier, SQLite sérialise les écritures.
+    """
+
+    def __init__(self, chemin):
+        os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+        self.chemin = chemin
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False, timeout=30)
+        self._verrou = threading.Lock()
+        self.connexion.executescript("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY,
+                jeu TEXT NOT NULL,
+                date TEXT NOT NULL,
+                analyse_le TEXT NOT NULL,
+                source TEXT,
+                empreinte TEXT,
+                score INTEGER NOT NULL,
+                nb_lignes INTEGER NOT NULL,
+                checks_ok INTEGER NOT NULL,
+                total_checks INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS analyses_jeu_date ON analyses (jeu, date);
+            CREATE UNIQUE INDEX IF NOT EXISTS analyses_empreinte ON analyses (jeu, empreinte);
+            CREATE TABLE IF NOT EXISTS checks (
+                analyse INTEGER NOT NULL REFERENCES analyses (id),
+                nom TEXT NOT NULL,
+                passed INTEGER NOT NULL,
+                severite TEXT NOT NULL,
+                PRIMARY KEY (analyse, nom)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS comptes (
+                analyse INTEGER NOT NULL REFERENCES analyses (id),
+                nom TEXT NOT NULL,
+                element TEXT NOT NULL,
+                valeur REAL NOT NULL,
+                PRIMARY KEY (analyse, nom, element)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS colonnes (
+                analyse INTEGER NOT NULL REFERENCES analyses (id),
+                colonne TEXT NOT NULL,
+                nb_na INTEGER NOT NULL,
+                centiles BLOB,
+                PRIMARY KEY (analyse, colonne)
+            ) WITHOUT ROWID;
+        """)
+        self.connexion.commit()
+
+    def __len__(self):
+        with self._verrou:
+            return self.connexion.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+    def enregistrer(self, analyseur, jeu=None, empreinte=None):
+        """Ajoute une analyse terminée; renvoie son id (None si cette empreinte est déjà enregistrée)."""
+        jeu = jeu or nom_jeu(analyseur.source)
+        resume = analyseur.resume()
+        profil = analyseur.profil
+        colonnes = []
+        numeriques = profil.colonnes_numeriques()
+        for col in profil.colonnes():
+            centiles = profil.repartition(col) if col in numeriques else None
+            colonnes.append((col, int(profil.nb_na(col)),
+                             None if centiles is None else np.asarray(centiles, dtype=np.float64).tobytes()))
+        with self._verrou, self.connexion:
+            if empreinte is not None and self.connexion.execute(
+                    "SELECT 1 FROM analyses WHERE jeu = ? AND empreinte = ?", (jeu, empreinte)).fetchone():
+                return None
+            curseur = self.connexion.execute(
+                "INSERT INTO analyses (jeu, date, analyse_le, source, empreinte, score, nb_lignes, checks_ok,"
+                " total_checks) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (jeu, date_analyse(analyseur), analyseur.timestamp.isoformat(timespec='seconds'),
+                 None if analyseur.source is None else str(analyseur.source), empreinte, int(resume['score']),
+                 int(resume['nb_lignes']), int(resume['checks_ok']), int(resume['total_checks'])))
+            analyse = curseur.lastrowid
+            self.connexion.executemany(
+                "INSERT INTO checks VALUES (?, ?, ?, ?)",
+                [(analyse, nom, int(bool(res['passed'])), res.get('severity', 'OK'))
+                 for nom, res in analyseur.resultats.items()])
+            self.connexion.executemany("INSERT OR REPLACE INTO comptes VALUES (?, ?, ?, ?)",
+                                       [(analyse, *ligne) for ligne in comptes(analyseur.resultats)])
+            self.connexion.executemany("INSERT INTO colonnes VALUES (?, ?, ?, ?)",
+                                       [(analyse, *ligne) for ligne in colonnes])
+        return analyse
+
+    def reference(self, jeu, avant, fenetre=FENETRE):
+        """Centiles des colonnes sur les `fenetre` dernières analyses du jeu datées avant `avant`.
+
+        Renvoie (nombre d'analyses, {colonne: [centiles, ...]}).
+        """
+        with self._verrou:
+            lignes = self.connexion.execute("""
+                SELECT c.analyse, c.colonne, c.centiles FROM colonnes c
+                JOIN (SELECT id FROM analyses WHERE jeu = ? AND date < ? ORDER BY date DESC LIMIT ?) a
+                  ON a.id = c.analyse
+                WHERE c.centiles IS NOT NULL
+            """, (jeu, avant, fenetre)).fetchall()
+        centiles = {}
+        for _, colonne, octets in lignes:
+            centiles.setdefault(colonne, []).append(np.frombuffer(octets, dtype=np.float64))
+        return len({analyse for analyse, _, _ in lignes}), centiles
+
+    def jeux(self):
+        with self._verrou:
+            return [ligne[0] for ligne in self.connexion.execute(
+                "SELECT jeu FROM analyses GROUP BY jeu ORDER BY MAX(date) DESC")]
+
+    def _lire(self, requete, jeu, depuis):
+        with self._verrou:
+            return pd.read_sql_query(requete, self.connexion, params=(jeu, depuis or ''), parse_dates=['date'])
+
+    def analyses(self, jeu, depuis=None):
+        """Une ligne par analyse du jeu (date, score, lignes, checks), par date croissante."""
+        return self._lire("SELECT * FROM analyses WHERE jeu = ? AND date >= ? ORDER BY date", jeu, depuis)
+
+    def checks(self, jeu, depuis=None):
+        return self._lire("""
+            SELECT a.date, c.nom, c.passed, c.severite FROM checks c JOIN analyses a ON a.id = c.analyse
+            WHERE a.jeu = ? AND a.date >= ? ORDER BY a.date
+        """, jeu, depuis)
+
+    def comptes(self, jeu, depuis=None):
+        return self._lire("""
+            SELECT a.date, c.nom, c.element, c.valeur FROM comptes c JOIN analyses a ON a.id = c.analyse
+            WHERE a.jeu = ? AND a.date >= ? ORDER BY a.date
+        """, jeu, depuis)
+
+    def fermer(self):
+        self.connexion.close()
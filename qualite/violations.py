@@ -0,0 +1,161 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from qualite import chaines, regles
+from qualite.dates import FORMAT_HEURE
+from qualite.doublons import empreintes
+
+
+class IndexLignes:
+    """Ensemble de positions de lignes: int32 triés s'il est creux, bitmap sinon.
+
+    Une position coûte 4 octets contre 1 bit par ligne pour le bitmap: au-delà
+    d'une ligne sur 32, le bitmap est plus petit (250 Ko pour 2M lignes, quel
+    que soit le nombre de lignes en violation).
+    """
+
+    def __init__(self, masque):
+        masque = np.asarray(masque, dtype=bool)
+        self.nb_lignes = len(masque)
+        self.nb = int(masque.sum())
+        if self.nb * 32 > self.nb_lignes:
+            self.bits, self.ids = np.packbits(masque), None
+        else:
+            self.bits, self.ids = None, np.flatnonzero(masque).astype(np.int32)
+
+    def __len__(self):
+        return self.nb
+
+    @property
+    def nbytes(self):
+        return (self.bits if self.ids is None else self.ids).nbytes
+
+    def bitmap(self):
+        if self.bits is not None:
+            return self.bits
+        masque = np.zeros(self.nb_lignes, dtype=bool)
+        masque[self.ids] = True
+        return np.packbits(masque)
+
+    def positions(self):
+        if self.ids is not None:
+            return self.ids
+        return np.flatnonzero(np.unpackbits(self.bits, count=self.nb_lignes))
+
+    def contient(self, positions):
+        if self.ids is None:
+            return (self.bits[positions >> 3] >> (7 - (positions & 7))) & 1 == 1
+        rang = np.searchsorted(self.ids, positions)
+        return (rang < len(self.ids)) & (self.ids[np.minimum(rang, len(self.ids) - 1)] == positions)
+
+
+class IndexViolations:
+    """Lignes en violation par (check, élément): règle, colonne ou paire de colonnes.
+
+    Construit une fois après l'analyse; les sélections (union ou intersection de
+    plusieurs entrées) se font sur les bitmaps, sans relancer de check.
+    """
+
+    def __init__(self, nb_lignes):
+        self.nb_lignes = nb_lignes
+        self.entrees = {}
+
+    def ajouter(self, check, element, masque):
+        if masque is not None:
+            index = IndexLignes(masque)
+            if len(index):
+                self.entrees[(check, element)] = index
+
+    def cles(self, check=None):
+        return [cle for cle in self.entrees if check is None or cle[0] == check]
+
+    @property
+    def nbytes(self):
+        return sum(index.nbytes for index in self.entrees.values())
+
+    def lignes(self, cles, mode='union'):
+        """Positions triées des lignes dans au moins une (union) ou toutes (intersection) les entrées."""
+        cles = list(cles)
+        if not cles:
+            return np.zeros(0, dtype=np.int64)
+        if len(cles) == 1:
+            return self.entrees[cles[0]].positions()
+        combiner = np.bitwise_or if mode == 'union' else np.bitwise_and
+        bits = self.entrees[cles[0]].bitmap()
+        for cle in cles[1:]:
+            bits = combiner(bits, self.entrees[cle].bitmap())
+        return np.flatnonzero(np.unpackbits(bits, count=self.nb_lignes))
+
+    def extraire(self, df, positions, cles):
+        """Lignes de `df` aux positions données, avec leur numéro et les entrées qu'elles violent."""
+        positions = np.asarray(positions)
+        table = df.iloc[positions]
+        violations = np.full(len(positions), '', dtype=object)
+        for cle in cles:
+            dedans = self.entrees[cle].contient(positions)
+            libelle = ' · '.join(map(str, cle))
+            violations[dedans] = [f"{v}, {libelle}" if v else libelle for v in violations[dedans]]
+        return table.assign(violations=violations).rename_axis('ligne').reset_index()
+
+    def page(self, df, positions, cles, numero, taille=100):
+        return self.extraire(df, positions[numero * taille:(numero + 1) * taille], cles)
+
+
+def index_violations(analyseur):
+    """Index des lignes en violation pour chaque check en échec d'un analyseur avec frame.
+
+    Seuls les checks qui comptent des lignes y figurent (distribution, fraîcheur et
+    complétude portent sur des colonnes entières); pour les strings, une ligne est
+    retenue si sa valeur a un défaut d'hygiène ou n'est pas la variante majoritaire
+    (casse, format de ticker).
+    """
+    df = analyseur.df
+    # profil figé ou extrapolé (scan rapide): masques recalculés sur le frame
+    profil = analyseur.profil_lignes()
+    index = IndexViolations(len(df))
+    for nom, resultat in analyseur.resultats.items():
+        if resultat['passed']:
+            continue
+        if nom == 'valeurs_manquantes':
+            for col in df.columns:
+                index.ajouter(nom, col, profil.masque_na(col).to_numpy())
+        elif nom == 'doublons':
+            if 'TradeID' in df.columns:
+                index.ajouter(nom, 'TradeID', df['TradeID'].duplicated().to_numpy())
+            else:
+                index.ajouter(nom, 'lignes', pd.Series(empreintes(df)).duplicated().to_numpy())
+        elif nom == 'outliers':
+            for col in resultat['detail']:
+                q1, q3 = profil.quantiles(col)
+                iqr = q3 - q1
+                x = profil.flottants(col).to_numpy(dtype=float)
+                index.ajouter(nom, col, (x < q1 - 1.5 * iqr) | (x > q3 + 1.5 * iqr))
+        elif nom in ('types', 'timestamps'):
+            format = FORMAT_HEURE if nom == 'timestamps' else None
+            for col in resultat['issues']:
+                dates = profil.dates(col, format)
+                non_nuls = ~profil.masque_na(col).to_numpy()
+                index.ajouter(nom, col, non_nuls if dates is None else non_nuls & dates.isna().to_numpy())
+        elif nom == 'dates':
+            if 'settlement_avant_trade' in resultat['issues']:
+                dates, fins = profil.dates('Date'), profil.dates('SettlementDate')
+                index.ajouter(nom, 'settlement_avant_trade', (fins < dates).to_numpy())
+        elif nom == 'strings':
+            for col in resultat['issues']:
+                index.ajouter(nom, col, chaines.lignes_en_defaut(df[col], col in chaines.COLONNES_TICKER))
+        elif nom in analyseur.regles.par_check:
+            for regle in analyseur.regles.par_check[nom]:
+                if regle.nom in resultat.get('issues', {}):
+                    index.ajouter(nom, regle.nom, regles.masque(profil, regle))
+    return index
+
+
+def exporter(table, format='csv'):
+    """Octets d'un export CSV ou Parquet."""
+    if format == 'parquet':
+        tampon = io.BytesIO()
+        table.to_parquet(tampon, index=False)
+        return tampon.getvalue()
+    return table.to_csv(index=False).encode('utf-8')
@@ -0,0 +1,83 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_dataset import generer
+from qualite.regles import PLAN_DEFAUT, charger_regles
+
+# règles qui passent par toutes les familles: dates comparées, comparaison numérique, ensemble interdit
+REGLES = PLAN_DEFAUT.etendre(charger_regles([
+    {"nom": "reglement_apres_trade", "check": "dates_metier", "type": "comparaison", "gauche": "SettlementDate",
+     "operateur": ">=", "droite": "Date", "dates": True},
+    {"nom": "commission_sous_prix", "check": "dates_metier", "type": "comparaison", "gauche": "Commission",
+     "operateur": "<", "droite": "Price"},
+    {"nom": "contreparties_exclues", "check": "categoriques", "type": "valeurs", "colonne": "Counterparty",
+     "interdites": ["UBS", "Nomura"]},
+]))
+
+# quelques lignes avec un défaut de chaque sorte: espaces, casse, dates invalides, heures hors plage, doublons
+SALE = """\
+TradeID,Date,Instrument,TradeType,Quantity,Price,Value,Counterparty,Status,Commission,EntryTime,SettlementDate,CreatedAt
+T1,2024-01-05, EUR/USD,SPOT,100,1.1,110,BNP ,EXECUTED,0.001,09:00:00,2024-01-06,2024-01-05 10:00:00
+T2,2024-01-06,eur/usd,XXX,0,0,5,,BAD,2,25:00:00,2024-01-01,notadate
+T2,notadate,EURUSD.FX,SPOT,-5,-1,5,UBS,PENDING,-1,xx,2024-01-07,
+T4,,GBP/USD,FORWARD,,2,3,UBS,SETTLED,,10:00:00,,2024-01-05
+T5,2024-01-08,GBP/USD,SWAP,1e9,1.3,1.3e9,ubs,SETTLED,0.002,11:30:00,2024-01-09,2024-01-08 12:00:00
+"""
+
+
+def salir(df, graine=0):
+    """Copie du frame avec les défauts que les checks cherchent: dates, espaces, nulls, doublons."""
+    rng = np.random.default_rng(graine)
+    df = df.copy()
+    n = len(df)
+
+    def lignes(part):
+        return rng.choice(n, max(1, int(n * part)), replace=False)
+
+    df.loc[lignes(0.001), 'Date'] = '31/02/2024'
+    df.loc[lignes(0.001), 'SettlementDate'] = '2023-01-01'
+    df.loc[lignes(0.001), 'EntryTime'] = '25:61:00'
+    df.loc[lignes(0.002), 'Counterparty'] = ' ' + df['Counterparty'].iloc[0]
+    df.loc[lignes(0.001), 'Instrument'] = 'eurusd\t'
+    df.loc[lignes(0.001), 'Status'] = 'EXECUTED '
+    for col in ('Quantity', 'Price', 'Counterparty', 'Instrument'):
+        df.loc[lignes(0.003), col] = np.nan
+    df.loc[lignes(0.001), 'Price'] = 0
+    df.loc[lignes(0.001), 'Commission'] = -1
+    return pd.concat([df, df.iloc[lignes(0.002)]], ignore_index=True)
+
+
+@pytest.fixture(scope='session')
+def trades():
+    """Trades synthétiques (anomalies du générateur comprises), partagés par tous les tests."""
+    return generer(3000, graine=7)
+
+
+@pytest.fixture(scope='session')
+def sale(trades):
+    """Trades avec les défauts injectés par salir()."""
+    return salir(trades)
+
+
+@pytest.fixture
+def fichiers(tmp_path, trades):
+    """Variantes de fichiers qui mettent les checks en défaut, par nom."""
+    chemins = {nom: str(tmp_path / f'{nom}.csv') for nom in ('trades', 'sale', 'vide', 'infinis', 'colonne_vide')}
+    trades.to_csv(chemins['trades'], index=False)
+    with open(chemins['sale'], 'w') as f:
+        f.write(SALE)
+    trades.head(0).to_csv(chemins['vide'], index=False)
+    infinis = trades.copy()
+    infinis.loc[[5, 40], 'Price'] = np.inf
+    infinis.loc[7, 'Quantity'] = -np.inf
+    infinis.to_csv(chemins['infinis'], index=False)
+    trades.assign(Counterparty=None).to_csv(chemins['colonne_vide'], index=False)
+    chemins['parquet'] = str(tmp_path / 'trades.parquet')
+    trades.to_parquet(chemins['parquet'], index=False)
+    return chemins
@@ -0,0 +1,80 @@
+import os
+import threading
+
+from qualite import AnalyseurQualite
+from qualite.cache import CacheAnalyses, empreinte_contenu
+
+
+def analyseur(trades, n=200):
+    analyseur = AnalyseurQualite(trades.head(n))
+    analyseur.analyser_tout()
+    return analyseur
+
+
+def test_empreinte_contenu_et_configuration():
+    assert empreinte_contenu(b'abc') == empreinte_contenu(b'abc')
+    assert empreinte_contenu(b'abc', {'a': 1}) != empreinte_contenu(b'abc', {'a': 2})
+    # ordre des réglages indifférent
+    assert empreinte_contenu(b'abc', {'a': 1, 'b': 2}) == empreinte_contenu(b'abc', {'b': 2, 'a': 1})
+
+
+def test_lru_capacite(trades):
+    cache = CacheAnalyses(capacite=2)
+    a, b, c = (analyseur(trades) for _ in range(3))
+    cache.put('a', a)
+    cache.put('b', b)
+    assert cache.get('a') is a
+    cache.put('c', c)
+    # b, le moins récemment lu, est évincé
+    assert cache.get('b') is None and cache.get('a') is a and cache.get('c') is c
+    assert cache.evictions == 1 and cache.misses == 1
+
+
+def test_budget_memoire(trades):
+    petit, gros = analyseur(trades, 100), analyseur(trades, 3000)
+    cache = CacheAnalyses(capacite=8, budget_mb=1e-3)
+    cache.put('petit', petit)
+    cache.put('gros', gros)
+    # le plus récent reste même s'il dépasse le budget à lui seul
+    assert len(cache) == 1 and cache.get('gros') is gros
+
+
+def test_disque_relu_puis_garde_en_memoire(tmp_path, trades):
+    repertoire = str(tmp_path)
+    CacheAnalyses(repertoire=repertoire).put('cle', analyseur(trades))
+    cache = CacheAnalyses(repertoire=repertoire)
+    relu = cache.get('cle')
+    assert relu.df is None and relu.resultats
+    assert len(cache) == 1
+    os.remove(os.path.join(repertoire, 'cle.pkl'))
+    assert cache.get('cle') is relu
+
+
+def test_disque_borne(tmp_path, trades):
+    cache = CacheAnalyses(repertoire=str(tmp_path), capacite_disque=2)
+    a = analyseur(trades)
+    for cle in ('a', 'b', 'c'):
+        cache.put(cle, a)
+    assert sorted(os.listdir(tmp_path)) == ['b.pkl', 'c.pkl']
+
+
+def test_ecritures_concurrentes(tmp_path, trades):
+    cache = CacheAnalyses(repertoire=str(tmp_path))
+    a = analyseur(trades)
+    erreurs = []
+
+    def ecrire():
+        try:
+            for _ in range(20):
+                cache.put('meme_cle', a)
+        except Exception as e:
+            erreurs.append(e)
+
+    threads = [threading.Thread(target=ecrire) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not erreurs
+    assert os.listdir(tmp_path) == ['meme_cle.pkl']
+    assert CacheAnalyses(repertoire=str(tmp_path)).get('meme_cle').resultats == a.resultats
@@ -0,0 +1,77 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from qualite.cli import main
+
+
+def resume(sortie):
+    with open(os.path.join(sortie, 'resume.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_lot_et_rapports(fichiers, tmp_path, capsys):
+    sortie = str(tmp_path / 'rapports')
+    code = main([fichiers['trades'], fichiers['sale'], '--sortie', sortie, '--format', 'json', 'html',
+                 '--workers', '1'])
+    assert code == 0
+    synthese = resume(sortie)
+    assert synthese['nb_fichiers'] == 2 and not synthese['erreurs']
+    for ligne in synthese['fichiers']:
+        assert [os.path.basename(r) for r in ligne['rapports']] == [
+            os.path.basename(ligne['fichier']) + '.json', os.path.basename(ligne['fichier']) + '.html']
+        assert all(os.path.exists(r) for r in ligne['rapports'])
+    with open(synthese['fichiers'][0]['rapports'][0], encoding='utf-8') as f:
+        assert json.load(f)
+    assert capsys.readouterr().out.count('OK ') == 2
+
+
+def test_seuil_non_atteint(fichiers, tmp_path, capsys):
+    sortie = str(tmp_path / 'rapports')
+    assert main([fichiers['sale'], '--sortie', sortie, '--seuil', '100.1']) == 1
+    assert resume(sortie)['sous_seuil'] == [fichiers['sale']]
+    assert capsys.readouterr().out.startswith('KO ')
+
+
+def test_fichier_illisible(tmp_path, capsys):
+    illisible = tmp_path / 'illisible.csv'
+    illisible.write_bytes(b'')
+    sortie = str(tmp_path / 'rapports')
+    assert main([str(illisible), '--sortie', sortie]) == 1
+    assert resume(sortie)['erreurs'] == [str(illisible)]
+    assert capsys.readouterr().out.startswith('ERREUR ')
+
+
+def test_aucun_fichier(tmp_path):
+    assert main([str(tmp_path / '*.csv'), '--sortie', str(tmp_path / 'rapports')]) == 2
+
+
+def test_check_inconnu(fichiers, tmp_path):
+    with pytest.raises(SystemExit) as sortie:
+        main([fichiers['trades'], '--checks', 'inexistant', '--sortie', str(tmp_path)])
+    assert sortie.value.code == 2
+
+
+def test_repertoire_en_parallele_compresse(fichiers, tmp_path):
+    sortie = str(tmp_path / 'rapports')
+    # répertoire des fichiers de test: CSV et Parquet, le fichier vide compris
+    code = main([os.path.dirname(fichiers['trades']), '--sortie', sortie, '--format', 'ndjson', '--gzip',
+                 '--workers', '2', '--taille-bloc', '1000'])
+    synthese = resume(sortie)
+    assert code == 0 and synthese['nb_fichiers'] == len(fichiers)
+    for ligne in synthese['fichiers']:
+        with gzip.open(ligne['rapports'][0], 'rt', encoding='utf-8') as f:
+            assert all(json.loads(ligne_ndjson) for ligne_ndjson in f)
+
+
+def test_python_m_qualite(fichiers, tmp_path):
+    sortie = str(tmp_path / 'rapports')
+    racine = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    execution = subprocess.run([sys.executable, '-m', 'qualite', fichiers['sale'], '--sortie', sortie,
+                                '--seuil', '100.1'], cwd=racine, capture_output=True, text=True)
+    assert execution.returncode == 1
+    assert os.path.exists(os.path.join(sortie, 'sale.csv.json'))
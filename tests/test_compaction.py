@@ -0,0 +1,18 @@
+import pandas as pd
+
+from conftest import REGLES
+from qualite import AnalyseurQualite
+from qualite.compaction import compacter
+
+
+def analyser(df):
+    analyseur = AnalyseurQualite(df, regles=REGLES)
+    analyseur.analyser_tout()
+    return analyseur
+
+
+def test_compaction_sans_effet_sur_les_resultats(sale):
+    compact, rapport = compacter(sale)
+    assert rapport['apres'] < rapport['avant']
+    assert any(isinstance(compact[col].dtype, pd.CategoricalDtype) for col in compact.columns)
+    assert repr(analyser(compact).resultats) == repr(analyser(sale).resultats)
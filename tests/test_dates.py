@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from qualite import AnalyseurQualite, flux
+from qualite.chargement import charger
+from qualite.dates import FORMAT_HEURE, detecter_format, parser_dates
+from qualite.flux import analyser_csv
+
+
+def analyser(chemin):
+    analyseur = AnalyseurQualite(charger(chemin, chemin))
+    analyseur.analyser_tout()
+    return analyseur
+
+
+def test_detecter_format():
+    assert detecter_format(['2024-01-05', '2024-12-31']) == '%Y-%m-%d'
+    # à égalité le jour passe avant le mois; un jour > 12 tranche
+    assert detecter_format(['05/01/2024', '06/02/2024']) == '%d/%m/%Y'
+    assert detecter_format(['05/01/2024', '01/31/2024', '02/28/2024']) == '%m/%d/%Y'
+    assert detecter_format(['pas une date', 'x']) is None
+
+
+def test_parser_dates_comme_to_datetime():
+    s = pd.Series(['2024-01-05', None, '2024-02-30', '2024-01-05', 'x', '2024-03-01'])
+    dates, format, nb_invalides = parser_dates(s)
+    assert format == '%Y-%m-%d'
+    # 30 février et 'x': non parsables; la valeur nulle n'est pas comptée
+    assert nb_invalides == 2
+    attendu = pd.to_datetime(s, format=format, errors='coerce')
+    assert dates.equals(attendu)
+
+
+def test_parser_dates_format_impose_et_heures():
+    dates, format, nb_invalides = parser_dates(pd.Series(['09:00:00', '25:61:00', '17:59:59']), FORMAT_HEURE)
+    assert format == FORMAT_HEURE and nb_invalides == 1
+    assert dates.isna().tolist() == [False, True, False]
+
+
+def test_parser_dates_sans_format():
+    dates, format, nb_invalides = parser_dates(pd.Series(['abc', 'def', None]))
+    assert dates is None and format is None and nb_invalides == 2
+
+
+def test_parser_dates_deja_datetime():
+    s = pd.Series(pd.to_datetime(['2024-01-01', None]))
+    dates, _, nb_invalides = parser_dates(s)
+    assert dates is s and nb_invalides == 0
+
+
+def test_parser_dates_categorie():
+    s = pd.Series(['2024-01-05', '2024-01-06', '2024-01-05', np.nan], dtype='category')
+    dates, _, nb_invalides = parser_dates(s)
+    assert nb_invalides == 0
+    assert dates.tolist()[:3] == list(pd.to_datetime(['2024-01-05', '2024-01-06', '2024-01-05']))
+
+
+def test_dates_format_du_fichier(tmp_path, trades, monkeypatch):
+    # dates mm/jj/aaaa: un bloc de 3 lignes aux jours tous <= 12 se lirait en jj/mm (premier format essayé)
+    df = trades.head(300).copy()
+    for col in ('Date', 'SettlementDate'):
+        df[col] = df[col].str.replace(r'(\d{4})-(\d{2})-(\d{2})', r'\2/\3/\1', regex=True)
+    chemin = str(tmp_path / 'dates.csv')
+    df.to_csv(chemin, index=False)
+    # échantillon plus court que le fichier: les blocs suivants reprennent le format détecté
+    monkeypatch.setattr(flux, 'TAILLE_ECHANTILLON', 30)
+    en_flux = analyser_csv(chemin, 3)
+    en_memoire = analyser(chemin)
+    assert en_flux.resultats['types']['passed']
+    for nom in ('types', 'dates', 'fraicheur'):
+        assert repr(en_flux.resultats[nom]) == repr(en_memoire.resultats[nom])
+    assert en_flux.profil.formats_dates['Date'] == '%m/%d/%Y'
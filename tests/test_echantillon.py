@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from qualite import AnalyseurQualite
+from qualite.echantillon import codes_strates, echantillon_stratifie, estimer, intervalle
+
+
+def test_allocation_proportionnelle(sale):
+    echantillon = echantillon_stratifie(sale, 500)
+    assert abs(len(echantillon) - 500) < 30 and echantillon.index.is_monotonic_increasing
+    # chaque strate garde sa part, à l'arrondi tiré au sort près
+    fraction = 500 / len(sale)
+    tailles = np.bincount(codes_strates(sale))
+    tirees = np.bincount(codes_strates(sale)[sale.index.get_indexer(echantillon.index)], minlength=len(tailles))
+    assert (np.abs(tirees - tailles * fraction) < 1).all()
+    assert echantillon_stratifie(sale, len(sale)) is sale
+
+
+def test_wilson():
+    # 10 sur 100: intervalle de Wilson à 95 % [5.52 %, 17.44 %], population quasi infinie
+    estimation, bas, haut = intervalle(10, 100, 10**9)
+    assert estimation == 10**8
+    assert bas / 10**9 == pytest.approx(0.0552, abs=1e-4) and haut / 10**9 == pytest.approx(0.1744, abs=1e-4)
+    # aucun défaut vu: l'estimation reste à zéro, pas la borne haute
+    assert intervalle(0, 100, 10**6)[:2] == (0, 0) and intervalle(0, 100, 10**6)[2] > 0
+    # tout le frame lu: exact
+    assert intervalle(7, 100, 100) == (7, 7, 7)
+
+
+@pytest.mark.parametrize('proportion', [0.002, 0.05, 0.3])
+def test_couverture(proportion):
+    rng = np.random.default_rng(0)
+    nb_lignes, n = 50_000, 2_000
+    defauts = int(nb_lignes * proportion)
+    tirages = rng.hypergeometric(defauts, nb_lignes - defauts, n, size=2_000)
+    couverts = [bas <= defauts <= haut for _, bas, haut in (intervalle(int(x), n, nb_lignes) for x in tirages)]
+    # Wilson oscille autour du niveau nominal quand peu de défauts sont attendus (4 ici à 0.2 %)
+    assert np.mean(couverts) >= 0.92
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_estimer(sale):
+    estimation = estimer(sale, 1_000)
+    assert not estimation.exact and estimation.nb_lignes == len(sale)
+    assert estimation.score_bas <= estimation.analyseur.score_qualite() <= estimation.score_haut
+    # comptes extrapolés entiers: les checks de chaînes les regroupent par valeur
+    assert 'strings' in estimation.analyseur.resultats
+    assert (estimation.tableau()['bas'] <= estimation.tableau()['haut']).all()
+
+
+def test_estimer_exact(sale):
+    estimation = estimer(sale, len(sale))
+    analyseur = AnalyseurQualite(sale)
+    analyseur.analyser_tout()
+    assert estimation.exact and estimation.score_bas == estimation.score_haut == analyseur.score_qualite()
@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from conftest import REGLES
+from qualite import AnalyseurQualite, execution
+
+
+def analyser(df, **options):
+    analyseur = AnalyseurQualite(df, regles=REGLES, **options)
+    analyseur.analyser_tout()
+    return analyseur
+
+
+@pytest.mark.parametrize('execution', ['threads', 'processus'])
+@pytest.mark.parametrize('nb_workers', [2, 3])
+def test_parallele_comme_serie(sale, execution, nb_workers):
+    serie = analyser(sale)
+    parallele = analyser(sale, execution=execution, nb_workers=nb_workers)
+    assert repr(parallele.resultats) == repr(serie.resultats)
+    assert parallele.score_qualite() == serie.score_qualite()
+
+
+def test_parallele_frame_plus_petit_que_les_blocs(sale):
+    # moins de lignes que de workers: des blocs vides
+    petit = sale.head(2)
+    assert repr(analyser(petit, execution='threads', nb_workers=4).resultats) == repr(analyser(petit).resultats)
+
+
+def test_pas_de_frame_retenu_apres_le_pool(sale):
+    analyser(sale, execution='processus', nb_workers=2)
+    assert execution._df_worker is None
+
+
+def test_pas_de_fork_depuis_un_processus_multi_thread(sale):
+    # comme depuis un worker du service: d'autres threads tournent
+    arret = threading.Event()
+    voisin = threading.Thread(target=arret.wait)
+    voisin.start()
+    try:
+        assert execution.methode_demarrage() in ('forkserver', 'spawn')
+        resultat = {}
+        thread = threading.Thread(target=lambda: resultat.update(
+            analyseur=analyser(sale, execution='processus', nb_workers=2)))
+        thread.start()
+        thread.join()
+    finally:
+        arret.set()
+        voisin.join()
+    assert repr(resultat['analyseur'].resultats) == repr(analyser(sale).resultats)
+    assert execution._df_worker is None
@@ -0,0 +1,45 @@
+import pytest
+
+from qualite import AnalyseurQualite
+from qualite.chargement import charger
+from qualite.flux import analyser_csv
+
+
+def analyser(chemin):
+    analyseur = AnalyseurQualite(charger(chemin, chemin))
+    analyseur.analyser_tout()
+    return analyseur
+
+
+def exacts(analyseur):
+    # les checks servis par une esquisse (outliers) ne sont qu'approchés en flux
+    return {nom: repr(resultat) for nom, resultat in analyseur.resultats.items() if nom not in analyseur.approximatifs}
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+@pytest.mark.parametrize('nom', ['trades', 'sale', 'vide', 'infinis', 'colonne_vide'])
+@pytest.mark.parametrize('taille_bloc', [250, 100_000])
+def test_flux_comme_en_memoire(fichiers, nom, taille_bloc):
+    en_flux = analyser_csv(fichiers[nom], taille_bloc)
+    en_memoire = analyser(fichiers[nom])
+    assert set(en_flux.resultats) == set(en_memoire.resultats)
+    assert exacts(en_flux) == {nom: r for nom, r in exacts(en_memoire).items() if nom not in en_flux.approximatifs}
+
+
+def test_flux_blocs_d_une_ligne(fichiers):
+    en_flux = analyser_csv(fichiers['sale'], 1)
+    assert exacts(en_flux) == {nom: r for nom, r in exacts(analyser(fichiers['sale'])).items()
+                               if nom not in en_flux.approximatifs}
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_fichier_vide(fichiers):
+    analyseur = analyser_csv(fichiers['vide'], 7)
+    assert analyseur.profil.nb_lignes() == 0
+    assert set(analyseur.resultats) == set(analyseur.checks)
+
+
+def test_colonne_vide(fichiers):
+    analyseur = analyser_csv(fichiers['colonne_vide'], 500)
+    assert analyseur.resultats['valeurs_manquantes']['by_column']['Counterparty'] == 100.0
+    assert not analyseur.resultats['integrite']['passed']
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from qualite import AnalyseurQualite
+from qualite.groupes import VIDE
+
+
+def analyser(df):
+    analyseur = AnalyseurQualite(df)
+    analyseur.analyser_tout()
+    return analyseur
+
+
+@pytest.fixture(scope='module')
+def analyseur(sale):
+    return analyser(sale)
+
+
+def test_parts_comme_pandas(analyseur, sale):
+    table = analyseur.groupes('Counterparty')
+    groupes = sale['Counterparty'].fillna(VIDE)
+    assert table['lignes'].to_dict() == groupes.value_counts().to_dict()
+    manquantes = sale.isna().any(axis=1).groupby(groupes).mean() * 100
+    assert np.allclose(table['valeurs_manquantes'], manquantes[table.index])
+    # contrepartie absente: toutes les lignes du groupe manquent
+    assert table.loc[VIDE, 'valeurs_manquantes'] == 100
+    assert 'derive' not in table and 'distribution' not in table
+
+
+def test_par_mois(analyseur, sale):
+    table = analyseur.groupes('Date', 'mois')
+    mois = pd.to_datetime(sale['Date'], format='%Y-%m-%d', errors='coerce').dt.to_period('M')
+    attendu = mois.astype(str).where(mois.notna(), VIDE).value_counts()
+    assert table['lignes'].to_dict() == attendu.to_dict()
+    # mémorisé par colonne et période
+    assert analyseur.groupes('Date', 'mois') is table
+
+
+def test_groupe_sans_violation(analyseur, sale):
+    index = analyseur.violations()
+    propres = np.setdiff1d(np.arange(len(sale)), index.lignes(index.cles()))
+    desk = np.full(len(sale), 'autre', dtype=object)
+    desk[propres] = 'propre'
+    table = analyser(sale.assign(Desk=desk)).groupes('Desk')
+    assert table.loc['propre', 'score'] == 100
+    assert (table.loc['propre'].drop(['lignes', 'score']) == 0).all()
+    assert table.loc['autre', 'score'] < 100
+
+
+def test_sans_frame(analyseur):
+    assert analyseur.figer().groupes('Counterparty') is None
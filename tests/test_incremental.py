@@ -0,0 +1,61 @@
+import io
+
+import pytest
+
+from qualite.flux import analyser_csv
+from qualite.incremental import _LectureBornee, analyser_increment
+
+
+def exacts(analyseur):
+    return {nom: repr(resultat) for nom, resultat in analyseur.resultats.items() if nom not in analyseur.approximatifs}
+
+
+@pytest.fixture
+def debut(tmp_path, trades):
+    """Fichier des 2000 premiers trades et état de sa passe complète."""
+    chemin = str(tmp_path / 'trades.csv')
+    trades.head(2000).to_csv(chemin, index=False)
+    _, etat, nb_lignes, mode = analyser_increment(chemin, taille_bloc=700)
+    assert (nb_lignes, mode) == (2000, 'complet')
+    return chemin, etat
+
+
+def test_ajout_comme_passe_complete(debut, trades):
+    chemin, etat = debut
+    trades.iloc[2000:].to_csv(chemin, index=False, header=False, mode='a')
+    analyseur, etat, nb_lignes, mode = analyser_increment(chemin, etat, taille_bloc=700)
+    assert (nb_lignes, mode) == (1000, 'increment')
+    complet = analyser_csv(chemin, 700)
+    assert exacts(analyseur) == exacts(complet)
+    assert analyseur.score_qualite() == complet.score_qualite()
+
+    _, _, nb_lignes, mode = analyser_increment(chemin, etat, taille_bloc=700)
+    assert (nb_lignes, mode) == (0, 'inchange')
+
+
+def test_prefixe_modifie(debut, trades):
+    chemin, etat = debut
+    df = trades.copy()
+    df.loc[3, 'Price'] = 0
+    df.to_csv(chemin, index=False)
+    _, _, nb_lignes, mode = analyser_increment(chemin, etat, taille_bloc=700)
+    assert (nb_lignes, mode) == (3000, 'complet')
+
+
+def test_derniere_ligne_incomplete(debut):
+    chemin, etat = debut
+    with open(chemin, 'rb+') as f:
+        f.truncate(f.seek(0, 2) - 1)
+    _, etat, _, _ = analyser_increment(chemin, taille_bloc=700)
+    assert not etat.fin_de_ligne
+    # la ligne coupée a pu être lue tronquée: l'ajout suivant repart de zéro
+    with open(chemin, 'ab') as f:
+        f.write(b'\n')
+    _, _, _, mode = analyser_increment(chemin, etat, taille_bloc=700)
+    assert mode == 'complet'
+
+
+def test_lecture_bornee():
+    source = io.BytesIO(b'a,b\n1,2\n3,4\n')
+    # les octets écrits après la mesure de la taille ne sont pas lus
+    assert io.BufferedReader(_LectureBornee(source, 8)).read() == b'a,b\n1,2\n'
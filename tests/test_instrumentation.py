@@ -0,0 +1,55 @@
+import threading
+import time
+import tracemalloc
+
+from qualite import AnalyseurQualite
+from qualite.instrumentation import Chrono, tableau
+
+
+def test_cpu_du_thread_seul():
+    # un thread voisin qui calcule ne compte pas dans le CPU d'un bloc qui dort
+    arret = threading.Event()
+
+    def calculer():
+        while not arret.is_set():
+            sum(range(1000))
+
+    voisin = threading.Thread(target=calculer)
+    voisin.start()
+    try:
+        with Chrono(horloge='thread') as chrono:
+            time.sleep(0.2)
+    finally:
+        arret.set()
+        voisin.join()
+    assert chrono.mesures['horloge_cpu'] == 'thread'
+    assert chrono.mesures['cpu'] < 0.05
+
+
+def test_tableau_sans_memoire(trades):
+    analyseur = AnalyseurQualite(trades)
+    analyseur.analyser_tout()
+    assert all(mesures['horloge_cpu'] == 'thread' for mesures in analyseur.performances.values())
+    table = tableau(analyseur.performances)
+    assert list(table.columns) == ['temps', 'cpu', 'horloge_cpu', 'lignes_s']
+
+
+def test_tracemalloc_demarre_pendant_le_bloc():
+    # profilage lancé par une autre session pendant qu'une analyse est chronométrée
+    try:
+        with Chrono() as chrono:
+            tracemalloc.start()
+    finally:
+        tracemalloc.stop()
+    assert chrono.mesures['memoire_mb'] is None
+
+
+def test_pic_memoire_sous_tracemalloc():
+    tracemalloc.start()
+    try:
+        with Chrono() as chrono:
+            tampon = bytearray(8 * 1024**2)
+        del tampon
+    finally:
+        tracemalloc.stop()
+    assert chrono.mesures['memoire_mb'] >= 8
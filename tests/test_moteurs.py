@@ -0,0 +1,38 @@
+import pytest
+
+from conftest import REGLES
+from qualite import AnalyseurQualite
+from qualite.chargement import charger
+from qualite.requetes import analyser_requetes
+
+
+def analyser_pandas(chemin, regles=None):
+    analyseur = AnalyseurQualite(charger(chemin, chemin), regles=regles)
+    analyseur.analyser_tout()
+    return analyseur
+
+
+# repr plutôt que ==: un NaN dans un résultat ne serait jamais égal à lui-même
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+@pytest.mark.parametrize('nom', ['trades', 'sale', 'vide', 'infinis', 'colonne_vide', 'parquet'])
+def test_duckdb_comme_pandas(fichiers, nom):
+    chemin = fichiers[nom]
+    assert repr(analyser_requetes(chemin).resultats) == repr(analyser_pandas(chemin).resultats)
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+@pytest.mark.parametrize('nom', ['trades', 'sale', 'vide', 'infinis', 'parquet'])
+def test_duckdb_comme_pandas_avec_regles(fichiers, nom):
+    chemin = fichiers[nom]
+    duckdb_ = analyser_requetes(chemin, regles=REGLES)
+    pandas_ = analyser_pandas(chemin, regles=REGLES)
+    assert repr(duckdb_.resultats) == repr(pandas_.resultats)
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_vide_sans_erreur(fichiers):
+    analyseur = analyser_requetes(fichiers['vide'])
+    assert analyseur.profil.nb_lignes() == 0
+    assert set(analyseur.resultats) == set(analyseur.checks)
+    # aucune ligne: pourcentages à 0, pas de division par zéro
+    assert set(analyseur.resultats['valeurs_manquantes']['by_column'].values()) == {0}
@@ -0,0 +1,76 @@
+import gzip
+import json
+
+import pytest
+
+from qualite import AnalyseurQualite
+from qualite.rapport import _par_blocs, ecrire_rapport, rapport_html, rapport_json, rapport_octets
+
+
+@pytest.fixture(scope='module')
+def analyseur(sale):
+    analyseur = AnalyseurQualite(sale, source='<sale>.csv')
+    analyseur.analyser_tout()
+    return analyseur
+
+
+def entrees(analyseur):
+    # (check, champ) -> nombre d'entrées des sections de détail
+    return {(nom, champ): len(v) for nom, res in analyseur.resultats.items()
+            for champ, v in res.items() if isinstance(v, (dict, list, tuple))}
+
+
+def test_json(analyseur):
+    rapport = json.loads(rapport_json(analyseur, 1.5))
+    assert rapport['fichier'] == '<sale>.csv' and rapport['temps'] == 1.5
+    assert rapport['score'] == analyseur.score_qualite()
+    assert {nom: res['passed'] for nom, res in rapport['resultats'].items()} == {
+        nom: bool(res['passed']) for nom, res in analyseur.resultats.items()}
+    assert 'tronques' not in rapport
+
+
+def test_json_tronque(analyseur):
+    rapport = json.loads(rapport_json(analyseur, 0, limite=1))
+    longues = {cle: n for cle, n in entrees(analyseur).items() if n > 1}
+    assert longues
+    assert {(nom, champ): n for nom, champs in rapport['tronques'].items() for champ, n in champs.items()} == longues
+    for nom, champ in longues:
+        assert len(rapport['resultats'][nom][champ]) == 1
+
+
+@pytest.mark.parametrize('limite', [None, 2])
+def test_ndjson(analyseur, limite):
+    lignes = [json.loads(ligne) for ligne in rapport_octets(analyseur, 0, 'ndjson', limite=limite).decode().splitlines()]
+    assert lignes[0]['type'] == 'resume'
+    assert [ligne['nom'] for ligne in lignes if ligne['type'] == 'check'] == list(analyseur.resultats)
+    details = {}
+    for ligne in lignes:
+        if ligne['type'] == 'detail':
+            details[(ligne['check'], ligne['champ'])] = details.get((ligne['check'], ligne['champ']), 0) + 1
+    assert details == {cle: n if limite is None else min(n, limite) for cle, n in entrees(analyseur).items() if n}
+
+
+def test_html(analyseur):
+    html = rapport_html(analyseur, 0, limite=1)
+    # source échappée, une section par check, détail tronqué signalé
+    assert '&lt;sale&gt;.csv' in html and '<sale>' not in html
+    assert html.count('class="check ') == len(analyseur.resultats)
+    assert 'entrée(s) de plus' in html
+    assert html.rstrip().endswith('</html>')
+
+
+@pytest.mark.parametrize('format', ['html', 'json', 'ndjson'])
+def test_gzip_et_fichier(analyseur, format, tmp_path):
+    brut = rapport_octets(analyseur, 0, format)
+    assert gzip.decompress(rapport_octets(analyseur, 0, format, compression=True)) == brut
+    chemin = str(tmp_path / f'rapport.{format}')
+    ecrire_rapport(analyseur, 0, chemin, format)
+    with open(chemin, 'rb') as f:
+        assert f.read() == brut
+
+
+def test_par_blocs():
+    fragments = [str(i) * (i % 7) for i in range(1000)]
+    blocs = list(_par_blocs(fragments, taille=100))
+    assert "".join(blocs) == "".join(fragments)
+    assert all(len(bloc) >= 100 for bloc in blocs[:-1])
@@ -0,0 +1,128 @@
+import json
+
+import numpy as np
+import pytest
+
+from conftest import salir
+from qualite import AnalyseurQualite
+from qualite.profil import ProfilColonnes
+from qualite.regles import PLAN_DEFAUT, SEUILS_DIRECTS, charger_regles, masque
+
+# une règle de chaque famille, plusieurs par passe: toutes les tolérances, tous les opérateurs,
+# plus de seuils sur Price que SEUILS_DIRECTS (recherche dichotomique)
+DEFINITIONS = (
+    [{"nom": f"prix_{i}", "check": "ranges", "type": "intervalle", "colonne": "Price",
+      "min": round(0.5 + i * 0.02, 2), "max": round(1.9 - i * 0.02, 2)} for i in range(SEUILS_DIRECTS + 4)]
+    + [{"nom": "quantite_positive", "check": "ranges", "type": "intervalle", "colonne": "Quantity", "min": 0},
+       {"nom": "prix_ronds", "check": "ranges", "type": "valeurs", "colonne": "Price", "interdites": [0, 1]},
+       {"nom": "statuts", "check": "categoriques", "type": "valeurs", "colonne": "Status",
+        "autorisees": ["EXECUTED", "PENDING", "SETTLED"]},
+       {"nom": "contreparties", "check": "categoriques", "type": "valeurs", "colonne": "Counterparty",
+        "interdites": ["UBS", "Pictet"]},
+       {"nom": "calcul_1", "check": "calculs", "type": "identite", "resultat": "Value",
+        "facteurs": ["Quantity", "Price"], "tolerance": 0.01},
+       {"nom": "calcul_10", "check": "calculs", "type": "identite", "resultat": "Value",
+        "facteurs": ["Quantity", "Price"], "tolerance": 0.1},
+       {"nom": "somme", "check": "calculs", "type": "identite", "resultat": "Value",
+        "facteurs": ["Quantity", "Price"], "operation": "somme"}]
+    + [{"nom": f"commission_{op}", "check": "metier", "type": "comparaison", "gauche": "Commission",
+        "operateur": op, "droite": "Price"} for op in ['<', '<=', '>', '>=', '==', '!=']]
+    + [{"nom": "reglement", "check": "metier", "type": "comparaison", "gauche": "SettlementDate",
+        "operateur": ">=", "droite": "Date", "dates": True},
+       {"nom": "contrepartie_requise", "check": "integrite", "type": "non_nul", "colonne": "Counterparty"}]
+)
+
+
+@pytest.fixture(scope='module')
+def sale_regles(trades):
+    df = salir(trades)
+    df.loc[:9, 'Price'] = [0, 1, 1, 0.5, 1.9, 0.52, np.nan, 0, -1, 2]
+    df.loc[:5, 'Commission'] = df.loc[:5, 'Price']
+    return df
+
+
+def test_passes_groupees_comme_regle_par_regle(sale_regles):
+    plan = charger_regles(DEFINITIONS)
+    profil = ProfilColonnes(sale_regles)
+    for regle in plan.regles:
+        attendu = int(masque(profil, regle).sum())
+        if regle.type == 'non_nul':
+            assert profil.nb_na(regle.colonnes[0]) == attendu
+        else:
+            assert profil.nb_violations(regle.cle, plan.passe(regle)) == attendu, regle.nom
+
+
+def test_seuils_comme_pandas(sale_regles):
+    plan = charger_regles(DEFINITIONS)
+    profil = ProfilColonnes(sale_regles)
+    prix = sale_regles['Price'].astype(float)
+    for i in range(SEUILS_DIRECTS + 4):
+        regle = plan.par_check['ranges'][i]
+        bas, haut = regle.cle[2:]
+        assert profil.nb_violations(regle.cle, plan.passe(regle)) == int(((prix < bas) | (prix > haut)).sum())
+
+
+def test_une_passe_par_groupe():
+    plan = charger_regles(DEFINITIONS)
+    # intervalles et valeurs numériques de Price partagent la passe des seuils, les six opérateurs
+    # celle de la paire, les deux tolérances celle du produit
+    assert sorted(plan.passes) == sorted([
+        ('seuils', 'Price'), ('seuils', 'Quantity'), ('ensemble', 'Status'), ('ensemble', 'Counterparty'),
+        ('identite', 'Value', 'produit', ('Quantity', 'Price')),
+        ('identite', 'Value', 'somme', ('Quantity', 'Price')),
+        ('comparaison', 'Commission', 'Price', False), ('comparaison', 'SettlementDate', 'Date', True)])
+
+
+def test_resultats_des_checks(sale_regles):
+    analyseur = AnalyseurQualite(sale_regles, regles=PLAN_DEFAUT.etendre(charger_regles(DEFINITIONS)))
+    analyseur.analyser_tout()
+    categoriques = analyseur.resultats['categoriques']
+    assert not categoriques['passed']
+    assert set(categoriques['issues']) >= {'statuts', 'contreparties'}
+    assert 'metier' in analyseur.checks
+
+
+def test_etendre_remplace_meme_nom():
+    plan = PLAN_DEFAUT.etendre(charger_regles([
+        {"nom": "Price", "check": "ranges", "type": "intervalle", "colonne": "Price", "min": 0.5}]))
+    prix = [regle for regle in plan.par_check['ranges'] if regle.nom == 'Price']
+    assert len(prix) == 1 and prix[0].cle[2] == 0.5
+    assert len(plan.regles) == len(PLAN_DEFAUT.regles)
+
+
+def test_charger_json_et_yaml(tmp_path):
+    pytest.importorskip('yaml')
+    definition = {"nom": "Price", "check": "ranges", "type": "intervalle", "colonne": "Price", "min": 0}
+    (tmp_path / 'regles.json').write_text(json.dumps({"regles": [definition]}))
+    (tmp_path / 'regles.yaml').write_text(
+        "- nom: Price\n  check: ranges\n  type: intervalle\n  colonne: Price\n  min: 0\n")
+    depuis_json = charger_regles(str(tmp_path / 'regles.json'))
+    depuis_yaml = charger_regles(str(tmp_path / 'regles.yaml'))
+    assert depuis_json.empreinte == depuis_yaml.empreinte
+
+
+@pytest.mark.parametrize('definition', [
+    {"nom": "x", "type": "inconnu"},
+    {"nom": "x", "type": "intervalle"},
+    {"nom": "x", "type": "intervalle", "colonne": "Price"},
+    {"nom": "x", "type": "valeurs", "colonne": "Status", "autorisees": ["A"], "interdites": ["B"]},
+    {"nom": "x", "type": "comparaison", "gauche": "a", "operateur": "=<", "droite": "b"},
+    {"nom": "x", "type": "identite", "resultat": "a", "facteurs": ["b"], "operation": "quotient"},
+    {"nom": "x", "type": "non_nul", "colonne": "a", "severite": "FATAL"},
+])
+def test_definitions_invalides(definition):
+    with pytest.raises(ValueError):
+        charger_regles([definition])
+
+
+def test_ensemble_sur_colonne_numerique(trades):
+    # liste mixte: famille 'ensemble', valeurs comparées en texte même sur une colonne d'entiers
+    plan = charger_regles([{"nom": "desks", "check": "categoriques", "type": "valeurs", "colonne": "Desk",
+                            "autorisees": [1, 2, "FX"]}])
+    df = trades.assign(Desk=np.arange(len(trades)) % 4)
+    regle = plan.regles[0]
+    assert regle.groupe[0] == 'ensemble'
+    profil = ProfilColonnes(df)
+    attendu = int((~df['Desk'].isin([1, 2])).sum())
+    assert int(masque(profil, regle).sum()) == attendu
+    assert profil.nb_violations(regle.cle, plan.passe(regle)) == attendu
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from qualite import AnalyseurQualite
+from qualite.service import ServiceAnalyses
+
+
+@pytest.fixture(scope='module')
+def analyseur(trades):
+    analyseur = AnalyseurQualite(trades.head(100))
+    analyseur.analyser_tout()
+    return analyseur
+
+
+def vider(service, delai=10):
+    # le worker range le résultat puis oublie la tâche juste après executer()
+    fin = time.monotonic() + delai
+    while service.etat()['en_cours'] or service.etat()['en_attente']:
+        assert time.monotonic() < fin
+        time.sleep(0.01)
+
+
+def occuper(service, analyseur):
+    """Soumet une tâche qui bloque le seul worker jusqu'à ce que l'événement renvoyé soit levé."""
+    liberation, demarree = threading.Event(), threading.Event()
+
+    def bloquer(progression, annulation):
+        demarree.set()
+        liberation.wait()
+        return analyseur
+
+    service.soumettre('bloquante', bloquer, 'x', cache=False)
+    demarree.wait()
+    return liberation
+
+
+def enregistrer(ordre, nom, analyseur):
+    def fonction(progression, annulation):
+        ordre.append(nom)
+        return analyseur
+    return fonction
+
+
+def test_files_servies_a_tour_de_role(analyseur):
+    service = ServiceAnalyses(nb_workers=1)
+    liberation = occuper(service, analyseur)
+    ordre = []
+    for nom in ('a1', 'a2', 'a3'):
+        service.soumettre(nom, enregistrer(ordre, nom, analyseur), 'alice')
+    _, tache_b = service.soumettre('b1', enregistrer(ordre, 'b1', analyseur), 'bob')
+    # le lot d'alice ne fait pas attendre bob plus d'une tâche
+    assert service.position(tache_b) == 1
+    liberation.set()
+    vider(service)
+    assert ordre == ['a1', 'b1', 'a2', 'a3']
+
+
+def test_meme_cle_une_seule_tache(analyseur):
+    service = ServiceAnalyses(nb_workers=1)
+    liberation = occuper(service, analyseur)
+    ordre = []
+    _, premiere = service.soumettre('cle', enregistrer(ordre, 'alice', analyseur), 'alice')
+    _, seconde = service.soumettre('cle', enregistrer(ordre, 'bob', analyseur), 'bob')
+    assert premiere is seconde
+    liberation.set()
+    vider(service)
+    assert ordre == ['alice']
+    # résultat gardé: la soumission suivante est servie sans tâche
+    assert service.soumettre('cle', enregistrer(ordre, 'carole', analyseur), 'carole') == (analyseur, None)
+
+
+def test_annulee_quand_plus_personne_n_attend(analyseur):
+    service = ServiceAnalyses(nb_workers=1)
+    liberation = occuper(service, analyseur)
+    ordre = []
+    _, tache = service.soumettre('cle', enregistrer(ordre, 'cle', analyseur), 'alice')
+    service.soumettre('cle', enregistrer(ordre, 'cle', analyseur), 'bob')
+    service.abandonner(tache, 'alice')
+    assert tache.en_cours and service.position(tache) == 0
+    service.abandonner(tache, 'bob')
+    # encore en file: annulée tout de suite, sans attendre le worker
+    assert tache.etat == 'annulee'
+    assert service.etat()['en_attente'] == 0
+    liberation.set()
+    vider(service)
+    assert ordre == [] and len(service.resultats) == 0
+
+
+def test_sans_cache_ni_lu_ni_garde(analyseur):
+    service = ServiceAnalyses(nb_workers=1)
+    ordre = []
+    for _ in range(2):
+        resultat, tache = service.soumettre('cle', enregistrer(ordre, 'cle', analyseur), 'alice', cache=False)
+        assert resultat is None
+        tache.attendre()
+        vider(service)
+    assert ordre == ['cle', 'cle'] and len(service.resultats) == 0
+
+
+def test_resultats_evinces(analyseur):
+    service = ServiceAnalyses(nb_workers=1, capacite=1)
+    ordre = []
+    for cle in ('a', 'b', 'a'):
+        service.soumettre(cle, enregistrer(ordre, cle, analyseur), 'alice')
+        vider(service)
+    # a, évincé par b, est recalculé
+    assert ordre == ['a', 'b', 'a']
+    assert service.resultats.evictions == 2
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from qualite import AnalyseurQualite
+from qualite.tendances import NIVEAUX, HistoriqueQualite, derive, nom_jeu
+
+
+def analyser(df, jour, tendances=None):
+    analyseur = AnalyseurQualite(df.assign(Date=f'2024-03-{jour:02d}'), source=f'trades_2024-03-{jour:02d}.csv',
+                                 tendances=tendances)
+    analyseur.analyser_tout()
+    return analyseur
+
+
+@pytest.fixture
+def historique(tmp_path, trades):
+    """Historique de trois journées du même jeu, sans dérive entre elles."""
+    historique = HistoriqueQualite(str(tmp_path / 'qualite.sqlite'))
+    for jour in (1, 2, 3):
+        historique.enregistrer(analyser(trades.sample(frac=0.8, random_state=jour), jour))
+    yield historique
+    historique.fermer()
+
+
+@pytest.mark.parametrize('source, jeu', [
+    ('data/trades_2024-05-01.csv', 'trades'), ('trades-20240501.parquet', 'trades'),
+    ('fx.trades.csv', 'fx.trades'), ('2024-05-01.csv', 'sans_nom'), (None, 'sans_nom')])
+def test_nom_jeu(source, jeu):
+    assert nom_jeu(source) == jeu
+
+
+def test_derive():
+    rng = np.random.default_rng(0)
+    centiles = [np.quantile(rng.normal(size=5_000), NIVEAUX) for _ in range(3)]
+    psi, ks = derive(centiles[0], centiles[1:])
+    assert psi < 0.02 and ks < 0.05
+    psi, ks = derive(centiles[0] + 1, centiles[1:])
+    assert psi > 0.2 and ks > 0.3
+
+
+def test_enregistrer_et_relire(historique, trades):
+    assert len(historique) == 3 and historique.jeux() == ['trades']
+    analyses = historique.analyses('trades')
+    # rangées à la date des données, pas à celle de l'analyse
+    assert [str(date.date()) for date in analyses['date']] == ['2024-03-01', '2024-03-02', '2024-03-03']
+    assert len(historique.analyses('trades', depuis='2024-03-02')) == 2
+    checks = historique.checks('trades')
+    assert set(checks['nom']) == set(AnalyseurQualite.checks) and len(checks) == 3 * len(AnalyseurQualite.checks)
+    comptes = historique.comptes('trades')
+    assert set(comptes[comptes['nom'] == 'valeurs_manquantes']['element']) == set(trades.columns)
+    # même empreinte: pas de doublon
+    analyseur = analyser(trades, 4)
+    assert historique.enregistrer(analyseur, empreinte='a') is not None
+    assert historique.enregistrer(analyseur, empreinte='a') is None
+    assert len(historique) == 4
+
+
+def test_check_derive(historique, trades):
+    stable = analyser(trades, 4, historique)
+    assert stable.resultats['derive']['passed']
+    assert stable.resultats['derive']['reference'] == "3 analyse(s) précédente(s)"
+
+    decale = analyser(trades.assign(Price=trades['Price'] * 3), 4, historique)
+    assert not decale.resultats['derive']['passed']
+    assert list(decale.resultats['derive']['issues']) == ['Price']
+
+
+def test_sans_reference(tmp_path, trades):
+    historique = HistoriqueQualite(str(tmp_path / 'qualite.sqlite'))
+    analyseur = analyser(trades, 1, historique)
+    assert analyseur.resultats['derive']['passed']
+    assert analyseur.resultats['derive']['reference'] == "0 analyse(s) précédente(s)"
+    historique.fermer()
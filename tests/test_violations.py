@@ -0,0 +1,35 @@
+from qualite import AnalyseurQualite
+from qualite.chaines import minoritaires_casse, minoritaires_format
+from qualite.chargement import charger
+from qualite.violations import index_violations
+
+
+def analyser(chemin):
+    analyseur = AnalyseurQualite(charger(chemin, chemin))
+    analyseur.analyser_tout()
+    return analyseur
+
+
+def test_strings_variantes_dans_l_index(fichiers):
+    # le générateur mélange EUR/USD et EURUSD.FX: seules des variantes de format, sans défaut d'hygiène
+    analyseur = analyser(fichiers['trades'])
+    nb = analyseur.profil.nb_variantes_format('Instrument')
+    assert nb > 0
+    assert analyseur.resultats['strings']['issues']['Instrument'] == f"{nb} formats de ticker"
+    index = index_violations(analyseur)
+    assert len(index.entrees[('strings', 'Instrument')]) == nb
+
+
+def test_strings_casse_et_espaces(fichiers):
+    analyseur = analyser(fichiers['sale'])
+    index = index_violations(analyseur)
+    lignes = index.lignes([('strings', 'Counterparty')])
+    # 'BNP ' (espace final) et 'ubs' (minoritaire face à 'UBS')
+    assert sorted(analyseur.df['Counterparty'].iloc[lignes]) == ['BNP ', 'ubs']
+
+
+def test_variantes_sans_espaces():
+    comptes = {' EUR/USD': 60, 'EUR/USD': 50, 'EURUSD.FX': 80, 'eur/usd ': 5, 'GBP/USD\t': 3}
+    # ' EUR/USD' et 'EUR/USD' font une seule graphie (110), majoritaire face à EURUSD.FX
+    assert minoritaires_format(comptes).to_dict() == {'EURUSD.FX': 80}
+    assert minoritaires_casse(comptes).to_dict() == {'eur/usd ': 5}